@@ -5,23 +5,55 @@ import plotly.graph_objects as go
 from itertools import product
 from datetime import datetime
 import os
+import threading
+import uuid
 from dotenv import load_dotenv
 import dash
 import dash_bootstrap_components as dbc
-from dash import html, dcc, callback_context
+from dash import html, dcc, callback_context, no_update
 from dash.exceptions import PreventUpdate
 from dash.dependencies import Input, Output, State
+from flask import jsonify
 import duckdb
 
 ############################################################################################
 
 from scenes.home import home_page
-from scenes.dashboard import dashboard_page, display_fig, rose_plot
+from scenes.dashboard import (
+    dashboard_page, display_fig, rose_plot, stats_table_columns, PROGRESS_VISIBLE, PROGRESS_HIDDEN
+)
+from scenes.dashboardComponents.qbDropdown import qb_dropdown
 from components.globalComponents.navigationbar import navigation_bar
-from scenes.utils.drawPlotlyField import draw_plotly_field
+from scenes.utils.drawPlotlyField import (
+    draw_plotly_field, field_scatter_trace, MAX_FIELD_POINTS, SCATTERGL_MIN_POINTS
+)
 from scenes.utils.qb_helpers import (
     bin_direction, bin_depth, bin_playclock, bin_play_outcome,
-    aggregate_heatmap, aggregate_rose, aggregate_timeline, aggregate_sankey
+    aggregate_heatmap, aggregate_timeline, aggregate_sankey, aggregate_playclock,
+    percentile_bands, nearest_peers, PLAY_OUTCOMES, PLAYCLOCK_RANGES
+)
+from scenes.utils.qb_shards import ShardCache, QUARTER_SECONDS, load_qb_shard, store_qb_shard
+from scenes.utils.bitmap_index import LeagueIndex, build_league_index, date_bounds
+from scenes.utils.columnar_store import PlayStore, STORE_DIR, database_signature
+from scenes.utils.background_jobs import BackgroundJobs, make_manager, report_progress
+from scenes.utils.date_rollup import DateRollup, covers, pass_stats, playclock_shares, rose_frame
+from scenes.utils.similarity import TendencyIndex
+from scenes.utils.field_tiers import (
+    coarse_trace, field_coordinates, figure_tier, fine_trace, raster_image, FINE_BINS
+)
+from scenes.utils.result_cache import ResultCache, data_version, normalize_arguments, to_json, uncached
+from scenes.utils.figure_payload import FigureCompactor
+from scenes.utils.http_cache import ResponseOptimizer
+from scenes.utils.prerender import PrerenderStore, PRERENDER_DIR
+from scenes.utils.popularity import PopularityTracker, CacheWarmer
+from scenes.utils.snapshots import ManifestWatcher, read_manifest, snapshot_paths, MANIFEST_PATH
+from scenes.utils.sql_aggregates import (
+    filter_clause, rose_counts, sankey_counts, pass_stats_splits, table_page, SummaryTables,
+    field_cell_counts, playclock_counts, rose_counts_by_passer, weekly_running_totals, opponent_adjusted
+)
+from scenes.utils.trends import rolling_trends, trend_figure
+from scenes.utils.comparison import (
+    MAX_COMPARED, compared_passers, field_multiples, lineplot_multiples, playclock_matrix, rose_multiples
 )
 
 ############################################################################################
@@ -43,12 +75,441 @@ app = dash.Dash(__name__,
                 )
 server = app.server
 
+DEFAULT_QB = qb_dropdown.value
+
+# Manifest the ETL publishes each data snapshot through
+DATA_MANIFEST = os.environ.get('DATA_MANIFEST', MANIFEST_PATH)
+
+def resolve_data_source():
+    """
+    Locate the data to serve. NFL_DB_PATH pins a database file; otherwise
+    the snapshot named by the ETL's manifest is used, falling back to
+    data/nfl.db when there is no manifest.
+
+    Returns:
+        tuple: (data version, database path, shared dataset directory)
+    """
+    if 'NFL_DB_PATH' not in os.environ:
+        manifest = read_manifest(DATA_MANIFEST)
+        if manifest is not None:
+            database_path, store_dir = snapshot_paths(manifest, DATA_MANIFEST)
+            return manifest['version'], database_path, store_dir
+
+    database_path = os.environ.get('NFL_DB_PATH', 'data/nfl.db')
+    return data_version(database_path), database_path, os.environ.get('SHARED_DATASET_DIR', STORE_DIR)
+
+DATA_VERSION, DATABASE_PATH, SHARED_DATASET_DIR = resolve_data_source()
+
+con = None
+connection_pid = None
+
+def connect_database():
+    """Open the read-only DuckDB connection used by every callback."""
+    global con, connection_pid
+    try:
+        con = duckdb.connect(DATABASE_PATH, read_only=True)
+    except Exception as e:
+        print(f"Warning: Could not connect to database: {e}")
+        con = None
+    connection_pid = os.getpid()
+    return con
+
+def close_database():
+    """Close the DuckDB connection (before forking server workers)."""
+    global con
+    if con is not None:
+        con.close()
+        con = None
+
 # Initialize DuckDB connection
-try:
-    con = duckdb.connect("data/nfl.db", read_only=True)
-except Exception as e:
-    print(f"Warning: Could not connect to database: {e}")
-    con = None
+connect_database()
+
+inherited_connections = []
+
+def prepare_job_process():
+    """
+    Give a background job's process its own DuckDB connection. The handle
+    inherited through fork belongs to the server process; it is kept
+    referenced (never closed) so the child doesn't tear it down.
+    """
+    if connection_pid != os.getpid():
+        inherited_connections.append(con)
+        connect_database()
+
+# Results of the figure and table callbacks, shared on disk by every worker
+# and across restarts; keyed by the data version so a new database never
+# serves stale entries
+result_cache = ResultCache(
+    os.environ.get('RESULT_CACHE_PATH', os.path.join('data', 'cache', 'results.sqlite')),
+    max_bytes=int(os.environ.get('RESULT_CACHE_MAX_MB', 256)) * 1024 * 1024,
+    version=lambda: DATA_VERSION if os.environ.get('RESULT_CACHE', 'on').lower() != 'off' else None,
+)
+
+# Stats table splits materialized as Parquet per data version and sidebar
+# filters, so paging, sorting and filtering a table only runs the page query
+summary_tables = SummaryTables(os.environ.get('SUMMARY_TABLE_DIR', os.path.join('data', 'cache', 'tables')))
+
+# Request counts per callback and QB/filter combination, shared by every
+# worker. A background thread replays the CACHE_WARM_TOP_N most requested into
+# the result cache at startup and after each data version change, only while
+# every worker is idle.
+popularity = PopularityTracker(os.environ.get('POPULARITY_PATH', os.path.join('data', 'cache', 'popularity.sqlite')))
+cache_warmer = CacheWarmer(
+    popularity,
+    version=result_cache.version,
+    top_n=int(os.environ.get('CACHE_WARM_TOP_N', 50)),
+    idle_seconds=float(os.environ.get('CACHE_WARM_IDLE_SECONDS', 2)),
+)
+# Every worker notes its callback requests in the shared file, so warming
+# waits for the whole server to go quiet
+popularity.init_app(server, prefix=app.config.routes_pathname_prefix)
+
+
+# League-wide callbacks (stats table, line plot) run as background jobs in
+# their own processes when diskcache is installed, so they never hold a
+# server thread. BACKGROUND_CALLBACKS: 'auto', 'on' (require it) or 'off'.
+background_manager, background_cache = make_manager(
+    os.environ.get('BACKGROUND_CACHE_PATH', os.path.join('data', 'cache', 'background')),
+    os.environ.get('BACKGROUND_CALLBACKS', 'auto').lower(),
+)
+background = BackgroundJobs(background_manager, on_start=prepare_job_process, on_finish=popularity.flush,
+                            interval=int(os.environ.get('BACKGROUND_POLL_MS', 500)))
+
+# Default-view figures for every QB, built by prerender.py after the ETL and
+# filed under the data version they were computed from
+prerendered = PrerenderStore(
+    os.environ.get('PRERENDER_DIR', PRERENDER_DIR),
+    version=lambda: DATA_VERSION if os.environ.get('PRERENDER', 'on').lower() != 'off' else None,
+)
+
+# Compact serialization for every figure the callbacks return: numbers are
+# rounded to FIGURE_PRECISION decimals, unused customdata columns dropped and
+# figures over FIGURE_BUDGET_KB thinned. Typed arrays need plotly.js >= 2.28.
+FIGURE_TYPED_ARRAYS = os.environ.get('FIGURE_TYPED_ARRAYS', 'auto').lower()
+figure_compactor = FigureCompactor(
+    precision=int(os.environ.get('FIGURE_PRECISION', 3)),
+    budget_bytes=int(os.environ.get('FIGURE_BUDGET_KB', 512)) * 1024,
+    typed_arrays=None if FIGURE_TYPED_ARRAYS == 'auto' else FIGURE_TYPED_ARRAYS == 'on',
+)
+
+# gzip/brotli compression for responses over COMPRESS_MIN_BYTES, plus ETag
+# and Cache-Control validators keyed on the data version for the pages, the
+# layout and assets/ so repeat visits revalidate with a bodiless 304
+response_optimizer = ResponseOptimizer(
+    version=lambda: DATA_VERSION,
+    min_size=int(os.environ.get('COMPRESS_MIN_BYTES', 1024)),
+    level=int(os.environ.get('COMPRESS_LEVEL', 6)),
+    asset_max_age=int(os.environ.get('ASSET_MAX_AGE', 3600)),
+    enabled=os.environ.get('RESPONSE_COMPRESSION', 'on').lower() != 'off',
+)
+response_optimizer.init_app(server, prefix=app.config.routes_pathname_prefix)
+
+# Memory-mapped dataset written by scrape_data.py. 'auto' uses it when it
+# matches the database, 'on' requires it and 'off' always reads DuckDB.
+SHARED_DATASET = os.environ.get('SHARED_DATASET', 'auto').lower()
+
+play_store = None
+league_index = None
+date_rollup = None
+tendency_index = None
+qb_options_cache = None
+caches_warm = False
+
+def current_store():
+    """
+    The league-wide PlayStore: memory-mapped from the shared dataset, or
+    built from DuckDB alongside the league index. Its row ids are the play
+    ids the field figure sends to the browser.
+    """
+    if play_store is not None:
+        return play_store
+    return league_index.store if league_index is not None else None
+
+def load_shard(passer):
+    store = current_store()
+    if store is not None:
+        return store_qb_shard(store, passer)
+    return load_qb_shard(con, passer)
+
+# Per-QB columnar shards used to evaluate sidebar filters without DuckDB
+qb_shards = ShardCache(load_shard, maxsize=int(os.environ.get('QB_SHARD_CACHE_SIZE', 32)))
+
+# Receivers drawn individually in the rose plot; the rest share an 'Other' slice
+ROSE_TOP_K = int(os.environ.get('ROSE_TOP_K', 8))
+
+# QBs drawn in the line plot's 'show peers' mode
+LINEPLOT_PEERS = int(os.environ.get('LINEPLOT_PEERS', 10))
+
+# QBs listed in the most similar QBs panel
+SIMILAR_QBS = int(os.environ.get('SIMILAR_QBS', 5))
+
+# Selections with at least this many plays get a coarse field grid first and
+# the fine grid and points from a follow-up callback (0 disables)
+FIELD_PROGRESSIVE_PLAYS = int(os.environ.get('FIELD_PROGRESSIVE_PLAYS', 1000))
+
+# Pass points drawn with WebGL from this many, and thinned by density above
+# the second budget (0 disables either)
+FIELD_WEBGL_POINTS = int(os.environ.get('FIELD_WEBGL_POINTS', SCATTERGL_MIN_POINTS))
+FIELD_MAX_POINTS = int(os.environ.get('FIELD_MAX_POINTS', MAX_FIELD_POINTS))
+
+# Selections at least this large are refined to a raster image of their
+# density instead of a contour grid and points (0 disables). At the default
+# only league-wide views of more than a season reach it; no single QB's
+# career is this large.
+FIELD_RASTER_PLAYS = int(os.environ.get('FIELD_RASTER_PLAYS', 15000))
+
+def open_shared_dataset(store_dir, database_path):
+    """
+    Map the ETL's columnar store and league index read-only.
+
+    Args:
+        store_dir: Directory the ETL exported the store to
+        database_path: Database the store must have been exported from
+
+    Returns:
+        tuple: (PlayStore, LeagueIndex), or (None, None) when the store is
+               disabled, missing or older than the database
+    """
+    if SHARED_DATASET == 'off' or not PlayStore.exists(store_dir):
+        if SHARED_DATASET == 'on':
+            raise RuntimeError(f"Shared dataset not found in {store_dir}; run scrape_data.py")
+        return None, None
+
+    store = PlayStore.load(store_dir)
+    if store.meta.get('database') != database_signature(database_path):
+        if SHARED_DATASET == 'on':
+            raise RuntimeError(f"Shared dataset in {store_dir} is older than {database_path}")
+        print("Warning: Shared dataset is out of date with the database; ignoring it")
+        return None, None
+
+    index_dir = os.path.join(store_dir, 'league_index')
+    if os.path.exists(index_dir):
+        return store, LeagueIndex.load(index_dir, store)
+    return store, LeagueIndex.from_store(store)
+
+def open_date_rollup(store_dir, store, index):
+    """
+    Date-range prefix sums over the league index's plays.
+
+    Args:
+        store_dir: Directory the ETL exported the store to
+        store: The mapped shared PlayStore, or None if it wasn't used
+        index: LeagueIndex the sums must agree with
+
+    Returns:
+        DateRollup: Mapped from the ETL's export alongside the shared
+                    store, or built from the index without one
+    """
+    rollup_dir = os.path.join(store_dir, 'date_rollup')
+    if store is not None and os.path.exists(rollup_dir):
+        try:
+            return DateRollup.load(rollup_dir, store)
+        except (OSError, ValueError, KeyError) as e:
+            # Missing, or written by an older version of this module
+            print(f"Warning: Could not load date rollup: {e}")
+    return DateRollup.from_index(index)
+
+def open_tendency_index(store_dir, store, index):
+    """
+    Career tendency vectors for the most similar QBs panel.
+
+    Args:
+        store_dir: Directory the ETL exported the store to
+        store: The mapped shared PlayStore, or None if it wasn't used
+        index: LeagueIndex whose store the vectors are built from without one
+
+    Returns:
+        TendencyIndex: Mapped from the ETL's export alongside the shared
+                       store, or built from the index's store without one
+    """
+    similarity_dir = os.path.join(store_dir, 'tendency_index')
+    if store is not None and os.path.exists(similarity_dir):
+        try:
+            return TendencyIndex.load(similarity_dir, store)
+        except (OSError, ValueError, KeyError) as e:
+            # Missing, or written by an older version of this module
+            print(f"Warning: Could not load tendency index: {e}")
+    return TendencyIndex.from_store(store if store is not None else index.store)
+
+def load_qb_options(store, connection):
+    """Sorted dropdown options for every passer in pbp."""
+    if store is not None:
+        return [{'label': passer, 'value': passer} for passer in store.categories['passer']]
+
+    qbs_df = pd.read_sql_query(
+        "SELECT DISTINCT passer_player_name FROM pbp WHERE passer_player_name IS NOT NULL", 
+        con=connection
+    )
+    qbs_df = qbs_df.rename(columns={'passer_player_name': 'label'})
+    qbs_df['value'] = qbs_df['label']
+    qbs_df = qbs_df[['label', 'value']].sort_values('label').reset_index(drop=True)
+    return qbs_df.to_dict('records')
+
+def warm_caches():
+    """
+    Build the league-wide index, date rollup, tendency index, QB options and
+    default QB shard.
+
+    Called once at import so that a preloading server builds everything in
+    the master process and forked workers share it copy-on-write.
+    """
+    global play_store, league_index, date_rollup, tendency_index, qb_options_cache, caches_warm
+    if con is None:
+        return False
+
+    try:
+        # League-wide bitmap index over every pass play, mapped from the
+        # shared dataset when available so workers share its pages
+        play_store, league_index = open_shared_dataset(SHARED_DATASET_DIR, DATABASE_PATH)
+        if league_index is None:
+            league_index = build_league_index(con)
+        date_rollup = open_date_rollup(SHARED_DATASET_DIR, play_store, league_index)
+        tendency_index = open_tendency_index(SHARED_DATASET_DIR, play_store, league_index)
+        qb_options_cache = load_qb_options(play_store, con)
+        qb_shards.get(DEFAULT_QB)
+        caches_warm = True
+    except Exception as e:
+        print(f"Warning: Could not warm caches: {e}")
+        caches_warm = False
+    return caches_warm
+
+warm_caches()
+
+def start_background_tasks():
+    """
+    Start the manifest watcher and cache warming threads (in each server
+    worker, after forking; threads don't survive fork).
+    """
+    manifest_watcher.start()
+    if os.environ.get('CACHE_WARM', 'on').lower() != 'off':
+        cache_warmer.start()
+
+# Seconds a replaced connection stays open for requests still using it
+RETIRED_CONNECTION_SECONDS = int(os.environ.get('GUNICORN_TIMEOUT', 60))
+
+refresh_lock = threading.Lock()
+
+def refresh_data():
+    """
+    Switch to the data version the manifest names, if it changed.
+
+    The new snapshot is opened and indexed next to the one being served;
+    only then are the handles swapped, so requests never wait on a load.
+    The old connection is closed once in-flight requests have had time
+    to finish, and results cached for other versions are dropped.
+
+    Returns:
+        bool: False if the new version could not be opened
+    """
+    global con, DATA_VERSION, DATABASE_PATH, SHARED_DATASET_DIR
+    global play_store, league_index, date_rollup, tendency_index, qb_options_cache, caches_warm
+
+    with refresh_lock:
+        version, database_path, store_dir = resolve_data_source()
+        if version is None or version == DATA_VERSION:
+            return True
+
+        try:
+            new_con = duckdb.connect(database_path, read_only=True)
+            new_store, new_index = open_shared_dataset(store_dir, database_path)
+            if new_index is None:
+                new_index = build_league_index(new_con)
+            new_rollup = open_date_rollup(store_dir, new_store, new_index)
+            new_tendencies = open_tendency_index(store_dir, new_store, new_index)
+            new_options = load_qb_options(new_store, new_con)
+        except Exception as e:
+            print(f"Error opening data version {version}: {e}")
+            return False
+
+        old_con = con
+        con, DATABASE_PATH, SHARED_DATASET_DIR = new_con, database_path, store_dir
+        play_store, league_index, date_rollup, qb_options_cache = new_store, new_index, new_rollup, new_options
+        tendency_index = new_tendencies
+        qb_shards.clear()
+        caches_warm = True
+        # The version goes last: cache keys only name the new version once
+        # every handle above points at its data
+        DATA_VERSION = version
+
+    if old_con is not None:
+        threading.Timer(RETIRED_CONNECTION_SECONDS, old_con.close).start()
+    result_cache.drop_other_versions(version)
+    summary_tables.drop_other_versions(version)
+    print(f"Switched to data version {version} ({database_path})")
+    return True
+
+# Checks the manifest every DATA_REFRESH_SECONDS (0 disables)
+manifest_watcher = ManifestWatcher(DATA_MANIFEST, refresh_data,
+                                   interval=int(os.environ.get('DATA_REFRESH_SECONDS', 30)))
+
+def select_league_plays(down_filter, depth_filter, direction_filter, playclock_filter,
+                        time_filter, start_date, end_date):
+    """
+    Resolve the sidebar filters to the matching league-wide pass plays.
+
+    The receiver list is specific to the selected QB, so it is not applied
+    to league views.
+    """
+    return league_index.filter_frame(league_bits(down_filter, depth_filter, direction_filter, playclock_filter,
+                                                 time_filter, start_date, end_date))
+
+def league_bits(down_filter, depth_filter, direction_filter, playclock_filter,
+                time_filter, start_date, end_date):
+    """
+    Bitset of the league-wide pass plays matching the sidebar filters.
+    """
+    quarter_seconds = None
+    if time_filter and (time_filter[0] > 0 or time_filter[1] < QUARTER_SECONDS):
+        quarter_seconds = time_filter
+
+    return league_index.select(down=down_filter, depth=depth_filter, direction=direction_filter,
+                               play_clock=playclock_filter, quarter_seconds=quarter_seconds,
+                               game_date=(start_date, end_date))
+
+def rollup_applies(playclock_filter, time_filter, depth_filter, down_filter, direction_filter,
+                   receiver_filter=None, receivers=None):
+    """
+    Whether the date rollup can answer a view: only its dates (if anything)
+    differ from a freshly opened dashboard's filters.
+    """
+    return date_rollup is not None and covers(
+        {'playclock_filter': playclock_filter, 'time_filter': time_filter, 'depth_filter': depth_filter,
+         'down_filter': down_filter, 'direction_filter': direction_filter, 'receiver_filter': receiver_filter},
+        receivers)
+
+#############################################################################################
+
+@server.route('/health')
+def health():
+    # Liveness: the process is up and serving requests
+    return jsonify(status='ok')
+
+@server.route('/payloads')
+def payloads():
+    # Figure response sizes per callback for this worker process
+    return jsonify(figure_compactor.stats.snapshot())
+
+@server.route('/compression')
+def compression():
+    # Bytes before and after compression per response class for this worker
+    return jsonify(response_optimizer.stats())
+
+@server.route('/popularity')
+def popularity_report():
+    # Most requested callback states and this worker's warming status
+    top = [{'callback': name, 'arguments': arguments, 'requests': count}
+           for name, arguments, count in popularity.top(20)]
+    return jsonify(top=top, warmer=cache_warmer.status())
+
+@server.route('/ready')
+def ready():
+    # Readiness: the database is open and the startup caches are built
+    checks = {
+        'database': con is not None,
+        'caches': caches_warm,
+    }
+    is_ready = all(checks.values())
+    return jsonify(status='ready' if is_ready else 'starting', checks=checks), 200 if is_ready else 503
 
 #############################################################################################
 
@@ -98,29 +559,24 @@ def update_image(qb_name):
 
 @app.callback(
     Output(component_id='qb-select', component_property='options'),
+    Output(component_id='compare-select', component_property='options'),
     Input(component_id='qb-options', component_property='data'),
 )
 def update_qb_options(qb_options):
-    return qb_options
+    return qb_options, qb_options
 
 @app.callback(
     Output(component_id='qb-options', component_property='data'),
     Input(component_id='qb-options', component_property='data'),
 )
 def get_qb_options(data):
+    if qb_options_cache is not None:
+        return qb_options_cache
     if con is None:
         return []
     
     try:
-        qbs_df = pd.read_sql_query(
-            "SELECT DISTINCT passer_player_name FROM pbp WHERE passer_player_name IS NOT NULL", 
-            con=con
-        )
-        qbs_df = qbs_df.rename(columns={'passer_player_name': 'label'})
-        qbs_df['value'] = qbs_df['label']
-        qbs_df = qbs_df[['label', 'value']].sort_values('label').reset_index(drop=True)
-        qb_options = qbs_df.to_dict('records')
-        return qb_options
+        return load_qb_options(play_store, con)
     except Exception as e:
         print(f"Error getting QB options: {e}")
         return []
@@ -135,14 +591,9 @@ def update_receiver_data(qb_name):
         return [], []
     
     try:
-        receivers_df = pd.read_sql_query(
-            "SELECT DISTINCT receiver_player_name FROM pbp WHERE passer_player_name = ? AND receiver_player_name IS NOT NULL", 
-            con=con, params=[qb_name]
-        )
-        receivers_df = receivers_df.rename(columns={'receiver_player_name': 'label'})
-        receivers_df['value'] = receivers_df['label']
-        receivers_df = receivers_df[['label', 'value']].sort_values('label').reset_index(drop=True)
-        receiver_options = receivers_df.to_dict('records')
+        # Loading the shard here also warms it for the figures that follow
+        shard = qb_shards.get(qb_name)
+        receiver_options = [{'label': receiver, 'value': receiver} for receiver in shard.receivers]
         
         return receiver_options, [receiver['value'] for receiver in receiver_options]
     except Exception as e:
@@ -193,225 +644,100 @@ def update_direction_dropdown_label(direction_filter, directions_options):
 ############################### FIELD HEATMAP FIGURE ###############################
 ####################################################################################
 
-@app.callback(
-    Output(component_id='display-graph', component_property='figure'),
-    Output(component_id='rose-plot', component_property='figure'),
-    Input(component_id='pass-detail-filter', component_property='value'),
-    Input(component_id='tooltips-toggle', component_property='on'),
-    Input(component_id='rose-toggle', component_property='value'),
-    Input(component_id='playclock-filter', component_property='value'),
-    Input(component_id='time-filter', component_property='value'),
-    Input(component_id='receiver-filter', component_property='value'),
-    Input(component_id='depth-filter', component_property='value'),
-    Input(component_id='down-filter', component_property='value'),
-    Input(component_id='direction-filter', component_property='value'),
-    Input(component_id='date-filter', component_property='start_date'),
-    Input(component_id='date-filter', component_property='end_date'),
-    Input(component_id="qb-select", component_property="value"),
-)
+def empty_field():
+    field_fig = go.Figure()
+    draw_plotly_field(field_fig, show_title=False, labelticks=False, show_axis=False,
+                     glayer='above', bg_color='white', margins=0)
+    return field_fig
+
+# The field drawing as plain JSON, so tiers are drawn without plotly
+# re-validating its shapes on every request
+FIELD_LAYOUT = display_fig.layout.to_plotly_json()
+
+def field_figure(tier, x, y, points=None):
+    """
+    The field with one tier of the pass location heatmap drawn on it.
+
+    Args:
+        tier: 'coarse' for the coarse grid alone, 'full' for the fine grid,
+              'raster' for a PNG of the density and no traces
+        x: X coordinates in feet
+        y: Y coordinates in feet
+        points: Scatter trace overlaid on the full tier
+
+    Returns:
+        dict: Field figure with its tier recorded in layout.meta
+    """
+    layout = dict(FIELD_LAYOUT, meta={'tier': tier})
+    if tier == 'raster':
+        return {'data': [], 'layout': dict(layout, images=[raster_image(x, y)])}
+    if tier == 'coarse':
+        traces = [coarse_trace(x, y)]
+    else:
+        traces = [fine_trace(x, y)] + ([points] if points is not None else [])
+    return {'data': [trace.to_plotly_json() for trace in traces], 'layout': layout}
+
+def field_points(shard, mask, pass_detail, isTooltips_on):
+    """
+    Scatter trace of the selected pass locations.
+
+    Returns:
+        tuple: (x, y, trace) with the trace from field_scatter_trace
+    """
+    df = shard.to_frame(mask)
+    x, y = field_coordinates(df['pass_location_x'], df['pass_location_y'])
+    play_keys = df['play_key'].to_numpy() if 'play_key' in df.columns else None
+    return x, y, points_trace(x, y, play_keys, pass_detail, isTooltips_on)
+
+def points_trace(x, y, play_keys, pass_detail, isTooltips_on):
+    """
+    Scatter trace of pass locations, each point carrying its PlayStore row id.
+    """
+    return field_scatter_trace(
+        x,
+        y,
+        # Each point carries only its play id; the play detail panel
+        # looks the rest up on hover or click
+        customdata=play_keys,
+        gl_threshold=FIELD_WEBGL_POINTS,
+        max_points=FIELD_MAX_POINTS,
+        mode='markers',
+        marker=dict(
+            symbol='circle',
+            color='rgba(0, 0, 0, 0.6)',
+            size=3,
+            line=dict(width=0.5, color='white')
+        ),
+        name='Pass Origin' if pass_detail == 'pass_' else 'Pass Target',
+        hovertemplate="Hover or click for play details<extra></extra>" if isTooltips_on else None,
+        hoverinfo=None if isTooltips_on else 'none',
+    )
+
+def passer_selection(qb_name, playclock_filter, time_filter, receiver_filter, depth_filter,
+                     down_filter, direction_filter, start_date, end_date):
+    """
+    A passer's shard and the mask of plays the sidebar filters select.
+    """
+    shard = qb_shards.get(qb_name)
+    mask = shard.mask(down_filter=down_filter, depth_filter=depth_filter,
+                      receiver_filter=receiver_filter, direction_filter=direction_filter,
+                      playclock_filter=playclock_filter, time_filter=time_filter,
+                      start_date=start_date, end_date=end_date)
+    return shard, mask
+
+@popularity.track('display_graph', unordered=('receiver_filter', 'depth_filter', 'down_filter', 'direction_filter'))
+@prerendered.serve('display_graph', receivers=lambda passer: qb_shards.get(passer).receivers)
+@result_cache.memoize('display_graph', unordered=('receiver_filter', 'depth_filter', 'down_filter', 'direction_filter'))
+@figure_compactor.compact_outputs('display_graph')
 def update_display_graph(pass_detail, isTooltips_on, rosetype_toggle, 
                         playclock_filter, time_filter, receiver_filter,
                         depth_filter, down_filter, direction_filter, 
                         start_date, end_date, qb_name):
-    
-    def create_sql_query():
-        # Build query with proper parameterization
-        conditions = []
-        params = []
-        
-        # Base condition for QB
-        conditions.append("passer_player_name = ?")
-        params.append(qb_name)
-        
-        # Play clock filter
-        conditions.append("play_clock BETWEEN ? AND ?")
-        params.extend([playclock_filter[0], playclock_filter[1]])
-        
-        # Down filter
-        if down_filter:
-            placeholders = ','.join(['?' for _ in down_filter])
-            conditions.append(f"down IN ({placeholders})")
-            params.extend(down_filter)
-        
-        # Depth filter
-        if depth_filter:
-            depth_conditions = []
-            for depth in depth_filter:
-                if depth == '0-10 yd':
-                    depth_conditions.append("air_yards BETWEEN 0 AND 10")
-                elif depth == '10-20 yd':
-                    depth_conditions.append("air_yards BETWEEN 10 AND 20")
-                elif depth == '20+ yd':
-                    depth_conditions.append("air_yards > 20")
-            if depth_conditions:
-                conditions.append("(" + " OR ".join(depth_conditions) + ")")
-        
-        # Receiver filter
-        if receiver_filter:
-            placeholders = ','.join(['?' for _ in receiver_filter])
-            conditions.append(f"receiver_player_name IN ({placeholders})")
-            params.extend(receiver_filter)
-        
-        # Direction filter
-        if direction_filter:
-            placeholders = ','.join(['?' for _ in direction_filter])
-            conditions.append(f"pass_direction IN ({placeholders})")
-            params.extend(direction_filter)
-        
-        query = "SELECT * FROM pbp WHERE " + " AND ".join(conditions)
-        return query, params
-    
-    def filter_date_and_time(df):
-        df['game_date'] = pd.to_datetime(df['game_date'])
-        filtered_df = df[(df['game_date'] >= start_date) & (df['game_date'] <= end_date)]
-        return filtered_df
-    
-    def update_field_figure(display_fig, df):
-        # Clear existing traces but keep field markings
-        traces_to_keep = []
-        for trace in display_fig.data:
-            if hasattr(trace, 'type') and trace.type == 'scatter' and hasattr(trace, 'name'):
-                # Keep field annotation traces if they exist
-                continue
-            traces_to_keep.append(trace)
-        
-        # Clear all data traces (keep field shapes)
-        display_fig.data = []
-        
-        # Convert coordinates from yards to feet to match field coordinate system
-        # Field: 0-360 feet (120 yards), Data: 0-100 yards
-        # Field: 0-160 feet (53.33 yards), Data: 5-48 yards
-        
-        # Convert X coordinates (yards to feet, with end zone offset)
-        x_coords = []
-        for x in df['pass_location_x'].to_list():
-            # Convert yardline to field position in feet
-            # End zone is 30 feet, field starts at yard 0
-            field_x = 30 + (x * 3)  # 30 feet end zone offset + yards to feet conversion
-            x_coords.append(field_x)
-        
-        # Convert Y coordinates (yards to feet)
-        y_coords = []
-        for y in df['pass_location_y'].to_list():
-            # Convert sideline position to field position in feet
-            field_y = y * 3  # Convert yards to feet
-            y_coords.append(field_y)
-        
-        # Create density contour with improved styling
-        display_fig.add_trace(go.Histogram2dContour(
-            x=x_coords,
-            y=y_coords,
-            colorscale=[
-                [0, 'rgba(255, 255, 255, 0)'],      # Transparent for low density
-                [0.2, 'rgba(255, 204, 102, 0.3)'],   # Light orange
-                [0.4, 'rgba(255, 153, 51, 0.5)'],    # Medium orange  
-                [0.6, 'rgba(255, 102, 0, 0.7)'],     # Dark orange
-                [0.8, 'rgba(204, 51, 0, 0.8)'],      # Red-orange
-                [1.0, 'rgba(153, 0, 0, 0.9)']        # Dark red
-            ],
-            showscale=False,
-            line=dict(width=1, color='rgba(255,255,255,0.8)'),
-            hoverinfo='skip',
-            contours=dict(
-                coloring='fill',
-                showlines=True,
-                start=1,
-                end=None,
-                size=2
-            ),
-            nbinsx=25,
-            nbinsy=15,
-            opacity=0.8
-        ))
-        
-        # Add scatter points with better visibility
-        display_fig.add_trace(go.Scatter(
-            x=x_coords,
-            y=y_coords,
-            mode='markers',
-            marker=dict(
-                symbol='circle',
-                color='rgba(0, 0, 0, 0.6)',
-                size=3,
-                line=dict(width=0.5, color='white')
-            ),
-            name='Pass Origin' if pass_detail == 'pass_' else 'Pass Target',
-            hoverinfo='text',
-        ))
-
-        # Prepare tooltip data
-        tooltips_data = np.stack((
-            df['receiver_player_name'], 
-            df['air_yards'],
-            df['down'], 
-            df['distance'], 
-            df['game_date'],
-            df['play_clock'], 
-            df['pass_location_x'],
-            df['pass_location_y'],
-            df['passer_player_name'], 
-            df['posteam'],
-            df['defteam'], 
-            df['epa']
-        ), axis=-1)
-
-        display_fig.update_traces(
-            customdata=tooltips_data,
-            selector=dict(type='scatter'),
-            hovertemplate="<b>Date:</b> %{customdata[4]}<br>" +
-                            "<b>Down:</b> %{customdata[2]} & %{customdata[3]}<br>" +
-                            "<b>Receiver:</b> %{customdata[0]}<br>" +
-                            "<b>Air Yards:</b> %{customdata[1]}<br>" +
-                            "<b>Play Clock:</b> %{customdata[5]}<br>" +
-                            "<b>EPA:</b> %{customdata[11]}<br>" if isTooltips_on else None
-        )
-        return display_fig
-    
-    def process_data_for_rose_plot(df):
-        # Create rose plot data for top receivers and play outcomes
-        if df.empty:
-            return pd.DataFrame(columns=['Receiver', 'Play Outcome', 'Frequency'])
-        
-        # Add play outcome binning
-        df['play_outcome_bin'] = df.apply(bin_play_outcome, axis=1)
-        
-        # Get top receivers by total targets
-        receiver_counts = df[df['receiver_player_name'].notna()].groupby('receiver_player_name').size().reset_index(name='total_targets')
-        top_receivers = receiver_counts.nlargest(8, 'total_targets')['receiver_player_name'].tolist()
-        
-        # Filter to top receivers only
-        filtered_df = df[
-            (df['receiver_player_name'].isin(top_receivers)) & 
-            (df['receiver_player_name'].notna())
-        ].copy()
-        
-        if filtered_df.empty:
-            return pd.DataFrame(columns=['Receiver', 'Play Outcome', 'Frequency'])
-        
-        # Create outcome categories
-        outcomes = ['No First Down', 'First Down', 'Touchdown']
-        
-        # Create template with all receiver/outcome combinations
-        template_data = []
-        for receiver in top_receivers:
-            for outcome in outcomes:
-                template_data.append({'Receiver': receiver, 'Play Outcome': outcome, 'Frequency': 0})
-        
-        receivers_df = pd.DataFrame(template_data)
-        
-        # Count actual data by receiver and outcome
-        actual_counts = filtered_df.groupby(['receiver_player_name', 'play_outcome_bin']).size().reset_index()
-        actual_counts = actual_counts.rename({
-            'receiver_player_name': 'Receiver', 'play_outcome_bin': 'Play Outcome', 0: 'Frequency 2'
-        }, axis=1)
-        
-        # Merge template with actual data
-        receivers_df = receivers_df.merge(actual_counts, on=['Receiver', 'Play Outcome'], how='left')
-        receivers_df['Frequency'] = receivers_df[['Frequency', 'Frequency 2']].max(axis=1)
-        receivers_df = receivers_df.drop(columns=['Frequency 2'], errors='ignore')
-        receivers_df['Frequency'] = receivers_df['Frequency'].fillna(0)
-        
-        return receivers_df
+    """
+    Field and rose figures for a selection. Selections of at least
+    FIELD_PROGRESSIVE_PLAYS plays get the coarse field grid only, which
+    refine_display_graph replaces with the full tier.
+    """
     
     def update_rose_plot(receivers_df, rosetype_toggle):
         # Color scheme for play outcomes
@@ -449,33 +775,264 @@ def update_display_graph(pass_detail, isTooltips_on, rosetype_toggle,
 
     if not qb_name or con is None:
         # Return empty field
-        field_fig = go.Figure()
-        draw_plotly_field(field_fig, show_title=False, labelticks=False, show_axis=False,
-                         glayer='above', bg_color='white', margins=0)
-        return field_fig, go.Figure()
+        return uncached((empty_field(), go.Figure()))
 
     try:
-        query, params = create_sql_query()
-        df = pd.read_sql_query(query, con=con, params=params)
-        df = filter_date_and_time(df)
+        shard, mask = passer_selection(qb_name, playclock_filter, time_filter, receiver_filter,
+                                       depth_filter, down_filter, direction_filter, start_date, end_date)
+        selected = int(np.count_nonzero(mask))
     except Exception as e:
         print(f"Error querying data: {e}")
-        field_fig = go.Figure()
-        draw_plotly_field(field_fig, show_title=False, labelticks=False, show_axis=False,
-                         glayer='above', bg_color='white', margins=0)
-        return field_fig, go.Figure()
-
-    if len(df) != 0:
-        new_display_fig = update_field_figure(display_fig, df)
-        receivers_df = process_data_for_rose_plot(df)
+        return uncached((empty_field(), go.Figure()))
+
+    if selected != 0:
+        if FIELD_PROGRESSIVE_PLAYS and selected >= FIELD_PROGRESSIVE_PLAYS:
+            x, y = field_coordinates(shard.columns['location_x'][mask], shard.columns['location_y'][mask])
+            new_display_fig = field_figure('coarse', x, y)
+        else:
+            x, y, points = field_points(shard, mask, pass_detail, isTooltips_on)
+            new_display_fig = field_figure('full', x, y, points)
+        try:
+            if rollup_applies(playclock_filter, time_filter, depth_filter, down_filter, direction_filter,
+                              receiver_filter, shard.receivers):
+                receivers_df = rose_frame(*date_rollup.receiver_outcomes(qb_name, start_date, end_date),
+                                          top_k=ROSE_TOP_K)
+            else:
+                receivers_df = rose_counts(con, *filter_clause(
+                    qb_name, down_filter=down_filter, depth_filter=depth_filter,
+                    receiver_filter=receiver_filter, direction_filter=direction_filter,
+                    playclock_filter=playclock_filter, time_filter=time_filter,
+                    start_date=start_date, end_date=end_date), top_k=ROSE_TOP_K)
+        except Exception as e:
+            print(f"Error aggregating rose plot data: {e}")
+            empty_rose = update_rose_plot(pd.DataFrame(columns=['Receiver', 'Play Outcome', 'Frequency']),
+                                          rosetype_toggle)
+            return uncached((new_display_fig, empty_rose))
         new_rose_fig = update_rose_plot(receivers_df, rosetype_toggle)
         return new_display_fig, new_rose_fig
     
     else:
-        field_fig = go.Figure()
-        draw_plotly_field(field_fig, show_title=False, labelticks=False, show_axis=False,
-                         glayer='above', bg_color='white', margins=0)
-        return field_fig, go.Figure()
+        return empty_field(), go.Figure()
+
+@popularity.track('display_graph_full', unordered=('receiver_filter', 'depth_filter', 'down_filter', 'direction_filter'))
+@result_cache.memoize('display_graph_full', unordered=('receiver_filter', 'depth_filter', 'down_filter', 'direction_filter'))
+@figure_compactor.compact_outputs('display_graph_full')
+def refine_display_graph(pass_detail, isTooltips_on, rosetype_toggle,
+                         playclock_filter, time_filter, receiver_filter,
+                         depth_filter, down_filter, direction_filter,
+                         start_date, end_date, qb_name):
+    """
+    Full tier of the field figure: the fine grid with every point on top,
+    or a raster of the density for selections of at least
+    FIELD_RASTER_PLAYS plays. Takes the same arguments as
+    update_display_graph.
+    """
+    if not qb_name or con is None:
+        return uncached(empty_field())
+    try:
+        shard, mask = passer_selection(qb_name, playclock_filter, time_filter, receiver_filter,
+                                       depth_filter, down_filter, direction_filter, start_date, end_date)
+        selected = int(np.count_nonzero(mask))
+        if selected == 0:
+            return empty_field()
+        if FIELD_RASTER_PLAYS and selected >= FIELD_RASTER_PLAYS:
+            x, y = field_coordinates(shard.columns['location_x'][mask], shard.columns['location_y'][mask])
+            return field_figure('raster', x, y)
+        x, y, points = field_points(shard, mask, pass_detail, isTooltips_on)
+    except Exception as e:
+        print(f"Error querying data: {e}")
+        return uncached(empty_field())
+    return field_figure('full', x, y, points)
+
+@popularity.track('league_field', unordered=('depth_filter', 'down_filter', 'direction_filter'))
+@result_cache.memoize('league_field', unordered=('depth_filter', 'down_filter', 'direction_filter'))
+@figure_compactor.compact_outputs('league_field')
+def update_league_field(pass_detail, isTooltips_on, playclock_filter, time_filter, depth_filter,
+                        down_filter, direction_filter, start_date, end_date, full=False):
+    """
+    Field figure of every passer's plays under the sidebar filters (the
+    receiver filter is per QB and doesn't apply). Tiers follow the QB view:
+    selections of at least FIELD_PROGRESSIVE_PLAYS plays are drawn coarse
+    unless full is set, and full selections of at least FIELD_RASTER_PLAYS
+    plays become a raster.
+    """
+    if league_index is None:
+        return uncached(empty_field())
+    try:
+        rows = league_index.rows(league_bits(down_filter, depth_filter, direction_filter, playclock_filter,
+                                             time_filter, start_date, end_date))
+        columns = league_index.store.columns
+        x, y = field_coordinates(columns['location_x'][rows], columns['location_y'][rows])
+    except Exception as e:
+        print(f"Error querying league plays: {e}")
+        return uncached(empty_field())
+
+    if len(rows) == 0:
+        return empty_field()
+    if not full and FIELD_PROGRESSIVE_PLAYS and len(rows) >= FIELD_PROGRESSIVE_PLAYS:
+        return field_figure('coarse', x, y)
+    if FIELD_RASTER_PLAYS and len(rows) >= FIELD_RASTER_PLAYS:
+        return field_figure('raster', x, y)
+    return field_figure('full', x, y, points_trace(x, y, rows, pass_detail, isTooltips_on))
+
+@app.callback(
+    Output(component_id='display-graph', component_property='figure'),
+    Output(component_id='rose-plot', component_property='figure'),
+    Output(component_id='field-refine', component_property='data'),
+    Input(component_id='pass-detail-filter', component_property='value'),
+    Input(component_id='tooltips-toggle', component_property='on'),
+    Input(component_id='rose-toggle', component_property='value'),
+    Input(component_id='playclock-filter', component_property='value'),
+    Input(component_id='time-filter', component_property='value'),
+    Input(component_id='receiver-filter', component_property='value'),
+    Input(component_id='depth-filter', component_property='value'),
+    Input(component_id='down-filter', component_property='value'),
+    Input(component_id='direction-filter', component_property='value'),
+    Input(component_id='date-filter', component_property='start_date'),
+    Input(component_id='date-filter', component_property='end_date'),
+    Input(component_id="qb-select", component_property="value"),
+    Input(component_id='field-scope', component_property='value'),
+)
+def update_field_view(pass_detail, isTooltips_on, rosetype_toggle,
+                      playclock_filter, time_filter, receiver_filter,
+                      depth_filter, down_filter, direction_filter,
+                      start_date, end_date, qb_name, field_scope='qb'):
+    arguments = [pass_detail, isTooltips_on, rosetype_toggle, playclock_filter, time_filter,
+                 receiver_filter, depth_filter, down_filter, direction_filter,
+                 start_date, end_date, qb_name]
+    field_fig, rose_fig = update_display_graph(*arguments)
+    if field_scope == 'league':
+        # The rose plot stays the selected QB's
+        arguments = [pass_detail, isTooltips_on, playclock_filter, time_filter, depth_filter,
+                     down_filter, direction_filter, start_date, end_date]
+        field_fig = update_league_field(*arguments)
+    if figure_tier(field_fig) != 'coarse':
+        # Clearing the request makes any refine still in flight stale
+        return field_fig, rose_fig, None
+    # A fresh request id, so returning to the same view refines it again
+    return field_fig, rose_fig, {'scope': field_scope, 'arguments': arguments, 'request': uuid.uuid4().hex}
+
+@app.callback(
+    Output(component_id='field-refined', component_property='data'),
+    Input(component_id='field-refine', component_property='data'),
+    prevent_initial_call=True
+)
+def refine_field_view(refine):
+    if not refine or not refine.get('request'):
+        raise PreventUpdate
+    if refine.get('scope') == 'league':
+        figure = update_league_field(*refine['arguments'], full=True)
+    else:
+        figure = refine_display_graph(*refine['arguments'])
+    return {'request': refine['request'], 'figure': figure}
+
+# Applied in the browser, against the request id current when the full
+# render arrives: a view replaced in the meantime keeps its newer figure
+app.clientside_callback(
+    """
+    function(refined, refine) {
+        if (!refined || !refine || refined.request !== refine.request) {
+            throw window.dash_clientside.PreventUpdate;
+        }
+        return refined.figure;
+    }
+    """,
+    Output(component_id='display-graph', component_property='figure', allow_duplicate=True),
+    Input(component_id='field-refined', component_property='data'),
+    State(component_id='field-refine', component_property='data'),
+    prevent_initial_call=True
+)
+
+####################################################################################
+################################ PLAY DETAIL PANEL #################################
+####################################################################################
+
+# Columns the store doesn't carry, fetched per play from DuckDB
+PLAY_DETAIL_QUERY = """
+    SELECT qtr, ydstogo, yardline_100, yards_after_catch, yards_gained, cpoe,
+           interception, pass_length, pass_location
+    FROM pbp
+    WHERE game_id = ? AND play_id = ?
+    LIMIT 1
+"""
+
+def play_detail(play_key):
+    """
+    Look up one play by the id the field figure attached to its point.
+
+    Args:
+        play_key: PlayStore row id
+
+    Returns:
+        dict: The play's fields, or None if it can't be found
+    """
+    store = current_store()
+    if store is None:
+        return None
+    record = store.play(int(play_key))
+    if record is None:
+        return None
+
+    if con is not None and record.get('game_id') is not None and 'play_id' in record:
+        try:
+            extra = con.cursor().execute(PLAY_DETAIL_QUERY, [record['game_id'], record['play_id']]).df()
+            if not extra.empty:
+                record.update({key: (None if pd.isna(value) else value)
+                               for key, value in extra.iloc[0].items()})
+        except Exception as e:
+            print(f"Error fetching play detail: {e}")
+    return record
+
+def format_detail(value, fmt='{}'):
+    return '-' if value is None else fmt.format(value)
+
+@app.callback(
+    Output(component_id='play-detail', component_property='children'),
+    Input(component_id='display-graph', component_property='hoverData'),
+    Input(component_id='display-graph', component_property='clickData'),
+    State(component_id='tooltips-toggle', component_property='on'),
+    State(component_id='qb-select', component_property='value'),
+)
+def update_play_detail(hover_data, click_data, isTooltips_on, qb_name=None):
+    # Clicks always open a play; hovering only does while tooltips are on
+    triggered = callback_context.triggered[0]['prop_id'] if callback_context.triggered else ''
+    if triggered.endswith('hoverData') and not isTooltips_on:
+        raise PreventUpdate
+    point_data = click_data if triggered.endswith('clickData') else hover_data
+    points = (point_data or {}).get('points', [])
+    if not points or points[0].get('customdata') is None:
+        raise PreventUpdate
+
+    play = play_detail(points[0]['customdata'])
+    # Play ids index the current data version; a figure drawn before a data
+    # refresh may point at someone else's play
+    if play is None or qb_name and play.get('passer_player_name') != qb_name:
+        return html.P('Play details are unavailable; reselect the QB to load the latest data.',
+                      className='text-center text-muted mb-0')
+
+    quarter = format_detail(play.get('qtr'), 'Q{:.0f}')
+    situation = f"{play['down']} & {format_detail(play.get('ydstogo', play.get('distance')), '{:.0f}')}"
+    fields = [
+        ('Date', play['game_date']),
+        ('Matchup', f"{play.get('posteam') or '-'} vs {play.get('defteam') or '-'}"),
+        ('Situation', f"{quarter}, {situation}"),
+        ('Yardline', format_detail(play.get('yardline_100'), '{:.0f} yds to go')),
+        ('Receiver', play.get('receiver_player_name') or '-'),
+        ('Air Yards', format_detail(play.get('air_yards'), '{:.1f}')),
+        ('YAC', format_detail(play.get('yards_after_catch'), '{:.1f}')),
+        ('Yards Gained', format_detail(play.get('yards_gained'), '{:.0f}')),
+        ('Play Clock', format_detail(play.get('play_clock'), '{:.0f}s')),
+        ('EPA', format_detail(play.get('epa'), '{:.2f}')),
+        ('CPOE', format_detail(play.get('cpoe'), '{:.1f}')),
+        ('Result', 'Interception' if play.get('interception') == 1 else play['play_outcome_bin']),
+    ]
+    return dbc.Row([
+        dbc.Col([
+            html.Small(label, className='text-muted d-block'),
+            html.Span(value, style={'fontWeight': '600'}),
+        ], xs=6, md=3, lg=2, className='mb-2')
+        for label, value in fields
+    ], className='g-2', style={'fontSize': '13px'})
 
 ####################################################################################
 ################################# LINE PLOT FIGURE #################################
@@ -484,48 +1041,80 @@ def update_display_graph(pass_detail, isTooltips_on, rosetype_toggle,
 @app.callback(
     Output(component_id='line-plot', component_property='figure'),
     Input(component_id='qb-select', component_property='value'),
+    Input(component_id='playclock-filter', component_property='value'),
+    Input(component_id='time-filter', component_property='value'),
+    Input(component_id='depth-filter', component_property='value'),
+    Input(component_id='down-filter', component_property='value'),
+    Input(component_id='direction-filter', component_property='value'),
+    Input(component_id='date-filter', component_property='start_date'),
+    Input(component_id='date-filter', component_property='end_date'),
+    Input(component_id='lineplot-mode', component_property='value'),
+    **background.options(
+        progress=[Output(component_id='lineplot-progress', component_property='value'),
+                  Output(component_id='lineplot-progress', component_property='max')],
+        running=[(Output(component_id='lineplot-progress', component_property='style'),
+                  PROGRESS_VISIBLE, PROGRESS_HIDDEN)],
+        # Leaving the dashboard abandons the job
+        cancel=[Input(component_id='url', component_property='pathname')],
+    ),
 )
-def update_lineplot(qb_name):
-    if not qb_name or con is None:
-        return go.Figure()
+@background.job
+@popularity.track('lineplot', unordered=('depth_filter', 'down_filter', 'direction_filter'))
+@prerendered.serve('lineplot')
+@result_cache.memoize('lineplot', unordered=('depth_filter', 'down_filter', 'direction_filter'))
+@figure_compactor.compact_outputs('lineplot')
+def update_lineplot(qb_name, playclock_filter=None, time_filter=None, depth_filter=None,
+                    down_filter=None, direction_filter=None, start_date=None, end_date=None,
+                    lineplot_mode='band'):
+    if not qb_name or league_index is None:
+        return uncached(go.Figure())
     
     try:
-        bins = [0, 5, 10, 15, 20, 25, 30, 35, 40]
-        group_names = ['0-5s', '5-10s', '10-15s', '15-20s', '20-25s', '25-30s', '30-35s', '35-40s']
-        playclock_ranges = ['0-5s', '5-10s', '10-15s', '15-20s', '20-25s', '25-30s', '30-35s', '35-40s']
-
-        # Get all data for comparison
-        results_df = pd.read_sql_query("SELECT * FROM pbp WHERE passer_player_name IS NOT NULL", con=con)
+        # Distribution of every QB's attempts, and of the entire sample's, over the playclock ranges
+        if rollup_applies(playclock_filter, time_filter, depth_filter, down_filter, direction_filter):
+            # Only the dates changed: two prefix rows per QB, whatever the range
+            passers, shares, sample_shares = playclock_shares(date_rollup.passer_totals(start_date, end_date))
+        else:
+            # Get the league's plays matching the sidebar filters for comparison
+            results_df = select_league_plays(down_filter, depth_filter, direction_filter, playclock_filter,
+                                             time_filter, start_date, end_date)
+            report_progress(1, 2)
+            passers, shares, sample_shares = aggregate_playclock(results_df)
     except Exception as e:
         print(f"Error in line plot: {e}")
-        return go.Figure()
+        return uncached(go.Figure())
 
-    # Process data logic - calculate distribution of QB's attempts and entire sample's attempts in playclock ranges
-    results_df['playclock_range'] = pd.cut(results_df['play_clock'], bins, labels=group_names)
-    playclock_df = results_df[['passer_player_name','playclock_range']].groupby(
-        by=['passer_player_name','playclock_range'])['playclock_range'].size() \
-        .unstack(fill_value=0).stack().reset_index(name='count')
-    playclock_df['per_count'] = round(playclock_df['count'] / playclock_df.groupby('passer_player_name')['count'].transform('sum'), 3)
-    
-    sample_df = playclock_df.groupby(by=['playclock_range'])['count'].sum().reset_index(name='count')
-    sample_df['per_count'] = round(sample_df['count'] / sample_df['count'].sum(), 3)
+    shares = np.round(shares, 3)
+    playclock_ranges = PLAYCLOCK_RANGES
 
     # Create new figure
     new_fig = go.Figure()
 
-    # Plot every QB's line plot except for the current chosen QB
-    for qb in playclock_df['passer_player_name'].unique():
-        qb_df = playclock_df[playclock_df['passer_player_name'] == qb].reset_index(drop=True)
-        values = qb_df['per_count'].to_list()
-        if qb != qb_name:
-            new_fig.add_trace(go.Scatter(x=playclock_ranges, y=values, name=qb,
+    if lineplot_mode == 'peers':
+        # Only the QBs whose distributions are closest to the chosen QB's
+        for peer, values in nearest_peers(passers, shares, qb_name, LINEPLOT_PEERS):
+            new_fig.add_trace(go.Scatter(x=playclock_ranges, y=values, name=peer,
                                          line=dict(color='rgb(195,195,195)', width=3, dash='dot')))
+    else:
+        # League spread as filled percentile bands, a handful of traces however many QBs there are
+        bands = percentile_bands(shares)
+        for upper, lower, fill_color in ((90, 10, 'rgba(195,195,195,0.35)'), (75, 25, 'rgba(160,160,160,0.45)')):
+            if upper not in bands:
+                continue
+            new_fig.add_trace(go.Scatter(x=playclock_ranges, y=bands[upper], mode='lines',
+                                         line=dict(width=0), showlegend=False, hoverinfo='skip'))
+            new_fig.add_trace(go.Scatter(x=playclock_ranges, y=bands[lower], mode='lines',
+                                         line=dict(width=0), fill='tonexty', fillcolor=fill_color,
+                                         name='League p%d-p%d' % (lower, upper), hoverinfo='skip'))
+        if 50 in bands:
+            new_fig.add_trace(go.Scatter(x=playclock_ranges, y=bands[50], name='League Median',
+                                         line=dict(color='rgb(150,150,150)', width=3, dash='dot')))
 
     # Plot sample average of the dataset
-    new_fig.add_trace(go.Scatter(x=playclock_ranges, y=sample_df['per_count'].to_list(), name='Sample Average',
+    new_fig.add_trace(go.Scatter(x=playclock_ranges, y=np.round(sample_shares, 3), name='Sample Average',
                          line=dict(color='rgb(223,80,103)', width=3, dash='dash')))
 
-    chosen_values = playclock_df[playclock_df['passer_player_name'] == qb_name]['per_count'].to_list()
+    chosen_values = shares[passers.index(qb_name)].tolist() if qb_name in passers else []
 
     # Plot the selected QB's line plot
     new_fig.add_trace(go.Scatter(x=playclock_ranges, y=chosen_values,
@@ -555,54 +1144,81 @@ def update_lineplot(qb_name):
 
     return new_fig
 
+####################################################################################
+################################## WEEKLY TRENDS ###################################
+####################################################################################
+
+@result_cache.memoize('weekly_totals')
+def passer_weekly_totals(qb_name):
+    # Running totals answer every window size, so one entry per QB and data version
+    return weekly_running_totals(con, qb_name).to_dict(orient='list')
+
+@app.callback(
+    Output(component_id='trend-plot', component_property='figure'),
+    Input(component_id='qb-select', component_property='value'),
+    Input(component_id='trend-window', component_property='value'),
+    Input(component_id='date-filter', component_property='start_date'),
+    Input(component_id='date-filter', component_property='end_date'),
+)
+@figure_compactor.compact_outputs('trend_plot')
+def update_trend_plot(qb_name, trend_window, start_date=None, end_date=None):
+    if not qb_name or con is None:
+        return go.Figure()
+
+    try:
+        totals = pd.DataFrame(passer_weekly_totals(qb_name))
+    except Exception as e:
+        print(f"Error in weekly trends: {e}")
+        return go.Figure()
+    if totals.empty:
+        return go.Figure()
+
+    trend_window = int(trend_window or 1)
+    trends = rolling_trends(totals, trend_window)
+    # Windows may reach back before the date range; only weeks inside it are drawn
+    days = trends['game_date'].to_numpy(dtype='datetime64[D]').astype(np.int64)
+    low, high = date_bounds(start_date, end_date)
+    return trend_figure(trends[(days >= low) & (days <= high)], qb_name, trend_window)
+
 ####################################################################################
 ################################ SANKEY PLOT FIGURE ################################
 #################################################################################### 
 
+# Display order and link colors for each Sankey third stage
+SANKEY_STAGE_STYLES = {
+    'depth': (['0-10 yd', '10-20 yd', '20+ yd'],
+              {'0-10 yd': '#511479', '10-20 yd': '#8B2880', '20+ yd': '#C63E73'}),
+    'outcome': (PLAY_OUTCOMES,
+                {'No First Down': '#dc3545', 'First Down': '#fd7e14', 'Touchdown': '#198754'}),
+    'direction': (['N', 'NE', 'E', 'SE', 'S', 'SW', 'W', 'NW', 'Unknown'],
+                  dict(zip(['N', 'NE', 'E', 'SE', 'S', 'SW', 'W', 'NW'], px.colors.sequential.Plasma_r))),
+}
+
+# Receivers drawn individually in the Sankey diagram; the rest share an 'Other' node
+SANKEY_TOP_K = int(os.environ.get('SANKEY_TOP_K', 10))
+
 @app.callback(
     Output(component_id='sankey-plot', component_property='figure'),
     Input(component_id='qb-select', component_property='value'),
+    Input(component_id='sankey-stage', component_property='value'),
 )
-def update_sankey(qb_name):
+@popularity.track('sankey')
+@prerendered.serve('sankey')
+@result_cache.memoize('sankey')
+@figure_compactor.compact_outputs('sankey')
+def update_sankey(qb_name, sankey_stage='depth'):
     if not qb_name or con is None:
-        return go.Figure()
-    
+        return uncached(go.Figure())
+
+    stage = sankey_stage if sankey_stage in SANKEY_STAGE_STYLES else 'depth'
     try:
-        df = pd.read_sql_query(
-            "SELECT * FROM pbp WHERE passer_player_name = ? AND receiver_player_name IS NOT NULL", 
-            con=con, params=[qb_name]
-        )
+        counts = sankey_counts(con, *filter_clause(qb_name), top_k=SANKEY_TOP_K, stage=stage)
     except Exception as e:
         print(f"Error in Sankey plot: {e}")
-        return go.Figure()
+        return uncached(go.Figure())
 
-    counts_by_receiver = df.groupby(by=['passer_player_name','receiver_player_name']).size().reset_index().rename(columns={0: 'counts'}).sort_values(by=['counts'], ascending=False)
-    counts_by_receiver_and_depth = df.groupby(by=['passer_player_name','receiver_player_name','depth_bin']).size().reset_index().rename(columns={0: 'counts'}).sort_values(by=['counts'], ascending=False)
-
-    nodes, links, link_colors = [], [], []
-    receiver_index_map, depth_index_map = dict(), dict()
-    depth_color_map = {
-        '0-10 yd': '#511479',
-        '10-20 yd': '#8B2880',
-        '20+ yd': '#C63E73',
-    }
-    
-    nodes = nodes + [{'label': qb_name} for _ in range(1)]
-    nodes = nodes + [{'label': receiver} for receiver in counts_by_receiver['receiver_player_name'].to_list()]
-    nodes = nodes + [{'label': depth} for depth in counts_by_receiver_and_depth['depth_bin'].unique()]
-
-    for receiver, num_passes, index in zip(counts_by_receiver['receiver_player_name'].to_list(), counts_by_receiver['counts'].to_list(), [i for i in range(1, len(counts_by_receiver) + 1)]):
-        links.append({'source': 0, 'target': index, 'value': num_passes})
-        receiver_index_map[receiver] = index
-        link_colors.append('#FBCEB6')
-        
-    for depth in counts_by_receiver_and_depth['depth_bin'].unique():
-        index += 1
-        depth_index_map[depth] = index
-    
-    for receiver, depth, num_depth_passes in zip(counts_by_receiver_and_depth['receiver_player_name'].to_list(), counts_by_receiver_and_depth['depth_bin'].to_list(), counts_by_receiver_and_depth['counts'].to_list()):
-        links.append({'source': receiver_index_map[receiver], 'target': depth_index_map[depth], 'value': num_depth_passes})
-        link_colors.append(depth_color_map[depth])
+    stage_order, stage_colors = SANKEY_STAGE_STYLES[stage]
+    sankey = aggregate_sankey(counts, qb_name, stage_order=stage_order, stage_colors=stage_colors)
 
     # Create the Sankey diagram figure
     fig = go.Figure(data=[go.Sankey(
@@ -610,16 +1226,16 @@ def update_sankey(qb_name):
             pad=15,
             thickness=20,
             line=dict(color='black', width=1.0),
-            label=[node['label'] for node in nodes],
+            label=sankey['labels'],
             color='rgb(233,84,32)',
         ),
         link=dict(
-            source=[link['source'] for link in links],
-            target=[link['target'] for link in links],
-            value=[link['value'] for link in links],
-            color=link_colors,
-            hovertemplate="QB: %{source.label}<br>"
-                        "Receiver: %{target.label}<br>"
+            source=sankey['source'],
+            target=sankey['target'],
+            value=sankey['value'],
+            color=sankey['link_colors'],
+            hovertemplate="From: %{source.label}<br>"
+                        "To: %{target.label}<br>"
                         "No. Passes: %{value:.0f}<br>",
         ),
     )])
@@ -638,52 +1254,231 @@ def update_sankey(qb_name):
     return fig
 
 ####################################################################################
-################################ DATA TABLE FIGURE #################################
-#################################################################################### 
+################################## QB COMPARISON ###################################
+####################################################################################
 
 @app.callback(
-    Output(component_id='pass-stats-table', component_property='data'),
-    Input(component_id='pass-stats-table', component_property='data'),
+    Output(component_id='similar-qbs', component_property='children'),
+    Input(component_id='qb-select', component_property='value')
 )
-def update_pass_stats_table(data):
-    if con is None:
-        return []
-    
+def update_similar_qbs(qb_name):
+    if not qb_name or tendency_index is None:
+        return html.P("Pick a quarterback to see who throws most like them.",
+                      className='text-center text-muted mb-0', style={'fontSize': '14px'})
+
+    peers = tendency_index.most_similar(qb_name, SIMILAR_QBS)
+    if not peers:
+        return html.P(f"Not enough passes from {qb_name} to compare tendencies.",
+                      className='text-center text-muted mb-0', style={'fontSize': '14px'})
+    return dbc.ListGroup([
+        dbc.ListGroupItem([peer, dbc.Badge(f"{similarity:.2f}", color='light', text_color='dark',
+                                           className='ms-2')])
+        for peer, similarity in peers
+    ], horizontal=True, className='justify-content-center flex-wrap')
+
+@app.callback(
+    Output(component_id='compare-select', component_property='value'),
+    Input(component_id='compare-similar', component_property='n_clicks'),
+    State(component_id='qb-select', component_property='value'),
+    prevent_initial_call=True
+)
+def compare_similar_qbs(n_clicks, qb_name):
+    if not qb_name or tendency_index is None:
+        return no_update
+    peers = [peer for peer, _ in tendency_index.most_similar(qb_name, MAX_COMPARED - 1)]
+    return [qb_name, *peers] if peers else no_update
+
+# Inputs of every comparison figure: the compared QBs and the sidebar filters
+# (the receiver filter belongs to the single QB view)
+COMPARE_INPUTS = [
+    Input(component_id='compare-select', component_property='value'),
+    Input(component_id='playclock-filter', component_property='value'),
+    Input(component_id='time-filter', component_property='value'),
+    Input(component_id='depth-filter', component_property='value'),
+    Input(component_id='down-filter', component_property='value'),
+    Input(component_id='direction-filter', component_property='value'),
+    Input(component_id='date-filter', component_property='start_date'),
+    Input(component_id='date-filter', component_property='end_date'),
+]
+
+def comparison_clause(passers, playclock_filter, time_filter, depth_filter, down_filter,
+                      direction_filter, start_date, end_date):
+    # One WHERE clause over every compared QB; each figure groups by passer
+    return filter_clause(passers=passers, down_filter=down_filter, depth_filter=depth_filter,
+                         direction_filter=direction_filter, playclock_filter=playclock_filter,
+                         time_filter=time_filter, start_date=start_date, end_date=end_date)
+
+@app.callback(Output(component_id='compare-field', component_property='figure'), *COMPARE_INPUTS)
+@popularity.track('compare_field', unordered=('depth_filter', 'down_filter', 'direction_filter'))
+@result_cache.memoize('compare_field', unordered=('depth_filter', 'down_filter', 'direction_filter'))
+@figure_compactor.compact_outputs('compare_field')
+def update_compare_field(compare_qbs, playclock_filter=None, time_filter=None, depth_filter=None,
+                         down_filter=None, direction_filter=None, start_date=None, end_date=None):
+    passers = compared_passers(compare_qbs)
+    if not passers or con is None:
+        return uncached(go.Figure())
+    try:
+        cells = field_cell_counts(con, *comparison_clause(
+            passers, playclock_filter, time_filter, depth_filter, down_filter, direction_filter,
+            start_date, end_date), bins=FINE_BINS)
+    except Exception as e:
+        print(f"Error in comparison field heatmaps: {e}")
+        return uncached(go.Figure())
+    return field_multiples(passers, cells, bins=FINE_BINS)
+
+@app.callback(Output(component_id='compare-rose', component_property='figure'), *COMPARE_INPUTS)
+@popularity.track('compare_rose', unordered=('depth_filter', 'down_filter', 'direction_filter'))
+@result_cache.memoize('compare_rose', unordered=('depth_filter', 'down_filter', 'direction_filter'))
+@figure_compactor.compact_outputs('compare_rose')
+def update_compare_rose(compare_qbs, playclock_filter=None, time_filter=None, depth_filter=None,
+                        down_filter=None, direction_filter=None, start_date=None, end_date=None):
+    passers = compared_passers(compare_qbs)
+    if not passers or con is None:
+        return uncached(go.Figure())
+    try:
+        receivers_df = rose_counts_by_passer(con, *comparison_clause(
+            passers, playclock_filter, time_filter, depth_filter, down_filter, direction_filter,
+            start_date, end_date), top_k=ROSE_TOP_K)
+    except Exception as e:
+        print(f"Error in comparison rose plots: {e}")
+        return uncached(go.Figure())
+    return rose_multiples(passers, receivers_df)
+
+@app.callback(Output(component_id='compare-lineplot', component_property='figure'), *COMPARE_INPUTS)
+@popularity.track('compare_lineplot', unordered=('depth_filter', 'down_filter', 'direction_filter'))
+@result_cache.memoize('compare_lineplot', unordered=('depth_filter', 'down_filter', 'direction_filter'))
+@figure_compactor.compact_outputs('compare_lineplot')
+def update_compare_lineplot(compare_qbs, playclock_filter=None, time_filter=None, depth_filter=None,
+                            down_filter=None, direction_filter=None, start_date=None, end_date=None):
+    passers = compared_passers(compare_qbs)
+    if not passers or con is None:
+        return uncached(go.Figure())
     try:
-        df = pd.read_sql_query("SELECT * FROM pbp WHERE passer_player_name IS NOT NULL", con=con)
+        counts = playclock_counts(con, *comparison_clause(
+            passers, playclock_filter, time_filter, depth_filter, down_filter, direction_filter,
+            start_date, end_date))
+    except Exception as e:
+        print(f"Error in comparison line plots: {e}")
+        return uncached(go.Figure())
+    return lineplot_multiples(passers, playclock_matrix(passers, counts))
+
+####################################################################################
+############################# OPPONENT-ADJUSTED TABLE ##############################
+####################################################################################
+
+@app.callback(
+    Output(component_id='opponent-table', component_property='data'),
+    Input(component_id='qb-select', component_property='value'),
+    Input(component_id='date-filter', component_property='start_date'),
+    Input(component_id='date-filter', component_property='end_date'),
+)
+@popularity.track('opponent_adjusted')
+@result_cache.memoize('opponent_adjusted')
+def update_opponent_table(qb_name, start_date=None, end_date=None):
+    # Defense baselines cover every pass, so only the dates filter the QB's plays
+    if not qb_name or con is None:
+        return uncached([])
+
+    try:
+        games = opponent_adjusted(con, *filter_clause(qb_name, start_date=start_date, end_date=end_date))
+    except Exception as e:
+        print(f"Error in opponent-adjusted table: {e}")
+        return uncached([])
+    return games.to_dict(orient='records')
+
+####################################################################################
+################################ DATA TABLE FIGURE #################################
+#################################################################################### 
 
-        # Add depth binning
-        df['depth_bin'] = df['air_yards'].apply(bin_depth)
+@popularity.track('pass_stats_splits', unordered=('depth_filter', 'down_filter', 'direction_filter'))
+@result_cache.memoize('pass_stats_splits', unordered=('depth_filter', 'down_filter', 'direction_filter'))
+def pass_stats_summary(playclock_filter=None, time_filter=None, depth_filter=None,
+                       down_filter=None, direction_filter=None, start_date=None, end_date=None):
+    """
+    Every passer's stats table rows at every split level (career, season
+    and team) under the sidebar filters, from one grouped query. Cached as
+    a whole so switching levels, paging, sorting and filtering the table
+    never recompute it.
+    """
+    if con is None:
+        return uncached([])
+
+    if rollup_applies(playclock_filter, time_filter, depth_filter, down_filter, direction_filter):
+        try:
+            # Only the dates changed: sums of prefix rows and per-date buckets
+            return pass_stats(date_rollup.passer_splits(start_date, end_date)).to_dict(orient='records')
+        except Exception as e:
+            print(f"Error in stats table rollup: {e}")
+
+    try:
+        df = pass_stats_splits(con, *filter_clause(
+            down_filter=down_filter, depth_filter=depth_filter, direction_filter=direction_filter,
+            playclock_filter=playclock_filter, time_filter=time_filter,
+            start_date=start_date, end_date=end_date))
     except Exception as e:
         print(f"Error in stats table: {e}")
-        return []
-    
-    grouped = df.groupby(['passer_player_name', 'depth_bin']).size()
-    total_counts = df.groupby(['passer_player_name']).size()
-    percentages = round(grouped / total_counts, 3)
+        return uncached([])
 
-    result = percentages.unstack(level='depth_bin')
-    result = result.reset_index()[['passer_player_name','0-10 yd','10-20 yd','20+ yd']]
+    return df.to_dict(orient='records')
 
-    result.columns = ['Player','% of Short Passes','% of Intermediate Passes','% of Deep Passes']
+@app.callback(
+    Output(component_id='pass-stats-table', component_property='data'),
+    Output(component_id='pass-stats-table', component_property='page_count'),
+    Output(component_id='pass-stats-table', component_property='columns'),
+    Input(component_id='playclock-filter', component_property='value'),
+    Input(component_id='time-filter', component_property='value'),
+    Input(component_id='depth-filter', component_property='value'),
+    Input(component_id='down-filter', component_property='value'),
+    Input(component_id='direction-filter', component_property='value'),
+    Input(component_id='date-filter', component_property='start_date'),
+    Input(component_id='date-filter', component_property='end_date'),
+    Input(component_id='pass-stats-table', component_property='page_current'),
+    Input(component_id='pass-stats-table', component_property='page_size'),
+    Input(component_id='pass-stats-table', component_property='sort_by'),
+    Input(component_id='pass-stats-table', component_property='filter_query'),
+    Input(component_id='stats-split', component_property='value'),
+    **background.options(
+        progress=[Output(component_id='stats-progress', component_property='value'),
+                  Output(component_id='stats-progress', component_property='max')],
+        running=[(Output(component_id='stats-progress', component_property='style'),
+                  PROGRESS_VISIBLE, PROGRESS_HIDDEN)],
+        cancel=[Input(component_id='url', component_property='pathname')],
+    ),
+)
+@background.job
+def update_pass_stats_table(playclock_filter=None, time_filter=None, depth_filter=None,
+                            down_filter=None, direction_filter=None, start_date=None, end_date=None,
+                            page_current=0, page_size=15, sort_by=None, filter_query='', stats_split='career'):
+    report_progress(0, 2)
+    columns = stats_table_columns(stats_split)
+    page_size = page_size or 15
 
-    # Add EPA and completion percentage
-    qb_stats = df.groupby('passer_player_name').agg({
-        'epa': 'mean',
-        'complete_pass': 'mean',
-        'air_yards': 'mean'
-    }).reset_index()
-    
-    qb_stats = qb_stats.rename(columns={
-        'epa': 'Avg EPA/Play',
-        'complete_pass': 'Completion %',
-        'air_yards': 'Avg Air Yards'
-    })
+    def split_rows():
+        # Every level comes back from the cached summary; keep the chosen one
+        summary = pass_stats_summary(playclock_filter, time_filter, depth_filter, down_filter,
+                                     direction_filter, start_date, end_date)
+        keys = [column['id'] for column in columns]
+        return [{key: row[key] for key in keys} for row in summary if row['split'] == stats_split]
 
-    result = pd.merge(result, qb_stats, how='left', left_on='Player', right_on='passer_player_name')
-    result = result.drop(columns=['passer_player_name'])
+    try:
+        version = result_cache.version()
+        if version is None:
+            rows = split_rows()
+        else:
+            # Built once per version, filters and level; later pages read the file
+            arguments = normalize_arguments(pass_stats_summary, (playclock_filter, time_filter, depth_filter,
+                                            down_filter, direction_filter, start_date, end_date), {},
+                                            unordered=('depth_filter', 'down_filter', 'direction_filter'))
+            rows = summary_tables.materialize(con, version, f'pass_stats|{stats_split}|{to_json(arguments)}',
+                                              split_rows)
+        report_progress(1, 2)
+        # Only the requested page goes to the browser
+        page, total = table_page(con, rows, filter_query, sort_by, page_current, page_size)
+    except Exception as e:
+        print(f"Error paging stats table: {e}")
+        return [], 1, columns
 
-    return result.to_dict(orient='records')
+    return page, max(1, -(-total // page_size)), columns
 
 ####################################################################################
 ################################## GRAPH TOGGLES ###################################
@@ -704,4 +1499,6 @@ def update_tooltips_toggle_info(tooltips_toggle):
     return 'Tooltips are On' if tooltips_toggle else 'Tooltips are Off'
 
 if __name__ == '__main__':
-    app.run(debug=True, host='0.0.0.0', port=8050) 
\ No newline at end of file
+    start_background_tasks()
+    # Development server; production runs gunicorn with gunicorn.conf.py
+    app.run(debug=os.environ.get('DASH_DEBUG', 'true').lower() == 'true', host='0.0.0.0', port=8050)
@@ -0,0 +1,54 @@
+"""
+Gunicorn configuration for serving the dashboard in production.
+
+Usage:
+    gunicorn --config gunicorn.conf.py app:server
+
+Every setting can be tuned through environment variables so the Docker
+image and docker-compose can size the server without code changes.
+"""
+
+import multiprocessing
+import os
+
+bind = f"0.0.0.0:{os.environ.get('PORT', 8050)}"
+
+# Threaded workers: callbacks spend most of their time in NumPy/DuckDB,
+# which release the GIL
+worker_class = 'gthread'
+workers = int(os.environ.get('WEB_CONCURRENCY', min(multiprocessing.cpu_count(), 4)))
+threads = int(os.environ.get('GUNICORN_THREADS', 4))
+
+# Load app.py (database, league index, warm caches) once in the master so
+# workers fork with everything already built and shared copy-on-write
+preload_app = True
+
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 60))
+graceful_timeout = int(os.environ.get('GUNICORN_GRACEFUL_TIMEOUT', 30))
+keepalive = int(os.environ.get('GUNICORN_KEEPALIVE', 5))
+
+# Recycle workers periodically; with preload a restart is just a fork
+max_requests = int(os.environ.get('GUNICORN_MAX_REQUESTS', 1000))
+max_requests_jitter = int(os.environ.get('GUNICORN_MAX_REQUESTS_JITTER', 100))
+
+accesslog = '-'
+errorlog = '-'
+loglevel = os.environ.get('GUNICORN_LOG_LEVEL', 'info')
+
+def pre_fork(server, worker):
+    # DuckDB handles must not be shared across processes; the master drops
+    # its connection once the caches are built
+    import app
+    app.close_database()
+
+def post_fork(server, worker):
+    import app
+    app.connect_database()
+    # The master may have been preloaded with data the ETL has since
+    # replaced (workers are recycled); catch up before serving
+    app.refresh_data()
+    # The background job queue reopens its SQLite handle in this process
+    if app.background_cache is not None:
+        app.background_cache.close()
+    # Threads don't survive fork, so each worker starts its own
+    app.start_background_tasks()
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+NFL QB Passing Tendencies Dashboard - Prerender Script
+
+Run after scrape_data.py. This script computes the default-view field, rose,
+line and Sankey figures for every passer in pbp in parallel, and stores them
+under data/prerender/<data version>/ so the dashboard serves a QB's first
+load from a file instead of computing it.
+"""
+
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime
+
+# Figures are written to the prerender store, not the shared result cache
+os.environ.setdefault('RESULT_CACHE', 'off')
+os.environ['PRERENDER'] = 'off'
+
+import app
+from scenes.utils.field_tiers import figure_tier
+from scenes.utils.prerender import DEFAULT_VIEW
+
+def connect_worker():
+    # Each forked worker opens its own DuckDB handle
+    app.connect_database()
+
+def render_passer(passer):
+    """
+    Default-view callback outputs for one passer.
+
+    Returns:
+        tuple: (passer, outputs) where outputs maps callback name to output
+    """
+    view = dict(DEFAULT_VIEW)
+    receivers = app.update_receiver_data(passer)[1]
+    # The callbacks as registered with the popularity tracker, so
+    # prerendering isn't counted as requests
+    callbacks = app.popularity.functions
+    field_arguments = (
+        view['pass_detail'], view['isTooltips_on'], view['rosetype_toggle'],
+        view['playclock_filter'], view['time_filter'], receivers, view['depth_filter'],
+        view['down_filter'], view['direction_filter'], view['start_date'], view['end_date'], passer)
+    display_graph = callbacks['display_graph'](*field_arguments)
+    if figure_tier(display_graph[0]) == 'coarse':
+        # Store the full tier, so a default view needs no follow-up render
+        display_graph = [callbacks['display_graph_full'](*field_arguments), display_graph[1]]
+    lineplot = callbacks['lineplot'](
+        passer, view['playclock_filter'], view['time_filter'], view['depth_filter'], view['down_filter'],
+        view['direction_filter'], view['start_date'], view['end_date'], view['lineplot_mode'])
+    sankey = callbacks['sankey'](passer, view['sankey_stage'])
+    return passer, {'display_graph': display_graph, 'lineplot': lineplot, 'sankey': sankey}
+
+def main():
+    """Prerender every passer's default view."""
+    print("Prerendering default dashboard views...")
+    print(f"Started at: {datetime.now()}")
+
+    version = app.DATA_VERSION
+    if version is None or not app.caches_warm:
+        print("Warning: Database not ready; skipping prerender")
+        return
+
+    passers = [option['value'] for option in app.qb_options_cache]
+    workers = int(os.environ.get('PRERENDER_WORKERS', multiprocessing.cpu_count()))
+    store = app.prerendered
+
+    # Workers fork with the league index already built; DuckDB handles must
+    # not cross the fork, so each worker reconnects
+    app.close_database()
+    started = time.perf_counter()
+    failed = 0
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('fork'),
+                             initializer=connect_worker) as pool:
+        futures = [pool.submit(render_passer, passer) for passer in passers]
+        for future in as_completed(futures):
+            try:
+                passer, outputs = future.result()
+                store.save(passer, outputs, version=version)
+            except Exception as e:
+                failed += 1
+                print(f"Error prerendering a passer: {e}")
+    app.connect_database()
+
+    # Keep the previous version too: servers may still be switching away
+    store.prune(keep=version, previous=1)
+    print(f"Prerendered {len(passers) - failed} of {len(passers)} passers with {workers} workers "
+          f"in {time.perf_counter() - started:.1f}s to {store.version_dir(version)}")
+    print(f"Prerender completed at: {datetime.now()}")
+
+if __name__ == "__main__":
+    main()
@@ -12,6 +12,7 @@ import plotly.graph_objects as go
 
 from .dashboardComponents.qbImage import qb_image
 from .dashboardComponents.qbDropdown import qb_dropdown
+from .dashboardComponents.compareDropdown import compare_dropdown
 from .dashboardComponents.dateFilter import date_filter
 from .dashboardComponents.playclockFilter import playclock_filter
 from .dashboardComponents.timeFilter import time_filter
@@ -24,6 +25,7 @@ from .dashboardComponents.directionDropdown import direction_dropdown
 ############################################################################################
 
 from .utils.drawPlotlyField import draw_plotly_field
+from .utils.trends import TREND_WINDOWS
 
 ############################################################################################
 
@@ -90,9 +92,47 @@ sankey_plot = dcc.Graph(
     style={'height': '600px', 'width': '100%'}
 )
 
+# progress bar styles for the league-wide callbacks while running and idle
+PROGRESS_VISIBLE = {'height': '6px', 'marginBottom': '4px'}
+PROGRESS_HIDDEN = {'display': 'none'}
+
+# pass stats table columns for a split level ('career', 'season' or 'team')
+def stats_table_columns(split):
+    columns = [dict( id='Player', name='Player' )]
+    if split == 'season':
+        columns.append(dict( id='Season', name='Season', type='numeric' ))
+    elif split == 'team':
+        columns.append(dict( id='Team', name='Team' ))
+    return columns + [
+        dict( id='% of Short Passes', name='% of Short Passes', type='numeric' ),
+        dict( id='% of Intermediate Passes', name='% of Intermediate Passes', type='numeric' ),
+        dict( id='% of Deep Passes', name='% of Deep Passes', type='numeric' ),
+        dict( id='Avg EPA/Play', name='Avg EPA/Play', type='numeric' ),
+        dict( id='Completion %', name='Completion %', type='numeric' ),
+        dict( id='Avg Air Yards', name='Avg Air Yards', type='numeric' )
+    ]
+
+# opponent-adjusted table columns; season and career rows leave Week and Opponent blank
+opponent_table_columns = [
+    dict( id='Season', name='Season', type='numeric' ),
+    dict( id='Week', name='Week', type='numeric' ),
+    dict( id='Opponent', name='Opponent' ),
+    dict( id='Attempts', name='Attempts', type='numeric' ),
+    dict( id='EPA/Play', name='EPA/Play', type='numeric' ),
+    dict( id='Opp EPA/Play Allowed', name='Opp EPA/Play Allowed', type='numeric' ),
+    dict( id='EPA/Play vs Opp', name='EPA/Play vs Opp', type='numeric' ),
+    dict( id='Completion %', name='Completion %', type='numeric' ),
+    dict( id='Opp Completion % Allowed', name='Opp Completion % Allowed', type='numeric' ),
+    dict( id='Completion % vs Opp', name='Completion % vs Opp', type='numeric' ),
+]
+
 dashboard_page = dbc.Container([
     dcc.Store(id='qb-options', storage_type='memory', data=[]),
     dcc.Store(id='stored-qb-data', storage_type='memory', data=[]),
+    # Arguments of a field view drawn coarse, for the follow-up full render
+    dcc.Store(id='field-refine', storage_type='memory', data=None),
+    # Full render of a refine request, shown only if its request is still current
+    dcc.Store(id='field-refined', storage_type='memory', data=None),
     # Responsive row with proper breakpoints
     dbc.Row([
         #########################################
@@ -131,7 +171,11 @@ dashboard_page = dbc.Container([
             html.H6("Pass Origins Field Heatmap", className='text-center mb-2', style={'fontWeight': 'bold'}),
             html.Div([
                 display_graph,
-            ], style={'min-height': '400px'})
+            ], style={'min-height': '400px'}),
+            html.Div(id='play-detail',
+                     children=html.P("Hover over or click a pass to see the play's details.",
+                                     className='text-center text-muted mb-0', style={'fontSize': '14px'}),
+                     className='mt-2'),
         ],
             xs=12, sm=12, md=12, lg=12, xl=12,  # Always full width
             className='mb-4',
@@ -154,6 +198,9 @@ dashboard_page = dbc.Container([
         
         dbc.Col([
             html.H6("Play Clock Analysis", className='text-center mb-2', style={'fontWeight': 'bold'}),
+            # Shown while the league comparison is computed in the background
+            dbc.Progress(id='lineplot-progress', value=0, max=1, striped=True, animated=True,
+                         style=PROGRESS_HIDDEN),
             html.Div([
                 line_plot,
             ])
@@ -164,6 +211,40 @@ dashboard_page = dbc.Container([
         ),
     ]),
     
+    # Weekly trends row - rolling rates over the QB's weeks, full width
+    dbc.Row([
+        dbc.Col([
+            html.H6("Weekly Trends", className='text-center mb-2', style={'fontWeight': 'bold'}),
+            dcc.Graph(id='trend-plot', figure=go.Figure(), config={'responsive': True}),
+        ],
+            xs=12, sm=12, md=12, lg=12, xl=12,  # Always full width
+            className='mb-3',
+            style={'padding-right': '15px', 'padding-left': '15px'}
+        ),
+    ]),
+
+    # Comparison row - the same visuals for several QBs side by side,
+    # filtered by the sidebar
+    dbc.Row([
+        dbc.Col([
+            html.H5("Compare Quarterbacks", className='mt-2 text-center', style={'fontWeight': 'bold'}),
+            html.Hr(className="my-2"),
+            # Closest career tendencies to the selected QB, from the ETL's index
+            html.H6("Most Similar QBs", className='text-center mb-2', style={'fontWeight': 'bold'}),
+            html.Div(id='similar-qbs', className='mb-2'),
+            dbc.Button("Compare with these QBs", id='compare-similar', size='sm', color='secondary',
+                       className='mb-3'),
+            compare_dropdown,
+            dcc.Graph(id='compare-field', figure=go.Figure(), config={'responsive': True}),
+            dcc.Graph(id='compare-rose', figure=go.Figure(), config={'responsive': True}),
+            dcc.Graph(id='compare-lineplot', figure=go.Figure(), config={'responsive': True}),
+        ],
+            xs=12, sm=12, md=12, lg=12, xl=12,  # Always full width
+            className='mb-3',
+            style={'padding-right': '15px', 'padding-left': '15px'}
+        ),
+    ]),
+
     # Explanations row - full width
     dbc.Row([
         dbc.Col([
@@ -187,12 +268,13 @@ dashboard_page = dbc.Container([
                 ". The magnitude shows the frequency of each outcome type."
                 ], style={'fontSize': '14px'}, className='mb-0'),
             html.P("3. Line Plot Comparison of Play Clock", style={'fontWeight': 'bold'}, className='mb-1'),
-            html.P("The line plot compares how a QB finds opportunities for completions during the play clock versus other QBs.", 
+            html.P("The line plot compares how a QB finds opportunities for completions during the play clock versus the "
+                   "league's percentile spread, or versus the QBs with the most similar play clock profile.", 
                    style={'fontSize': '14px'}, className='mb-0'),
             html.P("4. Sankey Flow Diagram of Passes", style={'fontWeight': 'bold'}, className='mb-1'),
             html.P(
                 "The Sankey Flow Diagram gives a macro-overview for how all of a QB's passes are distributed "
-                "amongst his receivers and the depth of the pass.", 
+                "amongst his receivers and the depth, outcome or direction of the pass.", 
                 style={'fontSize': '14px'}, className='mb-0'
             ),
             html.Hr(className="my-2"),
@@ -212,6 +294,44 @@ dashboard_page = dbc.Container([
                               className='mb-2',
                               color='green',
                               ),
+            dbc.RadioItems(id='field-scope',
+                           options=[
+                               {'label': 'Field Heatmap for the Selected QB', 'value': 'qb'},
+                               {'label': 'Field Heatmap for the League', 'value': 'league'},
+                           ],
+                           value='qb',
+                           inline=True,
+                           className='mb-2 text-center',
+                           ),
+            dbc.RadioItems(id='lineplot-mode',
+                           options=[
+                               {'label': 'Line Plot vs League Percentiles', 'value': 'band'},
+                               {'label': 'Line Plot vs Nearest Peers', 'value': 'peers'},
+                           ],
+                           value='band',
+                           inline=True,
+                           className='mb-2 text-center',
+                           ),
+            dbc.RadioItems(id='sankey-stage',
+                           options=[
+                               {'label': 'Sankey by Pass Depth', 'value': 'depth'},
+                               {'label': 'Sankey by Play Outcome', 'value': 'outcome'},
+                               {'label': 'Sankey by Pass Direction', 'value': 'direction'},
+                           ],
+                           value='depth',
+                           inline=True,
+                           className='mb-2 text-center',
+                           ),
+            dbc.RadioItems(id='trend-window',
+                           options=[
+                               {'label': 'Trends Week by Week' if window == 1 else f'Trends over {window} Weeks',
+                                'value': window}
+                               for window in TREND_WINDOWS
+                           ],
+                           value=5,
+                           inline=True,
+                           className='mb-2 text-center',
+                           ),
             html.Hr(className="my-2",
                     style={'color': 'black'}),
         ],
@@ -229,17 +349,21 @@ dashboard_page = dbc.Container([
         dbc.Col([
             html.H5("Pass Stat Breakdown by QB and Type",
                     className='mt-4 mb-4 text-center'),
+            dbc.RadioItems(id='stats-split',
+                           options=[
+                               {'label': 'Career', 'value': 'career'},
+                               {'label': 'By Season', 'value': 'season'},
+                               {'label': 'By Team', 'value': 'team'},
+                           ],
+                           value='career',
+                           inline=True,
+                           className='mb-2 text-center',
+                           ),
+            dbc.Progress(id='stats-progress', value=0, max=1, striped=True, animated=True,
+                         style=PROGRESS_HIDDEN),
             dash_table.DataTable(
                 id='pass-stats-table',
-                columns=[
-                    dict( id='Player', name='Player' ),
-                    dict( id='% of Short Passes', name='% of Short Passes', type='numeric' ),
-                    dict( id='% of Intermediate Passes', name='% of Intermediate Passes', type='numeric' ),
-                    dict( id='% of Deep Passes', name='% of Deep Passes', type='numeric' ),
-                    dict( id='Avg EPA/Play', name='Avg EPA/Play', type='numeric' ),
-                    dict( id='Completion %', name='Completion %', type='numeric' ),
-                    dict( id='Avg Air Yards', name='Avg Air Yards', type='numeric' )
-                ],
+                columns=stats_table_columns('career'),
                 style_cell={
                     "fontFamily": "Ubuntu", 
                     "fontSize": "12px", 
@@ -262,11 +386,67 @@ dashboard_page = dbc.Container([
                 ],
                 style_table={'border': 'none'},
                 cell_selectable=False,
-                sort_action='native'
+                # Paged, sorted and filtered by the server; the browser
+                # only ever holds one page
+                page_action='custom',
+                page_current=0,
+                page_size=15,
+                sort_action='custom',
+                sort_mode='multi',
+                sort_by=[],
+                filter_action='custom',
+                filter_query=''
             )
         ], 
         width=6,
         style={'paddingRight': '5rem'}
         )
+    ]),
+
+    # Opponent-adjusted row - the QB against what each defense allowed everyone else
+    dbc.Row([
+        dbc.Col([
+            html.H5("Passing Against Each Defense's Allowed Average",
+                    className='mt-4 mb-2 text-center'),
+            html.P("Every pass in the date range, by game, season and career. A defense's "
+                   "average leaves out every game it played against this QB that season.",
+                   className='text-center text-muted mb-2', style={'fontSize': '14px'}),
+            dash_table.DataTable(
+                id='opponent-table',
+                columns=opponent_table_columns,
+                style_cell={
+                    "fontFamily": "Ubuntu",
+                    "fontSize": "12px",
+                    "width": "75px",
+                    "whiteSpace": "nowrap",
+                    "textAlign": "center",
+                    "border": 'none'
+                },
+                style_header={
+                    "height": "50px",
+                    "whiteSpace": "normal",
+                    "backgroundColor": "rgb(245,245,245)",
+                    "fontWeight": "bold"
+                },
+                style_data_conditional=[
+                    {
+                        'if': {'row_index': 'odd'},
+                        'backgroundColor': 'rgb(250,250,250)',
+                    },
+                    {
+                        'if': {'filter_query': '{split} != "game"'},
+                        'fontWeight': 'bold',
+                        'backgroundColor': 'rgb(240,240,240)',
+                    },
+                ],
+                style_table={'border': 'none'},
+                cell_selectable=False,
+                page_size=20,
+            )
+        ],
+            xs=12, sm=12, md=12, lg=12, xl=12,  # Always full width
+            className='mb-3',
+            style={'padding-right': '15px', 'padding-left': '15px'}
+        ),
     ])
 ], fluid=True) 
\ No newline at end of file
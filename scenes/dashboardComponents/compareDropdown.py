@@ -0,0 +1,10 @@
+from dash import dcc
+
+compare_dropdown = dcc.Dropdown(
+    id='compare-select', multi=True, placeholder='Pick 2 to 6 Quarterbacks to compare...',
+    options=[],
+    searchable=True,
+    value=[],
+    persistence=True,
+    className='mb-3'
+)
@@ -0,0 +1,125 @@
+"""
+NFL QB Passing Tendencies Dashboard - Background Callbacks
+
+This module runs the league-wide callbacks (stats table, line plot) as Dash
+background callbacks: the request that triggers one returns at once, the
+work runs in a separate process managed through a local diskcache, and the
+browser polls for the result. Server threads stay free for the light
+per-QB callbacks, and a job still running when the user leaves the page is
+cancelled.
+
+diskcache (with multiprocess and psutil) is optional; without it the same
+callbacks run in the request thread as before.
+"""
+
+import contextlib
+import functools
+
+# Progress callback of the job running in this process, if any
+_reporter = None
+
+def make_manager(cache_dir, mode='auto'):
+    """
+    Create the background callback manager.
+
+    Args:
+        cache_dir: Directory for the job queue and results
+        mode: 'on' requires diskcache, 'off' disables background callbacks
+              and 'auto' uses them when diskcache is installed
+
+    Returns:
+        tuple: (DiskcacheManager, diskcache.Cache), or (None, None) when
+               callbacks run in the request thread
+    """
+    if mode == 'off':
+        return None, None
+    try:
+        import diskcache
+        from dash import DiskcacheManager
+        cache = diskcache.Cache(cache_dir)
+        return DiskcacheManager(cache), cache
+    except ImportError as e:
+        if mode == 'on':
+            raise RuntimeError(f"Background callbacks need diskcache, multiprocess and psutil: {e}")
+        return None, None
+
+def report_progress(step, total):
+    """
+    Tell the browser how far the current job has got. Does nothing outside
+    a background job, so heavy functions can report unconditionally.
+    """
+    if _reporter is not None:
+        try:
+            _reporter([step, total])
+        except Exception as e:
+            print(f"Warning: Could not report progress: {e}")
+
+@contextlib.contextmanager
+def _reporting(set_progress):
+    global _reporter
+    previous, _reporter = _reporter, set_progress
+    try:
+        yield
+    finally:
+        _reporter = previous
+
+class BackgroundJobs:
+    """
+    Registers callbacks as background jobs when a manager is available.
+
+    Args:
+        manager: DiskcacheManager, or None to run callbacks in the request
+                 thread
+        on_start: Called (with no arguments) at the start of every job, in
+                  the job's process
+        on_finish: Called after every job, in the job's process
+        interval: Milliseconds between the browser's result polls
+    """
+
+    def __init__(self, manager, on_start=None, on_finish=None, interval=500):
+        self.manager = manager
+        self.on_start = on_start
+        self.on_finish = on_finish
+        self.interval = interval
+
+    @property
+    def enabled(self):
+        return self.manager is not None
+
+    def options(self, progress=None, running=None, cancel=None, progress_default=None):
+        """
+        Keyword arguments for app.callback. Progress and cancel only apply
+        to background callbacks; running applies either way.
+
+        Args:
+            progress: Outputs updated through report_progress
+            running: (Output, value while running, value after) tuples
+            cancel: Inputs whose change cancels a running job
+            progress_default: Progress output values when no job runs
+        """
+        options = {'running': running}
+        if self.enabled:
+            options.update(background=True, manager=self.manager, interval=self.interval,
+                           progress=progress, progress_default=progress_default, cancel=cancel)
+        return options
+
+    def job(self, function):
+        """
+        Decorator adapting a callback to the signature Dash calls
+        background callbacks with (a progress setter first) when enabled.
+        Apply it directly under app.callback.
+        """
+        if not self.enabled:
+            return function
+
+        @functools.wraps(function)
+        def wrapper(set_progress, *args, **kwargs):
+            if self.on_start is not None:
+                self.on_start()
+            try:
+                with _reporting(set_progress):
+                    return function(*args, **kwargs)
+            finally:
+                if self.on_finish is not None:
+                    self.on_finish()
+        return wrapper
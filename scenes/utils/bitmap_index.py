@@ -0,0 +1,291 @@
+"""
+NFL QB Passing Tendencies Dashboard - League-Wide Bitmap Index
+
+This module builds an in-memory bitmap index over every pass play in the
+league so that any combination of sidebar filters resolves to a row set with
+a few bitwise AND/OR operations, without scanning the play table.
+
+Bitsets are stored bit-packed (one bit per play, eight plays per byte):
+- Categorical dimensions (down, depth, direction, passer, receiver, week)
+  hold one bitset per value; a filter ORs the selected values together.
+- Ordered dimensions (play clock, quarter time, game date) are
+  range-encoded: the bitset for value v marks every play with a value <= v,
+  so any inclusive range is a single AND NOT of two bitsets.
+"""
+
+import numpy as np
+import pandas as pd
+
+from .qb_helpers import bin_depths
+from .columnar_store import PASS_PLAYS_QUERY, PlayStore, decode_categories, save_arrays, load_arrays
+
+# Depth bins use the same (overlapping, inclusive) ranges as the dashboard SQL
+DEPTH_RANGES = {
+    '0-10 yd': (0, 10),
+    '10-20 yd': (10, 20),
+    '20+ yd': (20, np.inf),
+}
+
+def pack(mask):
+    """Pack a boolean mask into a bitset."""
+    return np.packbits(mask)
+
+def _day_number(timestamp):
+    return timestamp.to_datetime64().astype('datetime64[D]').astype(np.float64)
+
+def date_bounds(start_date, end_date):
+    """
+    Inclusive day-number bounds for a date picker range (a missing date
+    leaves that side unbounded).
+
+    Returns:
+        tuple: (low, high) as float day numbers, possibly infinite
+    """
+    low = _day_number(pd.Timestamp(start_date).ceil('D')) if start_date else -np.inf
+    high = _day_number(pd.Timestamp(end_date).floor('D')) if end_date else np.inf
+    return low, high
+
+def _depth_masks(air_yards):
+    masks = {}
+    for depth, (low, high) in DEPTH_RANGES.items():
+        if np.isinf(high):
+            masks[depth] = air_yards > low
+        else:
+            masks[depth] = (air_yards >= low) & (air_yards <= high)
+    return masks
+
+def _categorical_bitsets(codes, n_keys):
+    """
+    Build one bitset per category code (codes of -1 are never set).
+
+    Returns:
+        np.ndarray: matrix where matrix[i] is the bitset for code i
+    """
+    codes = np.asarray(codes)
+    matrix = np.zeros((n_keys, (len(codes) + 7) // 8), dtype=np.uint8)
+    order = np.argsort(codes, kind='stable')
+    boundaries = np.searchsorted(codes[order], np.arange(n_keys + 1))
+    mask = np.zeros(len(codes), dtype=bool)
+    for position in range(n_keys):
+        rows = order[boundaries[position]:boundaries[position + 1]]
+        mask[rows] = True
+        matrix[position] = np.packbits(mask)
+        mask[rows] = False
+    return matrix
+
+def _range_bitsets(values):
+    """
+    Build range-encoded bitsets over the distinct values of an ordered column.
+
+    Returns:
+        tuple: (keys, matrix) where matrix[i] marks every row <= keys[i]
+    """
+    values = np.asarray(values, dtype=np.float64)
+    keys = np.unique(values[~np.isnan(values)])
+    order = np.argsort(values, kind='stable')  # NaNs sort last and are never set
+    boundaries = np.searchsorted(values[order], keys, side='right')
+    matrix = np.zeros((len(keys), (len(values) + 7) // 8), dtype=np.uint8)
+    mask = np.zeros(len(values), dtype=bool)
+    start = 0
+    for position, end in enumerate(boundaries):
+        mask[order[start:end]] = True
+        matrix[position] = np.packbits(mask)
+        start = end
+    return keys, matrix
+
+class LeagueIndex:
+    """
+    Bitmap index over every league pass play.
+
+    Selected rows are aggregated straight from the PlayStore columns the
+    index was built over.
+    """
+
+    def __init__(self, store, categorical, ranges):
+        self.store = store
+        self.size = store.size
+        self.categorical = categorical
+        self.ranges = ranges
+
+    @classmethod
+    def from_store(cls, store):
+        """
+        Build the index over a PlayStore.
+
+        Args:
+            store: PlayStore holding every pass play
+
+        Returns:
+            LeagueIndex: Index over the store's rows
+        """
+        columns, categories = store.columns, store.categories
+
+        categorical = {
+            name: (list(categories[name]), _categorical_bitsets(columns[name], len(categories[name])))
+            for name in ('direction', 'passer', 'receiver')
+        }
+        # Downs are stored as 1-4 with 0 for missing
+        categorical['down'] = ([1, 2, 3, 4], _categorical_bitsets(columns['down'].astype(np.int16) - 1, 4))
+
+        week_numbers = columns['season'].astype(np.int32) * 100 + columns['week']
+        week_keys, week_codes = np.unique(week_numbers, return_inverse=True)
+        categorical['week'] = ([f'{key // 100}-{key % 100:02d}' for key in week_keys],
+                               _categorical_bitsets(week_codes, len(week_keys)))
+
+        depth_masks = _depth_masks(columns['air_yards'])
+        categorical['depth'] = (list(depth_masks), np.packbits(np.array(list(depth_masks.values())), axis=1))
+
+        ranges = {
+            'play_clock': _range_bitsets(columns['play_clock']),
+            'quarter_seconds': _range_bitsets(columns['quarter_seconds']),
+            'game_date': _range_bitsets(columns['game_date']),
+        }
+        return cls(store, categorical, ranges)
+
+    @classmethod
+    def from_frame(cls, df):
+        """
+        Build the index from a DataFrame of pass plays.
+
+        Args:
+            df: DataFrame with the columns selected by PASS_PLAYS_QUERY
+
+        Returns:
+            LeagueIndex: Index over the plays
+        """
+        return cls.from_store(PlayStore.from_frame(df))
+
+    def save(self, directory):
+        """
+        Persist the bitsets as .npy files so workers can memory-map them.
+        """
+        arrays, keys = {}, {}
+        for name, (dimension_keys, matrix) in self.categorical.items():
+            arrays[f'categorical_{name}'] = matrix
+            keys[name] = dimension_keys
+        for name, (dimension_keys, matrix) in self.ranges.items():
+            arrays[f'range_{name}_keys'] = dimension_keys
+            arrays[f'range_{name}'] = matrix
+        save_arrays(directory, arrays, {'categorical_keys': keys, 'rows': self.size})
+
+    @classmethod
+    def load(cls, directory, store, mmap=True):
+        """
+        Load bitsets written by save() over the same PlayStore.
+        """
+        arrays, meta = load_arrays(directory, mmap=mmap)
+        if meta['rows'] != store.size:
+            raise ValueError(f"Index at {directory} covers {meta['rows']} rows, store has {store.size}")
+        categorical = {
+            name: (keys, arrays[f'categorical_{name}'])
+            for name, keys in meta['categorical_keys'].items()
+        }
+        ranges = {
+            name[len('range_'):]: (np.asarray(arrays[f'{name}_keys']), arrays[name])
+            for name in arrays if name.startswith('range_') and not name.endswith('_keys')
+        }
+        return cls(store, categorical, ranges)
+
+    @property
+    def nbytes(self):
+        matrices = [matrix for _, matrix in self.categorical.values()] + \
+                   [matrix for _, matrix in self.ranges.values()]
+        return sum(matrix.nbytes for matrix in matrices)
+
+    def everything(self):
+        """Bitset with every row set."""
+        return pack(np.ones(self.size, dtype=bool))
+
+    def match_any(self, dimension, values):
+        """
+        OR together the bitsets of the given values of a categorical dimension.
+        Unknown values match nothing.
+        """
+        keys, matrix = self.categorical[dimension]
+        positions = {key: position for position, key in enumerate(keys)}
+        selected = [positions[value] for value in values if value in positions]
+        if not selected:
+            return np.zeros(matrix.shape[1], dtype=np.uint8)
+        return np.bitwise_or.reduce(matrix[selected], axis=0)
+
+    def match_range(self, dimension, low, high):
+        """
+        Bitset of rows whose value in an ordered dimension lies in [low, high].
+        """
+        keys, matrix = self.ranges[dimension]
+        upper = np.searchsorted(keys, high, side='right') - 1
+        lower = np.searchsorted(keys, low, side='left') - 1
+        if upper < 0:
+            return np.zeros(matrix.shape[1], dtype=np.uint8)
+        bits = matrix[upper].copy()
+        if lower >= 0:
+            bits &= ~matrix[lower]
+        return bits
+
+    def select(self, down=None, depth=None, direction=None, passer=None, receiver=None,
+               week=None, play_clock=None, quarter_seconds=None, game_date=None):
+        """
+        Resolve a filter combination to a bitset.
+
+        Categorical filters take a list of values (empty or None leaves the
+        dimension unfiltered); range filters take an inclusive (low, high)
+        pair, with game_date bounds given as dates.
+
+        Returns:
+            np.ndarray: Packed bitset of matching rows
+        """
+        bits = self.everything()
+
+        for dimension, values in (('down', down), ('depth', depth), ('direction', direction),
+                                  ('passer', passer), ('receiver', receiver), ('week', week)):
+            if values:
+                if dimension == 'down':
+                    values = [int(value) for value in values]
+                bits &= self.match_any(dimension, values)
+
+        for dimension, bounds in (('play_clock', play_clock), ('quarter_seconds', quarter_seconds)):
+            if bounds:
+                bits &= self.match_range(dimension, bounds[0], bounds[1])
+
+        if game_date:
+            bits &= self.match_range('game_date', *date_bounds(*game_date))
+
+        return bits
+
+    def rows(self, bits):
+        """Row positions set in a bitset."""
+        return np.flatnonzero(np.unpackbits(bits, count=self.size))
+
+    def count(self, bits):
+        """Number of rows set in a bitset."""
+        return int(np.unpackbits(bits, count=self.size).sum())
+
+    def filter_frame(self, bits):
+        """
+        Slim frame of the rows set in a bitset, for league aggregations.
+        """
+        rows = self.rows(bits)
+        columns, categories = self.store.columns, self.store.categories
+        air_yards = columns['air_yards'][rows]
+        return pd.DataFrame({
+            'passer_player_name': decode_categories(columns['passer'][rows], categories['passer']),
+            'receiver_player_name': decode_categories(columns['receiver'][rows], categories['receiver']),
+            'air_yards': air_yards,
+            'depth_bin': bin_depths(air_yards),
+            'play_clock': columns['play_clock'][rows],
+            'epa': columns['epa'][rows],
+            'complete_pass': columns['complete_pass'][rows],
+        })
+
+def build_league_index(con):
+    """
+    Build the league-wide index from DuckDB.
+
+    Args:
+        con: DuckDB connection
+
+    Returns:
+        LeagueIndex: Index over every pass play
+    """
+    df = pd.read_sql_query(PASS_PLAYS_QUERY.format(where='passer_player_name IS NOT NULL'), con=con)
+    return LeagueIndex.from_frame(df)
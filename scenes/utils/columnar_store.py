@@ -0,0 +1,251 @@
+"""
+NFL QB Passing Tendencies Dashboard - Memory-Mapped Columnar Store
+
+This module defines the slim pass-play table shared by the per-QB shards and
+the league-wide bitmap index, and persists it (and any derived arrays) as
+plain .npy files. Loading with mmap_mode='r' lets every server worker map the
+same read-only pages from the OS page cache instead of building its own
+pandas copy, so memory stays flat as workers scale with the core count.
+"""
+
+import json
+import os
+import shutil
+
+import numpy as np
+import pandas as pd
+
+from .qb_helpers import PLAY_OUTCOMES, bin_play_outcomes
+
+STORE_DIR = os.path.join('data', 'columnar')
+
+# Every pass play, ordered by passer so each QB's rows are one contiguous slice
+PASS_PLAYS_QUERY = """
+    SELECT game_id, play_id, passer_player_name, receiver_player_name, posteam, defteam, pass_direction,
+           down, ydstogo AS distance, air_yards, play_clock, quarter_seconds_remaining,
+           pass_location_x, pass_location_y, epa, complete_pass,
+           pass_touchdown, first_down_pass, first_down, game_date, season, week
+    FROM pbp
+    WHERE {where}
+    ORDER BY passer_player_name, game_date
+"""
+
+# Encoded column name -> pbp column name for categorical fields
+CATEGORICAL_COLUMNS = {
+    'game': 'game_id',
+    'passer': 'passer_player_name',
+    'receiver': 'receiver_player_name',
+    'posteam': 'posteam',
+    'defteam': 'defteam',
+    'direction': 'pass_direction',
+}
+
+# Encoded column name -> pbp column name for float32 measurements
+FLOAT_COLUMNS = {
+    'distance': 'distance',
+    'air_yards': 'air_yards',
+    'play_clock': 'play_clock',
+    'quarter_seconds': 'quarter_seconds_remaining',
+    'location_x': 'pass_location_x',
+    'location_y': 'pass_location_y',
+    'epa': 'epa',
+}
+
+def database_signature(path):
+    """
+    Size and modification time of a database file, recorded with the store so
+    a stale export is never served against a newer database.
+    """
+    stat = os.stat(path)
+    return {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+
+def encode_categories(values):
+    """
+    Encode a column of labels as compact integer codes.
+
+    Args:
+        values: Series of labels (missing values allowed)
+
+    Returns:
+        tuple: (codes, categories) where codes index into categories and
+               missing values are coded as -1
+    """
+    codes, categories = pd.factorize(values, sort=True)
+    dtype = np.int8 if len(categories) < np.iinfo(np.int8).max else np.int16
+    return codes.astype(dtype), list(categories)
+
+def decode_categories(codes, categories):
+    """
+    Decode integer codes back to labels, with -1 decoding to None.
+    """
+    return np.array(list(categories) + [None], dtype=object)[codes]
+
+def _small_int(series, dtype):
+    return pd.to_numeric(series, errors='coerce').fillna(0).to_numpy().astype(dtype)
+
+def encode_pass_plays(df):
+    """
+    Encode pass plays as compact NumPy columns.
+
+    Categorical fields become int8/int16 codes, measurements float32 and
+    game dates int32 day numbers. Columns missing from df are skipped.
+
+    Args:
+        df: DataFrame with the columns selected by PASS_PLAYS_QUERY
+
+    Returns:
+        tuple: (columns, categories) dicts keyed by encoded column name
+    """
+    columns, categories = {}, {}
+
+    for name, source in CATEGORICAL_COLUMNS.items():
+        if source in df.columns:
+            columns[name], categories[name] = encode_categories(df[source])
+
+    for name, source in FLOAT_COLUMNS.items():
+        columns[name] = pd.to_numeric(df[source], errors='coerce').to_numpy(dtype=np.float32)
+
+    columns['down'] = _small_int(df['down'], np.int8)
+    # NaN where unknown, so completion rates can leave those plays out
+    columns['complete_pass'] = pd.to_numeric(df['complete_pass'], errors='coerce').to_numpy(dtype=np.float32)
+    columns['outcome'] = bin_play_outcomes(df)
+    columns['game_date'] = pd.to_datetime(df['game_date']).to_numpy(dtype='datetime64[D]').astype(np.int32)
+
+    if 'season' in df.columns:
+        columns['season'] = _small_int(df['season'], np.int16)
+        columns['week'] = _small_int(df['week'], np.int8)
+
+    if 'play_id' in df.columns:
+        columns['play_id'] = _small_int(df['play_id'], np.int32)
+
+    return columns, categories
+
+def save_arrays(directory, arrays, meta):
+    """
+    Write named arrays as .npy files plus a meta.json, replacing any previous
+    contents of the directory in one rename.
+    """
+    staging = directory.rstrip(os.sep) + '.tmp'
+    shutil.rmtree(staging, ignore_errors=True)
+    os.makedirs(staging)
+
+    for name, array in arrays.items():
+        np.save(os.path.join(staging, f'{name}.npy'), np.ascontiguousarray(array))
+    with open(os.path.join(staging, 'meta.json'), 'w') as f:
+        json.dump(meta, f)
+
+    shutil.rmtree(directory, ignore_errors=True)
+    os.replace(staging, directory)
+
+def load_arrays(directory, mmap=True):
+    """
+    Load arrays written by save_arrays.
+
+    Args:
+        directory: Directory written by save_arrays
+        mmap: Map the files read-only instead of reading them into memory
+
+    Returns:
+        tuple: (arrays, meta)
+    """
+    with open(os.path.join(directory, 'meta.json')) as f:
+        meta = json.load(f)
+
+    arrays = {}
+    for filename in os.listdir(directory):
+        if filename.endswith('.npy'):
+            arrays[filename[:-4]] = np.load(os.path.join(directory, filename),
+                                            mmap_mode='r' if mmap else None)
+    return arrays, meta
+
+class PlayStore:
+    """
+    League-wide slim pass-play table held as NumPy columns, sorted by passer.
+    """
+
+    def __init__(self, columns, categories, meta=None):
+        self.columns = columns
+        self.categories = categories
+        self.meta = meta or {}
+        self.size = len(columns['passer'])
+
+    @classmethod
+    def from_frame(cls, df, meta=None):
+        """
+        Encode a DataFrame of pass plays (as selected by PASS_PLAYS_QUERY).
+        """
+        df = df.sort_values(['passer_player_name', 'game_date'], kind='stable').reset_index(drop=True)
+        columns, categories = encode_pass_plays(df)
+        return cls(columns, categories, meta)
+
+    def save(self, directory=STORE_DIR):
+        save_arrays(os.path.join(directory, 'plays'), self.columns,
+                    dict(self.meta, categories=self.categories, rows=self.size))
+
+    @classmethod
+    def load(cls, directory=STORE_DIR, mmap=True):
+        columns, meta = load_arrays(os.path.join(directory, 'plays'), mmap=mmap)
+        categories = meta.pop('categories')
+        meta.pop('rows', None)
+        return cls(columns, categories, meta)
+
+    @staticmethod
+    def exists(directory=STORE_DIR):
+        return os.path.exists(os.path.join(directory, 'plays', 'meta.json'))
+
+    def passer_slice(self, passer):
+        """
+        Row slice holding one passer's plays (empty if the passer is unknown).
+        """
+        passers = self.categories['passer']
+        code = np.searchsorted(passers, passer)
+        if code >= len(passers) or passers[code] != passer:
+            return slice(0, 0)
+        codes = self.columns['passer']
+        return slice(int(np.searchsorted(codes, code, side='left')),
+                     int(np.searchsorted(codes, code, side='right')))
+
+    def play(self, row):
+        """
+        Decode a single play by its row id.
+
+        Row ids are positions in the store, so they are stable for as long as
+        the store is (one data version) and index every column directly.
+
+        Args:
+            row: Row id
+
+        Returns:
+            dict: The play's fields under pbp column names, or None if the
+                  row id is out of range
+        """
+        if not 0 <= row < self.size:
+            return None
+        columns = self.columns
+        record = {}
+
+        for name, source in CATEGORICAL_COLUMNS.items():
+            if name in columns:
+                code = int(columns[name][row])
+                record[source] = self.categories[name][code] if code >= 0 else None
+
+        for name, source in FLOAT_COLUMNS.items():
+            value = float(columns[name][row])
+            record[source] = None if np.isnan(value) else value
+
+        record['down'] = int(columns['down'][row])
+        complete_pass = float(columns['complete_pass'][row])
+        record['complete_pass'] = None if np.isnan(complete_pass) else int(complete_pass)
+        record['play_outcome_bin'] = PLAY_OUTCOMES[int(columns['outcome'][row])]
+        record['game_date'] = str(np.datetime64(int(columns['game_date'][row]), 'D'))
+        for name in ('season', 'week', 'play_id'):
+            if name in columns:
+                record[name] = int(columns[name][row])
+        return record
+
+    def passer_columns(self, passer):
+        """
+        Zero-copy views of one passer's rows in every column.
+        """
+        rows = self.passer_slice(passer)
+        return {name: column[rows] for name, column in self.columns.items()}
@@ -0,0 +1,176 @@
+"""
+NFL QB Passing Tendencies Dashboard - QB Comparison
+
+This module draws the comparison mode's small multiples: one field heatmap,
+rose plot and play clock line per compared QB. Each figure is built from
+the result of a single grouped query over every compared QB (see
+sql_aggregates), so adding a QB adds rows to scan, not queries to run.
+"""
+
+import numpy as np
+import plotly.graph_objects as go
+from plotly.subplots import make_subplots
+
+from .drawPlotlyField import field_outline_shapes
+from .field_tiers import FIELD_LENGTH_FT, FIELD_WIDTH_FT, FINE_BINS, density_contour, grid_centres
+from .qb_helpers import PLAY_OUTCOMES, PLAYCLOCK_RANGES
+
+# Most QBs compared at once, and panels per row of small multiples
+MAX_COMPARED = 6
+COMPARE_COLUMNS = 3
+
+OUTCOME_COLORS = {
+    'No First Down': '#dc3545',
+    'First Down': '#fd7e14',
+    'Touchdown': '#198754',
+}
+
+def compared_passers(passers, limit=MAX_COMPARED):
+    """
+    The passers to compare, in the order picked, without repeats.
+
+    Args:
+        passers: Dropdown value (list of names or None)
+        limit: Most passers kept
+
+    Returns:
+        list: At most limit passer names
+    """
+    return list(dict.fromkeys(passer for passer in passers or [] if passer))[:limit]
+
+def grid_shape(n, columns=COMPARE_COLUMNS):
+    """
+    Rows and columns of small multiples for n panels.
+    """
+    columns = max(1, min(n, columns))
+    return -(-n // columns), columns
+
+def _panel(position, columns):
+    row, column = divmod(position, columns)
+    return row + 1, column + 1
+
+def field_multiples(passers, cells, bins=FINE_BINS):
+    """
+    A field density panel per passer, on one colour scale.
+
+    Args:
+        passers: Passer names, in panel order
+        cells: DataFrame from sql_aggregates.field_cell_counts
+        bins: Grid the cells were counted on
+
+    Returns:
+        go.Figure: Small multiples of the field heatmap
+    """
+    rows, columns = grid_shape(len(passers))
+    fig = make_subplots(rows=rows, cols=columns, subplot_titles=passers,
+                        horizontal_spacing=0.02, vertical_spacing=0.08)
+    x_centres, y_centres = grid_centres(bins)
+    by_passer = {passer: group for passer, group in cells.groupby('passer')}
+    shapes = []
+
+    for position, passer in enumerate(passers):
+        row, column = _panel(position, columns)
+        counts = np.zeros((bins[1], bins[0]), dtype=np.int32)
+        group = by_passer.get(passer)
+        if group is not None:
+            counts[group['cell_y'].to_numpy(), group['cell_x'].to_numpy()] = group['passes'].to_numpy()
+        fig.add_trace(density_contour(x_centres, y_centres, counts), row=row, col=column)
+        # make_subplots numbers axes row by row from 1 ('x', 'x2', ...)
+        suffix = '' if position == 0 else str(position + 1)
+        shapes += field_outline_shapes(xref='x' + suffix, yref='y' + suffix)
+        # Keep each field's proportions
+        fig.update_yaxes(scaleanchor='x' + suffix, row=row, col=column)
+
+    # Assigned once: plotly revalidates every shape on each add_shape
+    fig.update_layout(shapes=shapes)
+    fig.update_xaxes(range=[0, FIELD_LENGTH_FT], visible=False)
+    fig.update_yaxes(range=[0, FIELD_WIDTH_FT], visible=False)
+    fig.update_layout(height=230 * rows, margin=dict(l=10, r=10, t=40, b=10),
+                      showlegend=False, plot_bgcolor='white', font=dict(family='Ubuntu'))
+    return fig
+
+def rose_multiples(passers, receivers):
+    """
+    A rose plot per passer, on a shared radial scale.
+
+    Args:
+        passers: Passer names, in panel order
+        receivers: DataFrame from sql_aggregates.rose_counts_by_passer
+
+    Returns:
+        go.Figure: Small multiples of the rose plot
+    """
+    rows, columns = grid_shape(len(passers))
+    fig = make_subplots(rows=rows, cols=columns, subplot_titles=passers,
+                        specs=[[{'type': 'polar'}] * columns for _ in range(rows)])
+    by_passer = {passer: group for passer, group in receivers.groupby('passer')}
+    largest = receivers.groupby(['passer', 'Receiver'])['Frequency'].sum().max() if len(receivers) else 0
+
+    for position, passer in enumerate(passers):
+        row, column = _panel(position, columns)
+        group = by_passer.get(passer)
+        if group is None:
+            continue
+        for outcome in PLAY_OUTCOMES:
+            part = group[group['Play Outcome'] == outcome]
+            fig.add_trace(go.Barpolar(r=part['Frequency'], theta=part['Receiver'], name=outcome,
+                                      marker_color=OUTCOME_COLORS[outcome], legendgroup=outcome,
+                                      showlegend=position == 0),
+                          row=row, col=column)
+
+    fig.update_polars(radialaxis=dict(range=[0, max(largest * 1.1, 1)], showticklabels=False),
+                      angularaxis=dict(tickfont=dict(size=9)))
+    fig.update_layout(height=320 * rows, margin=dict(l=30, r=30, t=50, b=20),
+                      legend_title_text='Play Result', template='ggplot2', font=dict(family='Ubuntu'))
+    return fig
+
+def playclock_matrix(passers, counts, n_bins=len(PLAYCLOCK_RANGES)):
+    """
+    Each passer's share of attempts per play clock range.
+
+    Args:
+        passers: Passer names, in row order
+        counts: DataFrame from sql_aggregates.playclock_counts
+
+    Returns:
+        np.ndarray: (passers, ranges) shares; rows of passers without plays are 0
+    """
+    matrix = np.zeros((len(passers), n_bins))
+    rows = {passer: position for position, passer in enumerate(passers)}
+    for passer, position, plays in counts[['passer', 'bin', 'plays']].itertuples(index=False):
+        if passer in rows:
+            matrix[rows[passer], int(position)] = plays
+    return matrix / np.maximum(matrix.sum(axis=1, keepdims=True), 1)
+
+def lineplot_multiples(passers, shares):
+    """
+    A play clock line per passer, each drawn over the other compared QBs.
+
+    Args:
+        passers: Passer names, in panel order
+        shares: Matrix from playclock_matrix
+
+    Returns:
+        go.Figure: Small multiples of the line plot with a shared y axis
+    """
+    rows, columns = grid_shape(len(passers))
+    fig = make_subplots(rows=rows, cols=columns, subplot_titles=passers, shared_yaxes=True,
+                        horizontal_spacing=0.03, vertical_spacing=0.12)
+    shares = np.round(shares, 3)
+
+    for position, passer in enumerate(passers):
+        row, column = _panel(position, columns)
+        for other, values in zip(passers, shares):
+            if other != passer:
+                fig.add_trace(go.Scatter(x=PLAYCLOCK_RANGES, y=values, name=other, showlegend=False,
+                                         line=dict(color='rgb(195,195,195)', width=2, dash='dot')),
+                              row=row, col=column)
+        fig.add_trace(go.Scatter(x=PLAYCLOCK_RANGES, y=shares[position], name=passer, showlegend=False,
+                                 line=dict(color='rgb(233,84,32)', width=4)),
+                      row=row, col=column)
+
+    fig.update_yaxes(tickformat='0%', gridcolor='white')
+    fig.update_xaxes(showgrid=False, tickfont=dict(size=9))
+    fig.update_layout(height=260 * rows, margin=dict(l=40, r=10, t=40, b=20),
+                      plot_bgcolor='#F8F5F0', font=dict(family='Ubuntu', color='black'))
+    return fig
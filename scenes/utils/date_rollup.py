@@ -0,0 +1,363 @@
+"""
+NFL QB Passing Tendencies Dashboard - Date-Range Prefix Sums
+
+This module precomputes, for every passer and every game date, running
+totals of the metrics behind the league views (depth bins, play clock bins,
+EPA, completions, air yards) and of each receiver's play outcomes. Any date
+range then aggregates as the difference of two prefix rows, so picking ten
+seasons costs the same as picking one week. Season and team splits sum the
+per-date buckets in the range, never the plays.
+
+The totals cover the plays a freshly opened dashboard selects (see
+BASELINE_FILTERS); callbacks use them only while every other sidebar filter
+is at its default and fall back to the bitmap index otherwise.
+"""
+
+import numpy as np
+import pandas as pd
+
+from .bitmap_index import date_bounds
+from .columnar_store import save_arrays, load_arrays
+from .prerender import DEFAULT_VIEW, is_default_view
+from .qb_helpers import PLAYCLOCK_BINS, PLAY_OUTCOMES
+from .sql_aggregates import OTHER
+
+# Sidebar filters the totals are computed under, as LeagueIndex.select
+# arguments. The quarter time filter is unfiltered at its default.
+BASELINE_FILTERS = {
+    'down': DEFAULT_VIEW['down_filter'],
+    'depth': DEFAULT_VIEW['depth_filter'],
+    'direction': DEFAULT_VIEW['direction_filter'],
+    'play_clock': DEFAULT_VIEW['playclock_filter'],
+}
+
+# Callback parameters that must be at their defaults for the totals to apply
+COVERED_FILTERS = ('playclock_filter', 'time_filter', 'depth_filter', 'down_filter',
+                   'direction_filter', 'receiver_filter')
+
+DEPTH_METRICS = ['depth_0_10', 'depth_10_20', 'depth_20_plus']
+PLAYCLOCK_METRICS = [f'playclock_{position}' for position in range(len(PLAYCLOCK_BINS) - 1)]
+
+# Summed per passer and game date
+METRICS = ['attempts', *DEPTH_METRICS, *PLAYCLOCK_METRICS, 'epa_sum', 'epa_count',
+           'completions', 'completion_count', 'air_yards_sum', 'air_yards_count']
+
+# Bits of the passer bucket keys: passer | game date | team
+PASSER_SHIFT = 32
+TEAM_BITS = 8
+
+# Bits of the receiver bucket keys: passer | receiver | game date
+DATE_BITS = 20
+RECEIVER_BITS = 20
+
+def covers(arguments, receivers=None):
+    """
+    Whether the prefix sums can answer a callback's arguments: every covered
+    filter it takes is at its default, whatever the date range.
+
+    Args:
+        arguments: Parameter name -> value
+        receivers: The QB's receivers, for the receiver filter
+
+    Returns:
+        bool: True when only the dates (if anything) differ from the default
+    """
+    return is_default_view({name: value for name, value in arguments.items() if name in COVERED_FILTERS},
+                           receivers)
+
+def _metric_matrix(columns, rows):
+    """Per-play metric values, one column per entry of METRICS."""
+    air_yards = columns['air_yards'][rows].astype(np.float64)
+    epa = columns['epa'][rows].astype(np.float64)
+    play_clock = columns['play_clock'][rows].astype(np.float64)
+
+    values = np.zeros((len(rows), len(METRICS)), dtype=np.float64)
+    values[:, METRICS.index('attempts')] = 1
+
+    # Same bins as bin_depths
+    depth_codes = np.select([air_yards > 20, air_yards > 10], [2, 1], default=0)
+    values[np.arange(len(rows)), METRICS.index(DEPTH_METRICS[0]) + depth_codes] = 1
+
+    # Same right-inclusive bins as aggregate_playclock
+    n_bins = len(PLAYCLOCK_METRICS)
+    clock_codes = np.searchsorted(PLAYCLOCK_BINS, play_clock, side='left') - 1
+    valid = (clock_codes >= 0) & (clock_codes < n_bins)
+    values[np.flatnonzero(valid), METRICS.index(PLAYCLOCK_METRICS[0]) + clock_codes[valid]] = 1
+
+    values[:, METRICS.index('epa_sum')] = np.nan_to_num(epa)
+    values[:, METRICS.index('epa_count')] = ~np.isnan(epa)
+    complete_pass = columns['complete_pass'][rows].astype(np.float64)
+    values[:, METRICS.index('completions')] = np.nan_to_num(complete_pass)
+    values[:, METRICS.index('completion_count')] = ~np.isnan(complete_pass)
+    values[:, METRICS.index('air_yards_sum')] = np.nan_to_num(air_yards)
+    values[:, METRICS.index('air_yards_count')] = ~np.isnan(air_yards)
+    return values
+
+def _prefix_sums(keys, values):
+    """
+    Sum values over runs of equal keys and accumulate them.
+
+    Returns:
+        tuple: (bucket keys, prefix, first) where prefix[i] totals every
+               bucket before i, so prefix has one more row than there are
+               buckets, and first holds each bucket's first input position
+    """
+    order = np.argsort(keys, kind='stable')
+    keys = keys[order]
+    starts = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]]) if len(keys) else np.array([], dtype=np.int64)
+    sums = np.add.reduceat(values[order], starts, axis=0) if len(keys) else values[:0]
+    prefix = np.zeros((len(starts) + 1, values.shape[1]), dtype=values.dtype)
+    np.cumsum(sums, axis=0, out=prefix[1:])
+    return keys[starts], prefix, order[starts]
+
+def _day_limits(start_date, end_date):
+    low, high = date_bounds(start_date, end_date)
+    limit = (1 << DATE_BITS) - 1
+    return int(np.clip(low, 0, limit)), int(np.clip(high, 0, limit))
+
+def _bucket_range(keys, bases, start_date, end_date, shift=0):
+    """
+    Positions of the first and past-the-last buckets of each base key whose
+    game day (stored shift bits up) lies in the date range.
+    """
+    low, high = _day_limits(start_date, end_date)
+    lower = np.searchsorted(keys, bases | (low << shift), side='left')
+    upper = np.searchsorted(keys, bases | (high << shift) | ((1 << shift) - 1), side='right')
+    # An empty or reversed range selects nothing
+    return lower, np.maximum(upper, lower) if low <= high else lower
+
+def _round_half_away(values, digits):
+    # DuckDB's ROUND, which the SQL stats table uses
+    scale = 10 ** digits
+    return np.sign(values) * np.floor(np.abs(values) * scale + 0.5) / scale
+
+class DateRollup:
+    """
+    Prefix sums per passer and game date over the baseline plays.
+
+    Args:
+        passers: Passer names, indexed by store code
+        receivers: Receiver names, indexed by store code
+        passer_keys: Sorted (passer | game day | team) bucket keys
+        passer_prefix: Running METRICS totals, one more row than passer_keys
+        passer_seasons: Season of each passer bucket
+        teams: Team names, indexed by store code
+        receiver_keys: Sorted (passer | receiver | game day) bucket keys
+        receiver_prefix: Running PLAY_OUTCOMES counts, one more row than receiver_keys
+        rows: Size of the store the sums were built from
+    """
+
+    def __init__(self, passers, receivers, passer_keys, passer_prefix, passer_seasons, teams,
+                 receiver_keys, receiver_prefix, rows):
+        self.passers = list(passers)
+        self.receivers = list(receivers)
+        self.passer_keys = passer_keys
+        self.passer_prefix = passer_prefix
+        self.passer_seasons = passer_seasons
+        self.teams = list(teams)
+        self.receiver_keys = receiver_keys
+        self.receiver_prefix = receiver_prefix
+        self.rows = rows
+        self._passer_codes = {passer: code for code, passer in enumerate(self.passers)}
+
+    @classmethod
+    def from_index(cls, index):
+        """
+        Build the sums over the plays a LeagueIndex selects under BASELINE_FILTERS.
+
+        Args:
+            index: LeagueIndex over the league PlayStore
+
+        Returns:
+            DateRollup: Prefix sums over the index's store
+        """
+        store = index.store
+        columns, categories = store.columns, store.categories
+        rows = index.rows(index.select(**BASELINE_FILTERS))
+
+        passer = columns['passer'][rows].astype(np.int64)
+        day = columns['game_date'][rows].astype(np.int64)
+        # Teams are coded from 1 so a missing team (-1) keys as 0
+        team = columns['posteam'][rows].astype(np.int64) + 1
+        passer_keys, passer_prefix, first = _prefix_sums(
+            (passer << PASSER_SHIFT) | (day << TEAM_BITS) | team, _metric_matrix(columns, rows))
+        passer_seasons = columns['season'][rows][first]
+
+        receiver = columns['receiver'][rows].astype(np.int64)
+        targeted = receiver >= 0
+        outcomes = np.zeros((int(targeted.sum()), len(PLAY_OUTCOMES)), dtype=np.int64)
+        outcomes[np.arange(len(outcomes)), columns['outcome'][rows][targeted]] = 1
+        receiver_keys, receiver_prefix, _ = _prefix_sums(
+            (passer[targeted] << (RECEIVER_BITS + DATE_BITS)) | (receiver[targeted] << DATE_BITS) | day[targeted],
+            outcomes)
+
+        return cls(categories['passer'], categories['receiver'], passer_keys, passer_prefix, passer_seasons,
+                   categories['posteam'], receiver_keys, receiver_prefix, store.size)
+
+    def save(self, directory):
+        """
+        Persist the sums as .npy files so workers can memory-map them.
+        """
+        save_arrays(directory, {
+            'passer_keys': self.passer_keys,
+            'passer_prefix': self.passer_prefix,
+            'passer_seasons': self.passer_seasons,
+            'receiver_keys': self.receiver_keys,
+            'receiver_prefix': self.receiver_prefix,
+        }, {'passers': self.passers, 'receivers': self.receivers, 'teams': self.teams,
+            'metrics': METRICS, 'rows': self.rows})
+
+    @classmethod
+    def load(cls, directory, store, mmap=True):
+        """
+        Load sums written by save() over the same PlayStore.
+        """
+        arrays, meta = load_arrays(directory, mmap=mmap)
+        if meta['rows'] != store.size or meta['metrics'] != METRICS:
+            raise ValueError(f"Date rollup at {directory} does not match the store")
+        return cls(meta['passers'], meta['receivers'], arrays['passer_keys'], arrays['passer_prefix'],
+                   arrays['passer_seasons'], meta['teams'], arrays['receiver_keys'], arrays['receiver_prefix'],
+                   meta['rows'])
+
+    def passer_totals(self, start_date=None, end_date=None):
+        """
+        METRICS totals per passer over an inclusive date range.
+
+        Returns:
+            DataFrame: One row per passer with any baseline play in the range,
+                       indexed by passer name and sorted by it
+        """
+        bases = np.arange(len(self.passers), dtype=np.int64) << PASSER_SHIFT
+        lower, upper = _bucket_range(self.passer_keys, bases, start_date, end_date, shift=TEAM_BITS)
+        totals = np.asarray(self.passer_prefix[upper]) - np.asarray(self.passer_prefix[lower])
+
+        present = totals[:, METRICS.index('attempts')] > 0
+        return pd.DataFrame(totals[present], columns=METRICS,
+                            index=pd.Index(np.array(self.passers, dtype=object)[present], name='passer'))
+
+    def passer_splits(self, start_date=None, end_date=None):
+        """
+        METRICS totals per passer over an inclusive date range at every
+        split level: career, each season and each team.
+
+        Returns:
+            DataFrame: Player, split, Season and Team columns plus METRICS,
+                       ordered like pass_stats_splits' rows
+        """
+        career = self.passer_totals(start_date, end_date)
+        career = career.rename_axis('Player').reset_index().assign(split='career', Season=np.nan, Team=None)
+
+        # The buckets in range, summed per season and per team
+        low, high = _day_limits(start_date, end_date)
+        keys = np.asarray(self.passer_keys)
+        days = (keys >> TEAM_BITS) & ((1 << (PASSER_SHIFT - TEAM_BITS)) - 1)
+        positions = np.flatnonzero((days >= low) & (days <= high))
+        prefix = np.asarray(self.passer_prefix)
+        buckets = pd.DataFrame(prefix[positions + 1] - prefix[positions], columns=METRICS)
+        buckets['Player'] = np.array(self.passers, dtype=object)[keys[positions] >> PASSER_SHIFT]
+        buckets['Season'] = np.asarray(self.passer_seasons)[positions].astype(np.float64)
+        buckets['Team'] = np.array(self.teams + [None], dtype=object)[(keys[positions] & ((1 << TEAM_BITS) - 1)) - 1]
+
+        seasons = buckets.drop(columns='Team').groupby(['Player', 'Season'], as_index=False).sum()
+        teams = buckets.drop(columns='Season').groupby(['Player', 'Team'], as_index=False, dropna=False).sum()
+        splits = pd.concat([career, seasons.assign(split='season', Team=None),
+                            teams.assign(split='team', Season=np.nan)], ignore_index=True)
+        splits = splits.sort_values(['Player', 'split', 'Season', 'Team'], kind='stable', na_position='last')
+        return splits[['Player', 'split', 'Season', 'Team', *METRICS]].reset_index(drop=True)
+
+    def receiver_outcomes(self, passer, start_date=None, end_date=None):
+        """
+        Target counts per receiver and play outcome for one passer over an
+        inclusive date range.
+
+        Returns:
+            tuple: (receiver names, counts) where counts[i] holds receiver i's
+                   count for each of PLAY_OUTCOMES; receivers without a target
+                   in the range are left out
+        """
+        code = self._passer_codes.get(passer)
+        if code is None:
+            return [], np.zeros((0, len(PLAY_OUTCOMES)), dtype=np.int64)
+
+        shift = RECEIVER_BITS + DATE_BITS
+        first, last = np.searchsorted(self.receiver_keys, [code << shift, (code + 1) << shift])
+        receiver_codes = np.unique((np.asarray(self.receiver_keys[first:last]) >> DATE_BITS)
+                                   & ((1 << RECEIVER_BITS) - 1))
+
+        bases = (code << shift) | (receiver_codes << DATE_BITS)
+        lower, upper = _bucket_range(self.receiver_keys, bases, start_date, end_date)
+        counts = np.asarray(self.receiver_prefix[upper]) - np.asarray(self.receiver_prefix[lower])
+
+        targeted = counts.sum(axis=1) > 0
+        return [self.receivers[receiver] for receiver in receiver_codes[targeted]], counts[targeted]
+
+def pass_stats(totals):
+    """
+    Stats table rows from passer_splits, matching the columns and rounding
+    of pass_stats_splits.
+
+    Returns:
+        DataFrame: Player, split, Season, Team, depth shares, Avg EPA/Play,
+                   Completion % and Avg Air Yards
+    """
+    attempts = totals['attempts'].to_numpy()
+
+    def ratio(numerator, denominator):
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return np.where(denominator > 0, numerator / denominator, np.nan)
+
+    def depth_share(metric):
+        # Depth bins no play fell in are left blank, not zero
+        counts = totals[metric].to_numpy()
+        return np.where(counts > 0, _round_half_away(ratio(counts, attempts), 3), np.nan)
+
+    return pd.DataFrame({
+        'Player': totals['Player'].to_numpy(),
+        'split': totals['split'].to_numpy(),
+        'Season': totals['Season'].to_numpy(),
+        'Team': totals['Team'].to_numpy(),
+        '% of Short Passes': depth_share('depth_0_10'),
+        '% of Intermediate Passes': depth_share('depth_10_20'),
+        '% of Deep Passes': depth_share('depth_20_plus'),
+        'Avg EPA/Play': ratio(totals['epa_sum'].to_numpy(), totals['epa_count'].to_numpy()),
+        'Completion %': ratio(totals['completions'].to_numpy(), totals['completion_count'].to_numpy()),
+        'Avg Air Yards': ratio(totals['air_yards_sum'].to_numpy(), totals['air_yards_count'].to_numpy()),
+    })
+
+def playclock_shares(totals):
+    """
+    Play clock distributions from passer_totals, as aggregate_playclock
+    returns them.
+
+    Returns:
+        tuple: (passers, shares, sample_shares)
+    """
+    counts = totals[PLAYCLOCK_METRICS].to_numpy()
+    counted = counts.sum(axis=1) > 0
+    counts = counts[counted]
+    shares = counts / np.maximum(counts.sum(axis=1, keepdims=True), 1)
+    sample_shares = counts.sum(axis=0) / max(counts.sum(), 1)
+    return list(totals.index[counted]), shares, sample_shares
+
+def rose_frame(receivers, counts, top_k=8):
+    """
+    Rose plot rows from receiver_outcomes, ranked and folded as rose_counts
+    does: receivers by targets (ties alphabetically), everyone past top_k
+    in one 'Other' slice, every outcome zero-filled.
+
+    Returns:
+        DataFrame: Receiver, Play Outcome and Frequency columns
+    """
+    if not receivers:
+        return pd.DataFrame(columns=['Receiver', 'Play Outcome', 'Frequency'])
+
+    ranked = sorted(range(len(receivers)), key=lambda position: (-counts[position].sum(), receivers[position]))
+    slices = [(receivers[position], counts[position]) for position in ranked[:top_k]]
+    if len(ranked) > top_k:
+        slices.append((OTHER, counts[ranked[top_k:]].sum(axis=0)))
+
+    return pd.DataFrame({
+        'Receiver': [receiver for receiver, _ in slices for _ in PLAY_OUTCOMES],
+        'Play Outcome': [outcome for _ in slices for outcome in PLAY_OUTCOMES],
+        'Frequency': np.concatenate([slice_counts for _, slice_counts in slices]).astype(np.int64),
+    })
@@ -237,6 +237,36 @@ def draw_plotly_field(fig, margins=0, show_axis=False, show_title=False,
     
     return fig
 
+def field_outline_shapes(xref='x', yref='y'):
+    """
+    Shapes of a simplified field (turf, end zones and 10-yard lines), for
+    small multiples where the full markings would be clutter.
+
+    Args:
+        xref: X axis the shapes are drawn against ('x', 'x2', ...)
+        yref: Y axis the shapes are drawn against
+
+    Returns:
+        list: Shape dicts for layout.shapes
+    """
+    field_length_ft = 120 * 3
+    field_width_ft = 53.33 * 3
+    end_zone_length = 10 * 3
+
+    def shape(**kwargs):
+        return dict(xref=xref, yref=yref, layer='below', **kwargs)
+
+    shapes = [shape(type='rect', x0=0, y0=0, x1=field_length_ft, y1=field_width_ft,
+                    line=dict(color='white', width=2), fillcolor='#228B22')]
+    for x0 in (0, field_length_ft - end_zone_length):
+        shapes.append(shape(type='rect', x0=x0, y0=0, x1=x0 + end_zone_length, y1=field_width_ft,
+                            line=dict(color='white', width=2), fillcolor='#006400'))
+    for yards in range(10, 100, 10):
+        x_pos = end_zone_length + yards * 3
+        shapes.append(shape(type='line', x0=x_pos, y0=0, x1=x_pos, y1=field_width_ft,
+                            line=dict(color='white', width=1)))
+    return shapes
+
 def add_field_heatmap(fig, x_data, y_data, colorscale='Viridis', 
                      showscale=True, opacity=0.7):
     """
@@ -264,8 +294,94 @@ def add_field_heatmap(fig, x_data, y_data, colorscale='Viridis',
     
     return fig
 
+# Point counts at which scatter traces switch to WebGL, and above which
+# they are thinned by density
+SCATTERGL_MIN_POINTS = 5000
+MAX_FIELD_POINTS = 30000
+
+def thin_by_density(x_data, y_data, max_points, bins=(60, 27), seed=0):
+    """
+    Pick at most max_points points, thinning dense areas first.
+
+    Every grid cell keeps up to the same number of points, the largest cap
+    that fits the budget, so sparse areas keep every point while the
+    crowded middle of the field is sampled down. Points within a cell are
+    chosen at random with a fixed seed, so the same data always thins the
+    same way.
+
+    Args:
+        x_data: X coordinates in feet
+        y_data: Y coordinates in feet
+        max_points: Point budget
+        bins: Grid cells along the field's length and width
+        seed: Seed for the order points are kept in
+
+    Returns:
+        np.ndarray: Sorted indices of the points to keep
+    """
+    x = np.asarray(x_data, dtype=float)
+    y = np.asarray(y_data, dtype=float)
+    n = len(x)
+    if n <= max_points:
+        return np.arange(n)
+
+    # Missing or negative coordinates share one extra cell (truncating
+    # would fold them into the first cell)
+    outside = np.isnan(x) | np.isnan(y) | (x < 0) | (y < 0)
+    column = np.clip(np.floor(np.where(outside, 0, x) / 360 * bins[0]).astype(int), 0, bins[0] - 1)
+    row = np.clip(np.floor(np.where(outside, 0, y) / 160 * bins[1]).astype(int), 0, bins[1] - 1)
+    cell = np.where(outside, bins[0] * bins[1], row * bins[0] + column)
+
+    counts = np.bincount(cell, minlength=bins[0] * bins[1] + 1)
+    low, high = 0, int(counts.max())
+    while low < high:
+        cap = (low + high + 1) // 2
+        if np.minimum(counts, cap).sum() <= max_points:
+            low = cap
+        else:
+            high = cap - 1
+
+    # Rank of each point within its cell, in a shuffled order
+    order = np.random.default_rng(seed).permutation(n)
+    order = order[np.argsort(cell[order], kind='stable')]
+    starts = np.concatenate([[0], np.cumsum(counts)[:-1]])
+    rank = np.arange(n) - starts[cell[order]]
+    return np.sort(order[rank < low])
+
+def field_scatter_trace(x_data, y_data, customdata=None, gl_threshold=SCATTERGL_MIN_POINTS,
+                        max_points=MAX_FIELD_POINTS, **kwargs):
+    """
+    Build a scatter trace for points on the field, sized to stay responsive.
+
+    Above gl_threshold points the trace is drawn with WebGL (Scattergl)
+    instead of SVG markers; above max_points it is thinned with
+    thin_by_density first.
+
+    Args:
+        x_data: X coordinates in feet
+        y_data: Y coordinates in feet
+        customdata: Per-point data, thinned along with the coordinates
+        gl_threshold: Point count from which Scattergl is used (0 disables)
+        max_points: Point budget (0 disables thinning)
+        **kwargs: Other trace properties (marker, name, hoverinfo, ...)
+
+    Returns:
+        go.Scatter or go.Scattergl: The trace
+    """
+    x = np.asarray(x_data, dtype=float)
+    y = np.asarray(y_data, dtype=float)
+    if max_points and len(x) > max_points:
+        keep = thin_by_density(x, y, max_points)
+        x, y = x[keep], y[keep]
+        if customdata is not None:
+            customdata = np.asarray(customdata)[keep]
+
+    trace_type = go.Scattergl if gl_threshold and len(x) >= gl_threshold else go.Scatter
+    return trace_type(x=x, y=y, customdata=customdata, **kwargs)
+
 def add_field_scatter(fig, x_data, y_data, color='red', size=5, 
-                     name='Data Points', hoverinfo='none'):
+                     name='Data Points', hoverinfo='none',
+                     gl_threshold=SCATTERGL_MIN_POINTS, max_points=MAX_FIELD_POINTS):
     """
     Add scatter points to the football field.
     
@@ -277,12 +393,16 @@ def add_field_scatter(fig, x_data, y_data, color='red', size=5,
         size: Size of scatter points
         name: Name for legend
         hoverinfo: Hover information
+        gl_threshold: Point count from which WebGL is used (0 disables)
+        max_points: Point budget before thinning by density (0 disables)
     """
     
     # Add scatter trace
-    fig.add_trace(go.Scatter(
-        x=x_data,
-        y=y_data,
+    fig.add_trace(field_scatter_trace(
+        x_data,
+        y_data,
+        gl_threshold=gl_threshold,
+        max_points=max_points,
         mode='markers',
         marker=dict(
             color=color,
@@ -293,4 +413,4 @@ def add_field_scatter(fig, x_data, y_data, color='red', size=5,
         hoverinfo=hoverinfo
     ))
     
-    return fig 
\ No newline at end of file
+    return fig
@@ -0,0 +1,220 @@
+"""
+NFL QB Passing Tendencies Dashboard - Field Heatmap Tiers
+
+This module bins pass locations into density grids for the field figure. A
+large selection is drawn in tiers: a coarse grid the first response can
+carry in a few hundred bytes, then a fine contour grid with the individual
+points on top. Both grids are binned here, over the whole field, so the
+browser only colours cells instead of binning every point itself. Massive
+selections skip the points and get a raster instead: one PNG, one pixel
+per square foot, whose size doesn't depend on the number of throws.
+"""
+
+import base64
+import re
+import struct
+import zlib
+
+import numpy as np
+import plotly.graph_objects as go
+
+# Field extent in feet (see drawPlotlyField): 120 yards by 53.33 yards
+FIELD_LENGTH_FT = 360
+FIELD_WIDTH_FT = 160
+
+# Cells along (length, width): 30 x 20 ft coarse cells, 12 x 10 ft fine cells
+COARSE_BINS = (12, 8)
+FINE_BINS = (30, 16)
+
+# Raster pixels along (length, width): one per square foot
+RASTER_SIZE = (FIELD_LENGTH_FT, FIELD_WIDTH_FT)
+
+DENSITY_COLORSCALE = [
+    [0, 'rgba(255, 255, 255, 0)'],      # Transparent for low density
+    [0.2, 'rgba(255, 204, 102, 0.3)'],  # Light orange
+    [0.4, 'rgba(255, 153, 51, 0.5)'],   # Medium orange
+    [0.6, 'rgba(255, 102, 0, 0.7)'],    # Dark orange
+    [0.8, 'rgba(204, 51, 0, 0.8)'],     # Red-orange
+    [1.0, 'rgba(153, 0, 0, 0.9)']       # Dark red
+]
+
+def field_coordinates(location_x, location_y):
+    """
+    Convert pass locations from yards to field feet.
+
+    Args:
+        location_x: Yard line positions (0-100)
+        location_y: Sideline positions in yards
+
+    Returns:
+        tuple: (x, y) float arrays in feet; x includes the 30 ft end zone
+    """
+    x = 30 + np.asarray(location_x, dtype=float) * 3
+    y = np.asarray(location_y, dtype=float) * 3
+    return x, y
+
+def density_grid(x, y, bins):
+    """
+    Count points per cell of a grid over the whole field.
+
+    Args:
+        x: X coordinates in feet
+        y: Y coordinates in feet
+        bins: (cells along the length, cells along the width)
+
+    Returns:
+        tuple: (x cell centres, y cell centres, counts shaped (width, length))
+    """
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    # Points off the field (or missing) are dropped; like np.histogram2d,
+    # the far edges belong to the last cells
+    inside = (x >= 0) & (x <= FIELD_LENGTH_FT) & (y >= 0) & (y <= FIELD_WIDTH_FT)
+    columns = np.minimum((x[inside] * (bins[0] / FIELD_LENGTH_FT)).astype(np.int64), bins[0] - 1)
+    rows = np.minimum((y[inside] * (bins[1] / FIELD_WIDTH_FT)).astype(np.int64), bins[1] - 1)
+    counts = np.bincount(rows * bins[0] + columns, minlength=bins[0] * bins[1])
+
+    return (*grid_centres(bins), counts.reshape(bins[1], bins[0]).astype(np.int32))
+
+def grid_centres(bins):
+    """
+    Cell centres of a grid over the whole field.
+
+    Returns:
+        tuple: (x centres, y centres) in feet
+    """
+    x_edges = np.linspace(0, FIELD_LENGTH_FT, bins[0] + 1)
+    y_edges = np.linspace(0, FIELD_WIDTH_FT, bins[1] + 1)
+    return (x_edges[:-1] + x_edges[1:]) / 2, (y_edges[:-1] + y_edges[1:]) / 2
+
+def coarse_trace(x, y):
+    """
+    Blocky heatmap of the coarse grid, the first tier of a large selection.
+    """
+    x_centres, y_centres, counts = density_grid(x, y, COARSE_BINS)
+    return go.Heatmap(
+        x=x_centres,
+        y=y_centres,
+        z=counts,
+        zmin=0,
+        colorscale=DENSITY_COLORSCALE,
+        showscale=False,
+        hoverinfo='skip',
+        opacity=0.8
+    )
+
+def fine_trace(x, y):
+    """
+    Filled density contours of the fine grid, styled like the contour the
+    browser used to bin from the points.
+    """
+    return density_contour(*density_grid(x, y, FINE_BINS))
+
+def density_contour(x_centres, y_centres, counts):
+    """
+    Filled contour trace of an already binned grid (see density_grid).
+    """
+    return go.Contour(
+        x=x_centres,
+        y=y_centres,
+        z=counts,
+        colorscale=DENSITY_COLORSCALE,
+        showscale=False,
+        line=dict(width=1, color='rgba(255,255,255,0.8)'),
+        hoverinfo='skip',
+        contours=dict(
+            coloring='fill',
+            showlines=True,
+            start=1,
+            end=None,
+            size=2
+        ),
+        opacity=0.8
+    )
+
+def _colour_table(colorscale, levels=256):
+    # RGBA lookup table interpolated from a plotly colorscale of rgba() strings
+    stops = np.array([stop for stop, _ in colorscale])
+    colours = np.array([[float(part) for part in re.findall(r'[\d.]+', colour)] for _, colour in colorscale])
+    colours[:, 3] *= 255
+    positions = np.linspace(0, 1, levels)
+    table = np.stack([np.interp(positions, stops, colours[:, channel]) for channel in range(4)], axis=1)
+    return np.round(table).astype(np.uint8)
+
+def encode_png(rgba):
+    """
+    Encode an RGBA image as PNG bytes.
+
+    Args:
+        rgba: uint8 array shaped (height, width, 4), top row first
+
+    Returns:
+        bytes: PNG file contents
+    """
+    height, width, _ = rgba.shape
+    # Every scanline starts with filter type 0 (none)
+    scanlines = np.hstack([np.zeros((height, 1), dtype=np.uint8),
+                           np.ascontiguousarray(rgba, dtype=np.uint8).reshape(height, width * 4)])
+
+    def chunk(tag, data):
+        return (struct.pack('>I', len(data)) + tag + data
+                + struct.pack('>I', zlib.crc32(tag + data) & 0xffffffff))
+
+    return (b'\x89PNG\r\n\x1a\n'
+            + chunk(b'IHDR', struct.pack('>IIBBBBB', width, height, 8, 6, 0, 0, 0))
+            + chunk(b'IDAT', zlib.compress(scanlines.tobytes(), 6))
+            + chunk(b'IEND', b''))
+
+def raster_image(x, y, size=RASTER_SIZE, colorscale=DENSITY_COLORSCALE):
+    """
+    Rasterize pass locations into a PNG layout image covering the field.
+
+    Counts per pixel are scaled logarithmically against the busiest pixel
+    and coloured with the density colorscale; empty pixels are transparent.
+
+    Args:
+        x: X coordinates in feet
+        y: Y coordinates in feet
+        size: (width, height) in pixels
+        colorscale: Plotly colorscale of rgba() strings
+
+    Returns:
+        dict: layout.images entry with the PNG as a data URI
+    """
+    _, _, counts = density_grid(x, y, size)
+    peak = counts.max()
+    levels = np.zeros(counts.shape, dtype=np.int64)
+    if peak > 0:
+        levels = np.round(np.log1p(counts) / np.log1p(peak) * 255).astype(np.int64)
+    rgba = _colour_table(colorscale)[levels]
+    rgba[counts == 0] = 0
+    # Images are stored top row first; the field's y axis points up
+    png = encode_png(rgba[::-1])
+    return dict(
+        source='data:image/png;base64,' + base64.b64encode(png).decode('ascii'),
+        xref='x', yref='y',
+        x=0, y=FIELD_WIDTH_FT,
+        sizex=FIELD_LENGTH_FT, sizey=FIELD_WIDTH_FT,
+        xanchor='left', yanchor='top',
+        sizing='stretch',
+        # Above the field's shapes, which are opaque and drawn below
+        # traces, like the contour tiers; annotations stay on top
+        layer='above',
+        opacity=0.8
+    )
+
+def figure_tier(figure):
+    """
+    Tier a field figure was drawn at ('coarse', 'full', 'raster'), or None for
+    figures without one (the empty field).
+
+    Args:
+        figure: go.Figure or figure dict
+    """
+    if isinstance(figure, go.Figure):
+        meta = figure.layout.meta
+    elif isinstance(figure, dict):
+        meta = (figure.get('layout') or {}).get('meta')
+    else:
+        return None
+    return meta.get('tier') if isinstance(meta, dict) else None
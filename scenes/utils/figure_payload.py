@@ -0,0 +1,285 @@
+"""
+NFL QB Passing Tendencies Dashboard - Figure Payloads
+
+This module turns the figures our callbacks return into compact JSON-ready
+dicts before they are sent to the browser: numbers are rounded to display
+precision, numeric arrays are sent as base64 typed arrays when the bundled
+plotly.js understands them, customdata columns no template refers to are
+dropped, and figures over a size budget have their point traces thinned.
+Response sizes are tallied per callback.
+"""
+
+import base64
+import functools
+import os
+import re
+import threading
+
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+
+from .result_cache import Uncached, to_json, uncached
+
+# plotly.js learned to decode {dtype, bdata} typed arrays in 2.28.0
+TYPED_ARRAY_MIN_VERSION = (2, 28, 0)
+
+# Traces shorter than this are never thinned
+MIN_THINNED_POINTS = 500
+
+# Trace types whose arrays are points that can be sampled without re-binning
+POINT_TRACES = {'scatter', 'scattergl', 'scatterpolar', 'scatterpolargl'}
+
+CUSTOMDATA_REFERENCE = re.compile(r'customdata\[(\d+)\]')
+
+def bundled_plotlyjs_version():
+    """
+    Version of the plotly.js bundle Dash serves, or None if it can't be read.
+    """
+    try:
+        import dash
+        path = os.path.join(os.path.dirname(dash.__file__), 'dcc', 'plotly.min.js')
+        with open(path) as f:
+            header = f.read(200)
+        match = re.search(r'plotly\.js v(\d+)\.(\d+)\.(\d+)', header)
+        return tuple(int(part) for part in match.groups()) if match else None
+    except OSError:
+        return None
+
+def typed_arrays_supported():
+    version = bundled_plotlyjs_version()
+    return version is not None and version >= TYPED_ARRAY_MIN_VERSION
+
+def _numeric(values):
+    """
+    Return values as a numeric ndarray, or None if they aren't numeric.
+    """
+    if isinstance(values, (str, bytes, dict)) or not hasattr(values, '__len__') or len(values) == 0:
+        return None
+    array = np.asarray(values)
+    if array.dtype.kind not in 'iuf':
+        return None
+    return array
+
+def _encode_array(array, precision, typed_arrays):
+    if array.dtype.kind == 'f':
+        array = np.round(array, precision)
+    if not typed_arrays or array.ndim != 1 or (array.dtype.kind == 'f' and np.isnan(array).any()):
+        # JSON has no NaN, so arrays with gaps stay as lists (NaN -> null)
+        return [None if value != value else value for value in array.tolist()]
+
+    if array.dtype.kind == 'f':
+        array = array.astype(np.float32 if precision <= 4 else np.float64)
+    elif array.dtype.itemsize > 4 or array.dtype.kind == 'u' and array.dtype.itemsize == 4:
+        array = array.astype(np.int32)
+    return {'dtype': array.dtype.str.lstrip('<|='), 'bdata': base64.b64encode(array.tobytes()).decode('ascii')}
+
+def _compact_column(values, precision):
+    series = pd.Series(values).infer_objects()
+    if pd.api.types.is_datetime64_any_dtype(series):
+        return series.dt.strftime('%Y-%m-%d').tolist()
+    if pd.api.types.is_integer_dtype(series):
+        return series.tolist()
+    if pd.api.types.is_numeric_dtype(series) and not pd.api.types.is_bool_dtype(series):
+        return [None if value != value else value for value in series.astype(float).round(precision).tolist()]
+    return series.where(series.notna(), None).tolist()
+
+def _templates(trace):
+    templates = [trace.get('hovertemplate'), trace.get('texttemplate')]
+    return [template for template in templates if isinstance(template, str)]
+
+def prune_customdata(trace, precision):
+    """
+    Keep only the customdata columns a hover or text template refers to,
+    renumbering the template references to match. One-dimensional
+    customdata (e.g. play ids) is kept whole.
+
+    Args:
+        trace: Trace dict, modified in place
+        precision: Decimal places for numeric columns
+    """
+    if 'customdata' not in trace or trace['customdata'] is None:
+        return
+    customdata = np.asarray(trace['customdata'], dtype=object)
+    if customdata.ndim == 1:
+        # A single column is an id for callbacks to read back, not hover text
+        trace['customdata'] = _compact_column(customdata, precision)
+        return
+    if customdata.ndim != 2:
+        return
+
+    used = sorted({int(index) for template in _templates(trace)
+                   for index in CUSTOMDATA_REFERENCE.findall(template)})
+    used = [index for index in used if index < customdata.shape[1]]
+    if not used:
+        del trace['customdata']
+        return
+
+    renumber = {old: new for new, old in enumerate(used)}
+    for key in ('hovertemplate', 'texttemplate'):
+        if isinstance(trace.get(key), str):
+            trace[key] = CUSTOMDATA_REFERENCE.sub(
+                lambda match: 'customdata[%d]' % renumber[int(match.group(1))], trace[key])
+
+    columns = [_compact_column(customdata[:, index], precision) for index in used]
+    trace['customdata'] = [list(row) for row in zip(*columns)]
+
+def _compact_arrays(node, precision, typed_arrays):
+    for key, value in node.items():
+        if isinstance(value, dict):
+            _compact_arrays(value, precision, typed_arrays)
+            continue
+        if key == 'customdata':
+            continue
+        array = _numeric(value)
+        if array is not None:
+            node[key] = _encode_array(array, precision, typed_arrays)
+
+def _point_arrays(node, n):
+    # Every per-point array in a trace, including nested marker/line arrays
+    for key, value in node.items():
+        if isinstance(value, dict):
+            yield from _point_arrays(value, n)
+        elif not isinstance(value, str) and hasattr(value, '__len__') and len(value) == n:
+            yield node, key
+
+def thin_trace(trace, keep_fraction):
+    """
+    Keep an evenly spaced fraction of a trace's points.
+
+    Args:
+        trace: Trace dict, modified in place
+        keep_fraction: Fraction of points to keep (0-1)
+
+    Returns:
+        bool: Whether the trace was thinned
+    """
+    x = trace.get('x')
+    if x is None or isinstance(x, (str, dict)) or len(x) < MIN_THINNED_POINTS:
+        return False
+    n = len(x)
+    keep = max(int(n * keep_fraction), MIN_THINNED_POINTS)
+    if keep >= n:
+        return False
+
+    rows = np.unique(np.linspace(0, n - 1, keep).astype(int))
+    for node, key in list(_point_arrays(trace, n)):
+        value = node[key]
+        node[key] = [value[i] for i in rows] if isinstance(value, list) else np.asarray(value)[rows]
+    return True
+
+def _downsample(figure, size, budget):
+    # Thin sampled point traces first, then anything else with per-point
+    # arrays (e.g. client-side histograms), until the figure fits
+    thinned = False
+    for trace_types in (POINT_TRACES, None):
+        if size <= budget:
+            break
+        keep_fraction = budget / size * 0.9
+        for trace in figure['data']:
+            if trace_types is None or trace.get('type', 'scatter') in trace_types:
+                thinned |= thin_trace(trace, keep_fraction)
+        size = len(to_json(figure))
+    return thinned
+
+class PayloadStats:
+    """
+    Thread-safe per-callback tally of figure response sizes.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stats = {}
+        # A fork can happen while another thread holds the lock
+        os.register_at_fork(after_in_child=self._after_fork)
+
+    def _after_fork(self):
+        self._lock = threading.Lock()
+
+    def record(self, name, size, downsampled=False):
+        with self._lock:
+            stats = self._stats.setdefault(name, {'responses': 0, 'bytes_total': 0, 'bytes_max': 0,
+                                                  'bytes_last': 0, 'downsampled': 0})
+            stats['responses'] += 1
+            stats['bytes_total'] += size
+            stats['bytes_max'] = max(stats['bytes_max'], size)
+            stats['bytes_last'] = size
+            stats['downsampled'] += int(downsampled)
+
+    def snapshot(self):
+        with self._lock:
+            return {name: dict(stats, bytes_mean=stats['bytes_total'] // max(stats['responses'], 1))
+                    for name, stats in self._stats.items()}
+
+class FigureCompactor:
+    """
+    Serializes callback figures compactly and enforces a size budget.
+
+    Args:
+        precision: Decimal places numbers are rounded to
+        budget_bytes: Per-figure JSON size above which point traces are
+                      thinned (0 disables)
+        typed_arrays: Send numeric arrays as base64 typed arrays; None
+                      detects support in the bundled plotly.js
+    """
+
+    def __init__(self, precision=3, budget_bytes=0, typed_arrays=None):
+        self.precision = precision
+        self.budget_bytes = budget_bytes
+        self.typed_arrays = typed_arrays_supported() if typed_arrays is None else typed_arrays
+        self.stats = PayloadStats()
+
+    def compact(self, figure):
+        """
+        Convert a figure to a compact dict.
+
+        Returns:
+            tuple: (figure dict, JSON size in bytes, whether it was thinned)
+        """
+        if isinstance(figure, go.Figure):
+            figure = figure.to_plotly_json()
+        figure = {'data': [dict(trace) for trace in figure.get('data', [])],
+                  'layout': figure.get('layout', {})}
+
+        for trace in figure['data']:
+            prune_customdata(trace, self.precision)
+
+        # Size the figure with plain lists to decide on thinning
+        thinned = False
+        if self.budget_bytes:
+            for trace in figure['data']:
+                _compact_arrays(trace, self.precision, False)
+            size = len(to_json(figure))
+            if size > self.budget_bytes:
+                thinned = _downsample(figure, size, self.budget_bytes)
+
+        for trace in figure['data']:
+            _compact_arrays(trace, self.precision, self.typed_arrays)
+        return figure, len(to_json(figure)), thinned
+
+    def compact_outputs(self, name):
+        """
+        Decorator compacting every figure a callback returns (one, or a
+        tuple of outputs) and recording their sizes under name.
+        """
+        def decorator(function):
+            @functools.wraps(function)
+            def wrapper(*args, **kwargs):
+                outputs = function(*args, **kwargs)
+                if isinstance(outputs, Uncached):
+                    # Fallbacks are compacted too, and stay marked for memoize
+                    return uncached(compact_all(outputs.value))
+                return compact_all(outputs)
+
+            def compact_all(outputs):
+                multiple = isinstance(outputs, (tuple, list))
+                compacted = []
+                for position, output in enumerate(outputs if multiple else [outputs]):
+                    if isinstance(output, go.Figure) or isinstance(output, dict) and 'data' in output:
+                        output, size, thinned = self.compact(output)
+                        label = f'{name}[{position}]' if multiple else name
+                        self.stats.record(label, size, thinned)
+                    compacted.append(output)
+                return compacted if multiple else compacted[0]
+            return wrapper
+        return decorator
@@ -0,0 +1,196 @@
+"""
+NFL QB Passing Tendencies Dashboard - HTTP Response Caching
+
+This module post-processes every response the Flask server sends. Large
+text and JSON bodies (callback figures, the layout, Dash's JS bundles) are
+compressed with brotli or gzip, whichever the client prefers. Responses that
+only change when the code or the database does get a weak ETag derived from
+the data version and a Cache-Control policy, so browsers and proxies can
+revalidate them with a bodiless 304 instead of downloading them again.
+"""
+
+import gzip
+import hashlib
+import threading
+from collections import OrderedDict
+
+from flask import request
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Response classes, by request path
+CALLBACK, LAYOUT, ASSET, COMPONENT, PAGE, OTHER = 'callback', 'layout', 'asset', 'component', 'page', 'other'
+
+COMPRESSIBLE_TYPES = ('text/', 'application/json', 'application/javascript', 'image/svg+xml')
+
+def classify(path, prefix='/'):
+    """
+    Response class of a request path under the Dash prefix.
+
+    Args:
+        path: Request path
+        prefix: Dash's routes_pathname_prefix
+
+    Returns:
+        str: CALLBACK, LAYOUT, ASSET, COMPONENT, PAGE or OTHER
+    """
+    if not path.startswith(prefix):
+        return OTHER
+    route = path[len(prefix):]
+    if route == '_dash-update-component':
+        return CALLBACK
+    if route in ('_dash-layout', '_dash-dependencies'):
+        return LAYOUT
+    if route.startswith('assets/'):
+        return ASSET
+    if route.startswith('_dash-component-suites/'):
+        return COMPONENT
+    if route.startswith('_') or route in ('health', 'ready', 'popularity', 'payloads', 'compression'):
+        return OTHER
+    return PAGE
+
+class ResponseOptimizer:
+    """
+    Compresses responses and adds version-keyed validators.
+
+    Args:
+        version: Callable returning the current data version
+        min_size: Bodies smaller than this many bytes are sent as is
+        level: gzip compression level (brotli uses its own quality 5)
+        asset_max_age: Seconds browsers may reuse assets/ files without
+                       revalidating
+        cache_entries: Compressed static bodies kept in memory
+        enabled: Compress responses (validators are always added)
+    """
+
+    def __init__(self, version, min_size=1024, level=6, asset_max_age=3600, cache_entries=64, enabled=True):
+        self.version = version
+        self.min_size = min_size
+        self.level = level
+        self.asset_max_age = asset_max_age
+        self.cache_entries = cache_entries
+        self.enabled = enabled
+        self.prefix = '/'
+        self._lock = threading.Lock()
+        self._compressed = OrderedDict()
+        self._stats = {}
+
+    def init_app(self, app, prefix='/'):
+        """
+        Register on a Flask app.
+
+        Args:
+            app: Flask server
+            prefix: Dash's routes_pathname_prefix
+        """
+        self.prefix = prefix
+        app.after_request(self.process)
+
+    def encoding(self):
+        """
+        Best content encoding the current request accepts, or None.
+        """
+        accepted = request.accept_encodings
+        if brotli is not None and accepted['br']:
+            return 'br'
+        if accepted['gzip']:
+            return 'gzip'
+        return None
+
+    def compress(self, data, encoding):
+        if encoding == 'br':
+            return brotli.compress(data, quality=5)
+        return gzip.compress(data, compresslevel=self.level, mtime=0)
+
+    def _cached_compress(self, key, data, encoding):
+        # Static bodies (JS bundles, assets, the layout) are compressed once
+        with self._lock:
+            if key in self._compressed:
+                self._compressed.move_to_end(key)
+                return self._compressed[key]
+        compressed = self.compress(data, encoding)
+        with self._lock:
+            self._compressed[key] = compressed
+            while len(self._compressed) > self.cache_entries:
+                self._compressed.popitem(last=False)
+        return compressed
+
+    def _record(self, kind, raw, sent, not_modified=False):
+        with self._lock:
+            stats = self._stats.setdefault(kind, {'responses': 0, 'not_modified': 0,
+                                                  'bytes_raw': 0, 'bytes_sent': 0})
+            stats['responses'] += 1
+            stats['not_modified'] += int(not_modified)
+            stats['bytes_raw'] += raw
+            stats['bytes_sent'] += sent
+
+    def stats(self):
+        """
+        Bytes before and after compression per response class for this
+        worker, with 304s counted as fully saved.
+        """
+        with self._lock:
+            return {kind: dict(stats, bytes_saved=stats['bytes_raw'] - stats['bytes_sent'])
+                    for kind, stats in self._stats.items()}
+
+    def _validate(self, response, kind, data):
+        # Weak ETag: the same entity whatever encoding it is sent in
+        version = self.version() or 'none'
+        digest = hashlib.sha1(data).hexdigest()[:16]
+        response.set_etag(f'{version}-{digest}', weak=True)
+        if kind == ASSET:
+            response.cache_control.no_cache = None
+            response.cache_control.public = True
+            response.cache_control.max_age = self.asset_max_age
+        else:
+            response.cache_control.no_cache = True
+
+        if request.if_none_match.contains_weak(response.get_etag()[0]):
+            response.status_code = 304
+            response.set_data(b'')
+            response.headers.pop('Content-Length', None)
+            return True
+        return False
+
+    def process(self, response):
+        """
+        after_request hook: add validators, answer conditional requests
+        and compress the body.
+        """
+        kind = classify(request.path, self.prefix)
+        if kind == OTHER or response.status_code != 200 or 'Content-Encoding' in response.headers:
+            return response
+
+        if response.direct_passthrough:
+            # send_from_directory streams assets/ files; read them to hash
+            # and compress
+            response.direct_passthrough = False
+        data = response.get_data()
+
+        # Fingerprinted Dash bundles are already cached for a year
+        if request.method == 'GET' and kind != COMPONENT:
+            if self._validate(response, kind, data):
+                self._record(kind, len(data), 0, not_modified=True)
+                return response
+
+        compressible = (response.mimetype or '').startswith(COMPRESSIBLE_TYPES)
+        if compressible:
+            response.vary.add('Accept-Encoding')
+        encoding = self.encoding() if self.enabled and compressible and len(data) >= self.min_size else None
+        if encoding is None:
+            self._record(kind, len(data), len(data))
+            return response
+
+        if kind == CALLBACK:
+            compressed = self.compress(data, encoding)
+        else:
+            key = (request.path, response.get_etag()[0] or hashlib.sha1(data).hexdigest(), encoding)
+            compressed = self._cached_compress(key, data, encoding)
+
+        response.set_data(compressed)
+        response.headers['Content-Encoding'] = encoding
+        self._record(kind, len(data), len(compressed))
+        return response
@@ -0,0 +1,355 @@
+"""
+NFL QB Passing Tendencies Dashboard - Popularity Tracking and Cache Warming
+
+This module counts how often each callback is asked for each QB and filter
+combination, in a local SQLite file shared by every worker, and replays the
+most requested combinations in a background thread so their results are
+already in the result cache when someone asks for them. Warming runs at
+startup and again whenever the data version changes, and backs off while
+any worker is handling requests.
+"""
+
+import atexit
+import functools
+import json
+import os
+import sqlite3
+import threading
+import time
+from contextlib import closing
+
+from flask import request
+
+from .result_cache import normalize_arguments, to_json
+
+# A worker's in-flight count older than this is assumed left by a dead worker
+STALE_ACTIVITY_SECONDS = 600
+
+class PopularityTracker:
+    """
+    Request counts per callback and argument combination.
+
+    Counts are buffered in memory and added to the SQLite file every
+    flush_interval seconds, so tracking costs a dict update per request.
+
+    Args:
+        path: SQLite file location
+        flush_interval: Seconds between writes of the buffered counts
+        max_entries: Combinations kept; the least requested are dropped
+    """
+
+    def __init__(self, path, flush_interval=30, max_entries=10000):
+        self.path = path
+        self.flush_interval = flush_interval
+        self.max_entries = max_entries
+        self.functions = {}
+        self._lock = threading.Lock()
+        self._pending = {}
+        self._last_flush = time.monotonic()
+        self._active = 0
+        self._last_request = 0.0
+        self._requests = 0
+        self._local = threading.local()
+        # Forked children (server workers, background jobs) start with their
+        # own lock and count only their own requests
+        os.register_at_fork(after_in_child=self._after_fork)
+
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        with self._connect() as connection, connection:
+            connection.execute("""
+                CREATE TABLE IF NOT EXISTS popularity (
+                    name TEXT,
+                    arguments TEXT,
+                    count INTEGER,
+                    last_seen REAL,
+                    PRIMARY KEY (name, arguments)
+                )
+            """)
+            # Requests in flight and the last request seen, per worker
+            connection.execute("""
+                CREATE TABLE IF NOT EXISTS activity (
+                    pid INTEGER PRIMARY KEY,
+                    active INTEGER,
+                    last_request REAL
+                )
+            """)
+        atexit.register(self.flush)
+
+    def _after_fork(self):
+        self._lock = threading.Lock()
+        self._pending = {}
+        self._active = 0
+        self._requests = 0
+
+    def _connect(self):
+        # Short-lived connections: counts are written rarely
+        connection = sqlite3.connect(self.path, timeout=5)
+        connection.execute("PRAGMA journal_mode=WAL")
+        return closing(connection)
+
+    def _activity_connection(self):
+        # Written on every request, so each thread keeps its connection open
+        connection = getattr(self._local, 'connection', None)
+        if connection is None or getattr(self._local, 'pid', None) != os.getpid():
+            connection = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self._local.connection = connection
+            self._local.pid = os.getpid()
+        return connection
+
+    def init_app(self, app, prefix='/'):
+        """
+        Record every Dash callback request on a Flask app in the shared
+        activity table, so the warmer in any worker sees the whole server's
+        load. Other routes (health checks, reports) don't count.
+
+        Args:
+            app: Flask server
+            prefix: Dash's routes_pathname_prefix
+        """
+        path = prefix + '_dash-update-component'
+
+        def started():
+            if request.path == path:
+                request.environ['popularity.counted'] = True
+                self._request_activity(1)
+
+        def finished(_exception=None):
+            if request.environ.pop('popularity.counted', False):
+                self._request_activity(-1)
+
+        app.before_request(started)
+        app.teardown_request(finished)
+
+    def _request_activity(self, change):
+        with self._lock:
+            self._requests = max(self._requests + change, 0)
+            active = self._requests
+        try:
+            self._activity_connection().execute(
+                "INSERT OR REPLACE INTO activity (pid, active, last_request) VALUES (?, ?, ?)",
+                (os.getpid(), active, time.time()))
+        except sqlite3.Error as e:
+            print(f"Warning: Request activity could not be saved: {e}")
+
+    def track(self, name, unordered=()):
+        """
+        Decorator counting every call of a callback by its normalized
+        arguments. The undecorated function is registered under name so
+        the warmer can replay calls without counting them.
+
+        Args:
+            name: Callback name
+            unordered: Parameter names whose list values are treated as sets
+        """
+        def decorator(function):
+            self.functions[name] = function
+
+            @functools.wraps(function)
+            def wrapper(*args, **kwargs):
+                self.record(name, normalize_arguments(function, args, kwargs, unordered))
+                with self._lock:
+                    self._active += 1
+                try:
+                    return function(*args, **kwargs)
+                finally:
+                    with self._lock:
+                        self._active -= 1
+                        self._last_request = time.monotonic()
+            return wrapper
+        return decorator
+
+    def record(self, name, arguments):
+        key = (name, to_json(arguments))
+        with self._lock:
+            self._pending[key] = self._pending.get(key, 0) + 1
+            due = time.monotonic() - self._last_flush >= self.flush_interval
+        if due:
+            self.flush()
+
+    def flush(self):
+        """
+        Add the buffered counts to the file.
+        """
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            self._last_flush = time.monotonic()
+        if not pending:
+            return
+
+        now = time.time()
+        try:
+            with self._connect() as connection, connection:
+                connection.executemany("""
+                    INSERT INTO popularity (name, arguments, count, last_seen) VALUES (?, ?, ?, ?)
+                    ON CONFLICT (name, arguments) DO UPDATE
+                    SET count = count + excluded.count, last_seen = excluded.last_seen
+                """, [(name, arguments, count, now) for (name, arguments), count in pending.items()])
+                connection.execute("""
+                    DELETE FROM popularity WHERE rowid NOT IN (
+                        SELECT rowid FROM popularity ORDER BY count DESC, last_seen DESC LIMIT ?
+                    )
+                """, (self.max_entries,))
+        except sqlite3.Error as e:
+            print(f"Warning: Popularity counts could not be saved: {e}")
+
+    def top(self, n):
+        """
+        The n most requested combinations.
+
+        Returns:
+            list: (name, arguments dict, count) tuples, most requested first
+        """
+        self.flush()
+        try:
+            with self._connect() as connection, connection:
+                rows = connection.execute(
+                    "SELECT name, arguments, count FROM popularity ORDER BY count DESC, last_seen DESC LIMIT ?",
+                    (n,)).fetchall()
+        except sqlite3.Error as e:
+            print(f"Warning: Popularity counts could not be read: {e}")
+            return []
+        return [(name, json.loads(arguments), count) for name, arguments, count in rows]
+
+    def idle_for(self):
+        """
+        Seconds since any worker last finished a request, or 0 while one
+        is running. Calls tracked in this process (background jobs, which
+        don't go through the web server) count too.
+        """
+        with self._lock:
+            if self._active:
+                return 0.0
+            idle = time.monotonic() - self._last_request
+
+        now = time.time()
+        try:
+            busy, last_request = self._activity_connection().execute(
+                "SELECT COALESCE(MAX(active > 0 AND last_request > ?), 0), MAX(last_request) FROM activity",
+                (now - STALE_ACTIVITY_SECONDS,)).fetchone()
+        except sqlite3.Error as e:
+            print(f"Warning: Request activity could not be read: {e}")
+            return idle
+        if busy:
+            return 0.0
+        if last_request is not None:
+            idle = min(idle, max(now - last_request, 0.0))
+        return idle
+
+class CacheWarmer:
+    """
+    Background thread replaying the most requested callback calls.
+
+    Only one process per lock file warms; the results land in the shared
+    result cache, so the other workers benefit too.
+
+    Args:
+        tracker: PopularityTracker with the callbacks registered
+        version: Callable returning the current data version
+        top_n: Combinations warmed per pass
+        idle_seconds: Quiet time required before each warming call
+        pause: Seconds slept between warming calls
+        check_interval: Seconds between data version checks
+        lock_path: File locked by the process that warms
+    """
+
+    def __init__(self, tracker, version, top_n=50, idle_seconds=2.0, pause=0.5,
+                 check_interval=60, lock_path=None):
+        self.tracker = tracker
+        self.version = version
+        self.top_n = top_n
+        self.idle_seconds = idle_seconds
+        self.pause = pause
+        self.check_interval = check_interval
+        self.lock_path = lock_path or tracker.path + '.warm.lock'
+        self.warmed_version = None
+        self.last_pass = {}
+        self._lock_file = None
+        self._thread = None
+        self._stop = threading.Event()
+
+    def _acquire(self):
+        # Non-blocking; the lock is held until the process exits
+        if self._lock_file is not None:
+            return True
+        try:
+            import fcntl
+            lock_file = open(self.lock_path, 'w')
+        except (ImportError, OSError):
+            return False
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            lock_file.close()
+            return False
+        self._lock_file = lock_file
+        return True
+
+    def start(self):
+        """
+        Start the warming thread. Every worker runs one, but only the one
+        holding the lock file warms; the others keep trying so a recycled
+        worker's role is taken over.
+        """
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='cache-warmer', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def status(self):
+        return {'warming': self._lock_file is not None, 'warmed_version': self.warmed_version,
+                'last_pass': self.last_pass}
+
+    def _wait_for_idle(self):
+        while not self._stop.is_set():
+            idle = self.tracker.idle_for()
+            if idle >= self.idle_seconds:
+                return True
+            self._stop.wait(self.idle_seconds - idle)
+        return False
+
+    def _run(self):
+        try:
+            # Below live requests in the OS scheduler (Linux lets a thread
+            # set its own priority)
+            os.setpriority(os.PRIO_PROCESS, threading.get_native_id(), 10)
+        except (AttributeError, OSError):
+            pass
+
+        while not self._stop.is_set():
+            version = self.version()
+            if version is not None and version != self.warmed_version and self._acquire():
+                self.warm_pass(version)
+            self._stop.wait(self.check_interval)
+
+    def warm_pass(self, version):
+        """
+        Replay the top_n most requested calls once.
+
+        Args:
+            version: Data version being warmed
+        """
+        started = time.perf_counter()
+        warmed = failed = 0
+        for name, arguments, _ in self.tracker.top(self.top_n):
+            function = self.tracker.functions.get(name)
+            if function is None:
+                continue
+            if not self._wait_for_idle():
+                return
+            try:
+                function(**arguments)
+                warmed += 1
+            except Exception as e:
+                failed += 1
+                print(f"Warning: Could not warm {name}: {e}")
+            self._stop.wait(self.pause)
+
+        self.warmed_version = version
+        self.last_pass = {'version': version, 'warmed': warmed, 'failed': failed,
+                          'seconds': round(time.perf_counter() - started, 2), 'finished': time.time()}
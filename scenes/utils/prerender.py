@@ -0,0 +1,157 @@
+"""
+NFL QB Passing Tendencies Dashboard - Prerendered Views
+
+This module stores the figures for each QB's default dashboard view, built
+ahead of time by prerender.py, as one gzipped JSON file per passer under a
+directory named for the data version. Callbacks asked for a default view are
+answered from the file instead of being computed.
+"""
+
+import functools
+import gzip
+import json
+import os
+import shutil
+from urllib.parse import quote
+
+from .result_cache import normalize_arguments, to_json
+
+PRERENDER_DIR = os.path.join('data', 'prerender')
+
+# Callback arguments of a freshly opened dashboard, as the browser sends them
+# (see the initial values in scenes/dashboard.py). List values are compared
+# as sets.
+DEFAULT_VIEW = {
+    'pass_detail': 'pass_',
+    'isTooltips_on': True,
+    'rosetype_toggle': True,
+    'playclock_filter': [0, 40],
+    'time_filter': [0, 900],
+    'depth_filter': ['0-10 yd', '10-20 yd', '20+ yd'],
+    'down_filter': [1, 2, 3, 4],
+    'direction_filter': ['N', 'NE', 'E', 'SE', 'S', 'SW', 'W', 'NW'],
+    'start_date': '2022-09-01',
+    'end_date': '2024-02-01',
+    'lineplot_mode': 'band',
+    'sankey_stage': 'depth',
+}
+
+def _same(name, value, default):
+    if isinstance(default, list):
+        return isinstance(value, (list, tuple)) and sorted(map(str, value)) == sorted(map(str, default))
+    if name.endswith('_date'):
+        # The date picker may send a time part
+        return value is not None and str(value)[:10] == default
+    return value == default
+
+def is_default_view(arguments, receivers=None):
+    """
+    Whether a callback's arguments describe a QB's default view.
+
+    Args:
+        arguments: Parameter name -> value, as bound by normalize_arguments
+        receivers: The QB's receivers; every one of them selected (or none)
+                   counts as unfiltered
+
+    Returns:
+        bool: True when every filter the callback takes is at its default
+    """
+    for name, value in arguments.items():
+        if name == 'receiver_filter':
+            if value and (receivers is None or set(value) != set(receivers)):
+                return False
+        elif name in DEFAULT_VIEW and not _same(name, value, DEFAULT_VIEW[name]):
+            return False
+    return True
+
+class PrerenderStore:
+    """
+    Per-passer prerendered callback outputs for one data version.
+
+    Args:
+        directory: Root directory; each data version gets a subdirectory
+        version: Callable returning the current data version
+    """
+
+    def __init__(self, directory=PRERENDER_DIR, version=lambda: None):
+        self.directory = directory
+        self.version = version
+
+    def version_dir(self, version=None):
+        return os.path.join(self.directory, version or self.version() or 'none')
+
+    def path(self, passer, version=None):
+        return os.path.join(self.version_dir(version), quote(passer, safe='') + '.json.gz')
+
+    def load(self, passer):
+        """
+        Prerendered outputs for a passer, or None.
+
+        Returns:
+            dict: Callback name -> output
+        """
+        if self.version() is None:
+            return None
+        try:
+            with gzip.open(self.path(passer), 'rt') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            print(f"Warning: Could not read prerendered views for {passer}: {e}")
+            return None
+
+    def save(self, passer, outputs, version=None):
+        """
+        Write a passer's outputs atomically.
+
+        Args:
+            passer: Passer name
+            outputs: Callback name -> JSON-ready output
+            version: Data version to file them under (default: current)
+        """
+        path = self.path(passer, version)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        temporary = f'{path}.{os.getpid()}.tmp'
+        with gzip.open(temporary, 'wt', compresslevel=6) as f:
+            f.write(to_json(outputs))
+        os.replace(temporary, path)
+
+    def prune(self, keep, previous=0):
+        """
+        Remove the directories of every data version except keep and the
+        previous most recently written others, which servers still
+        switching away from an older version may be reading.
+        """
+        if not os.path.isdir(self.directory):
+            return
+        others = sorted((name for name in os.listdir(self.directory) if name != keep),
+                        key=lambda name: os.path.getmtime(os.path.join(self.directory, name)), reverse=True)
+        for name in others[previous:]:
+            shutil.rmtree(os.path.join(self.directory, name), ignore_errors=True)
+
+    def serve(self, name, receivers=None):
+        """
+        Decorator answering default-view calls from the store.
+
+        Args:
+            name: Key of the callback's output in each passer's file
+            receivers: Optional callable returning a passer's receivers,
+                       used to recognise an unfiltered receiver list
+        """
+        def decorator(function):
+            @functools.wraps(function)
+            def wrapper(*args, **kwargs):
+                arguments = normalize_arguments(function, args, kwargs)
+                passer = arguments.get('qb_name')
+                if passer and self.version() is not None:
+                    passer_receivers = None
+                    if arguments.get('receiver_filter') and receivers is not None:
+                        passer_receivers = receivers(passer)
+                    if is_default_view(arguments, passer_receivers):
+                        outputs = self.load(passer)
+                        if outputs is not None and name in outputs:
+                            return outputs[name]
+                return function(*args, **kwargs)
+            return wrapper
+        return decorator
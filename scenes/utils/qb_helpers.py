@@ -10,6 +10,16 @@ import numpy as np
 import plotly.graph_objects as go
 import plotly.express as px
 
+# Play outcome categories, ordered from worst to best result
+PLAY_OUTCOMES = ['No First Down', 'First Down', 'Touchdown']
+
+# Play clock bin edges (right-inclusive) and labels for the line plot
+PLAYCLOCK_BINS = [0, 5, 10, 15, 20, 25, 30, 35, 40]
+PLAYCLOCK_RANGES = ['0-5s', '5-10s', '10-15s', '15-20s', '20-25s', '25-30s', '30-35s', '35-40s']
+
+# League percentiles drawn as the line plot's band
+LEAGUE_PERCENTILES = (10, 25, 50, 75, 90)
+
 def bin_direction(direction):
     """
     Bin pass direction into 8 compass directions.
@@ -62,6 +72,19 @@ def bin_depth(air_yards):
     else:
         return '20+ yd'
 
+def bin_depths(air_yards):
+    """
+    Vectorized version of bin_depth.
+
+    Args:
+        air_yards: Array of air yards values
+
+    Returns:
+        np.ndarray: Depth category for every value
+    """
+    air_yards = np.asarray(air_yards, dtype=np.float64)
+    return np.select([air_yards > 20, air_yards > 10], ['20+ yd', '10-20 yd'], default='0-10 yd').astype(object)
+
 def bin_playclock(play_clock):
     """
     Bin play clock into time ranges.
@@ -119,6 +142,26 @@ def bin_play_outcome(row):
     # All other outcomes (incomplete, complete but no first down, etc.)
     return 'No First Down'
 
+def bin_play_outcomes(df):
+    """
+    Vectorized version of bin_play_outcome returning integer outcome codes.
+
+    Args:
+        df: DataFrame with pass_touchdown, first_down_pass and first_down columns
+
+    Returns:
+        np.ndarray: int8 index into PLAY_OUTCOMES for every row
+    """
+    def flag(column):
+        if column not in df.columns:
+            return np.zeros(len(df), dtype=bool)
+        return pd.to_numeric(df[column], errors='coerce').to_numpy() == 1
+
+    touchdown = flag('pass_touchdown')
+    first_down = flag('first_down_pass') | flag('first_down')
+
+    return np.select([touchdown, first_down], [2, 1], default=0).astype(np.int8)
+
 def aggregate_heatmap(df):
     """
     Aggregate data for heatmap visualization.
@@ -141,42 +184,6 @@ def aggregate_heatmap(df):
         'counts': heatmap_data['count'].tolist()
     }
 
-def aggregate_rose(df):
-    """
-    Aggregate data for rose plot visualization showing top receivers by play outcomes.
-    
-    Args:
-        df: DataFrame with receiver and play outcome data
-        
-    Returns:
-        DataFrame: Aggregated data for rose plot
-    """
-    if df.empty:
-        return pd.DataFrame(columns=['Receiver', 'Play Outcome', 'Frequency'])
-    
-    # Add play outcome binning if it doesn't exist
-    if 'play_outcome_bin' not in df.columns:
-        df['play_outcome_bin'] = df.apply(bin_play_outcome, axis=1)
-    
-    # Filter to top receivers by total targets (to keep visualization manageable)
-    receiver_counts = df.groupby('receiver_player_name').size().reset_index(name='total_targets')
-    top_receivers = receiver_counts.nlargest(10, 'total_targets')['receiver_player_name'].tolist()
-    
-    # Filter data to only include top receivers and passing plays
-    filtered_df = df[
-        (df['receiver_player_name'].isin(top_receivers)) & 
-        (df['receiver_player_name'].notna())
-    ].copy()
-    
-    if filtered_df.empty:
-        return pd.DataFrame(columns=['Receiver', 'Play Outcome', 'Frequency'])
-    
-    # Aggregate by receiver and play outcome
-    rose_data = filtered_df.groupby(['receiver_player_name', 'play_outcome_bin']).size().reset_index(name='Frequency')
-    rose_data = rose_data.rename(columns={'receiver_player_name': 'Receiver', 'play_outcome_bin': 'Play Outcome'})
-    
-    return rose_data
-
 def aggregate_timeline(df):
     """
     Aggregate data for timeline visualization.
@@ -201,77 +208,109 @@ def aggregate_timeline(df):
     
     return timeline_data
 
-def aggregate_sankey(df):
+def aggregate_playclock(df, bins=PLAYCLOCK_BINS):
     """
-    Aggregate data for Sankey diagram visualization.
-    
+    Share of each passer's attempts falling in each play clock range.
+
+    Ranges are right-inclusive like pd.cut, so plays outside (bins[0],
+    bins[-1]] are not counted.
+
     Args:
-        df: DataFrame with QB, receiver, and depth data
-        
+        df: DataFrame with passer_player_name and play_clock columns
+        bins: Play clock bin edges
+
     Returns:
-        dict: Aggregated data for Sankey diagram
+        tuple: (passers, shares, sample_shares) where shares[i] is passers[i]'s
+               distribution over the ranges and sample_shares pools every play
     """
-    if df.empty:
-        return {'nodes': [], 'links': [], 'link_colors': []}
-    
-    # Add depth binning if it doesn't exist
-    if 'depth_bin' not in df.columns:
-        df['depth_bin'] = df['air_yards'].apply(bin_depth)
-    
-    # Count passes by QB -> Receiver -> Depth
-    sankey_data = df.groupby(['passer_player_name', 'receiver_player_name', 'depth_bin']).size().reset_index(name='count')
-    
-    # Create nodes and links
-    nodes = []
-    links = []
-    link_colors = []
-    
-    # Color mapping for depths
-    depth_colors = {
-        '0-10 yd': '#511479',
-        '10-20 yd': '#8B2880',
-        '20+ yd': '#C63E73'
-    }
-    
-    # Add QB node
-    qb_name = df['passer_player_name'].iloc[0]
-    nodes.append({'label': qb_name})
-    
-    # Add receiver nodes and QB->Receiver links
-    receiver_counts = df.groupby('receiver_player_name').size().reset_index(name='count')
-    receiver_index_map = {}
-    
-    for idx, (receiver, count) in enumerate(zip(receiver_counts['receiver_player_name'], receiver_counts['count'])):
-        nodes.append({'label': receiver})
-        receiver_index_map[receiver] = idx + 1
-        links.append({'source': 0, 'target': idx + 1, 'value': count})
-        link_colors.append('#FBCEB6')
-    
-    # Add depth nodes and Receiver->Depth links
-    depth_index_map = {}
-    next_idx = len(nodes)
-    
-    for depth in sankey_data['depth_bin'].unique():
-        nodes.append({'label': depth})
-        depth_index_map[depth] = next_idx
-        next_idx += 1
-    
-    # Add receiver->depth links
-    for _, row in sankey_data.iterrows():
-        receiver_idx = receiver_index_map[row['receiver_player_name']]
-        depth_idx = depth_index_map[row['depth_bin']]
-        
-        links.append({
-            'source': receiver_idx,
-            'target': depth_idx,
-            'value': row['count']
-        })
-        link_colors.append(depth_colors.get(row['depth_bin'], '#cccccc'))
-    
+    n_bins = len(bins) - 1
+    bin_codes = np.searchsorted(bins, df['play_clock'].to_numpy(dtype=float), side='left') - 1
+    valid = (bin_codes >= 0) & (bin_codes < n_bins)
+
+    passer_codes, passers = pd.factorize(df['passer_player_name'].to_numpy()[valid], sort=True)
+    counts = np.bincount(passer_codes * n_bins + bin_codes[valid],
+                         minlength=len(passers) * n_bins).reshape(len(passers), n_bins)
+
+    totals = counts.sum(axis=1, keepdims=True)
+    shares = counts / np.maximum(totals, 1)
+    sample_shares = counts.sum(axis=0) / max(counts.sum(), 1)
+    return list(passers), shares, sample_shares
+
+def percentile_bands(shares, percentiles=LEAGUE_PERCENTILES):
+    """
+    League percentiles of the per-passer shares in each range.
+
+    Args:
+        shares: Matrix from aggregate_playclock
+        percentiles: Percentiles to compute
+
+    Returns:
+        dict: Percentile -> array with one value per range
+    """
+    if len(shares) == 0:
+        return {}
+    values = np.percentile(shares, percentiles, axis=0)
+    return dict(zip(percentiles, values))
+
+def nearest_peers(passers, shares, qb_name, n):
+    """
+    Passers whose play clock distributions are closest to qb_name's.
+
+    Args:
+        passers: Passer names from aggregate_playclock
+        shares: Matrix from aggregate_playclock
+        qb_name: Passer to compare against
+        n: Number of peers to return
+
+    Returns:
+        list: Up to n (passer, shares) pairs, nearest first
+    """
+    if qb_name not in passers:
+        return []
+    index = passers.index(qb_name)
+    distances = np.linalg.norm(shares - shares[index], axis=1)
+    distances[index] = np.inf
+    order = np.argsort(distances, kind='stable')[:min(n, len(passers) - 1)]
+    return [(passers[i], shares[i]) for i in order]
+
+def aggregate_sankey(counts, qb_name, stage_order=None, stage_colors=None):
+    """
+    Build Sankey nodes and links (QB -> receiver -> stage) from grouped counts.
+
+    Args:
+        counts: DataFrame with receiver, stage and passes columns, ordered by
+                receiver rank (as returned by sql_aggregates.sankey_counts)
+        qb_name: Label for the source node
+        stage_order: Optional display order for the stage nodes
+        stage_colors: Optional mapping of stage label to link color
+
+    Returns:
+        dict: Node labels plus link source, target, value and color arrays
+    """
+    if counts.empty:
+        return {'labels': [], 'source': [], 'target': [], 'value': [], 'link_colors': []}
+
+    passes = counts['passes'].to_numpy()
+
+    # Receivers keep their rank order; stages follow stage_order when given
+    receiver_codes, receivers = pd.factorize(counts['receiver'])
+    if stage_order is not None:
+        stages = [stage for stage in stage_order if stage in set(counts['stage'])]
+        stage_codes = pd.Categorical(counts['stage'], categories=stages).codes
+    else:
+        stage_codes, stages = pd.factorize(counts['stage'], sort=True)
+        stages = list(stages)
+
+    n_receivers = len(receivers)
+    receiver_totals = np.bincount(receiver_codes, weights=passes, minlength=n_receivers)
+    stage_palette = np.array([(stage_colors or {}).get(stage, '#cccccc') for stage in stages], dtype=object)
+
     return {
-        'nodes': nodes,
-        'links': links,
-        'link_colors': link_colors
+        'labels': [qb_name, *receivers, *stages],
+        'source': np.concatenate([np.zeros(n_receivers, dtype=int), receiver_codes + 1]),
+        'target': np.concatenate([np.arange(1, n_receivers + 1), stage_codes + n_receivers + 1]),
+        'value': np.concatenate([receiver_totals, passes]),
+        'link_colors': np.concatenate([np.full(n_receivers, '#FBCEB6', dtype=object), stage_palette[stage_codes]]),
     }
 
 def calculate_qb_stats(df):
@@ -0,0 +1,261 @@
+"""
+NFL QB Passing Tendencies Dashboard - Per-QB Columnar Shards
+
+This module loads a single quarterback's plays once into compact NumPy arrays
+and evaluates the sidebar filters as vectorized boolean masks, so interactive
+filter changes never round-trip to DuckDB.
+"""
+
+import os
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from .qb_helpers import PLAY_OUTCOMES
+from .columnar_store import PASS_PLAYS_QUERY, encode_pass_plays, decode_categories
+
+# Full range of the quarter time slider, in seconds
+QUARTER_SECONDS = 900
+
+def _code_lookup(categories, selected):
+    """
+    Build a boolean lookup table over category codes (shifted by one so that
+    missing values, coded -1, land on index 0 and are never selected).
+    """
+    index = {category: code for code, category in enumerate(categories)}
+    lookup = np.zeros(len(categories) + 1, dtype=bool)
+    for value in selected:
+        code = index.get(value)
+        if code is not None:
+            lookup[code + 1] = True
+    return lookup
+
+def _day_number(date, rounding):
+    timestamp = getattr(pd.Timestamp(date), rounding)('D')
+    return timestamp.to_datetime64().astype('datetime64[D]').astype(np.int32)
+
+class QBShard:
+    """
+    Columnar, in-memory copy of one passer's plays.
+
+    Categorical fields are stored as int8/int16 codes and measurements as
+    float32 (see columnar_store.encode_pass_plays), so a full career fits in
+    a few hundred kilobytes and every filter evaluates as a handful of NumPy
+    comparisons. The columns may also be read-only views into the shared
+    memory-mapped PlayStore.
+    """
+
+    def __init__(self, passer, columns, categories, first_row=None):
+        self.passer = passer
+        self.columns = columns
+        self.categories = categories
+        self.size = len(columns['down'])
+        # Row id of the shard's first play in the PlayStore it views, if any
+        self.first_row = first_row
+
+    @classmethod
+    def from_frame(cls, passer, df):
+        """
+        Encode a DataFrame of one passer's plays.
+        """
+        columns, categories = encode_pass_plays(df)
+        return cls(passer, columns, categories)
+
+    @property
+    def nbytes(self):
+        return sum(column.nbytes for column in self.columns.values())
+
+    @property
+    def receivers(self):
+        """Sorted names of every receiver this passer targeted."""
+        codes = np.unique(self.columns['receiver'])
+        return [self.categories['receiver'][code] for code in codes if code >= 0]
+
+    def mask(self, down_filter=None, depth_filter=None, receiver_filter=None,
+             direction_filter=None, playclock_filter=None, time_filter=None,
+             start_date=None, end_date=None):
+        """
+        Evaluate the sidebar filters as a boolean row mask.
+
+        Filters mirror the SQL the dashboard used to build: an empty or
+        missing list leaves that dimension unfiltered, and range filters are
+        inclusive on both ends.
+
+        Args:
+            down_filter: Downs to keep
+            depth_filter: Depth bins to keep ('0-10 yd', '10-20 yd', '20+ yd')
+            receiver_filter: Receiver names to keep
+            direction_filter: Pass directions to keep
+            playclock_filter: [min, max] play clock seconds
+            time_filter: [min, max] seconds remaining in the quarter
+            start_date: First game date to keep
+            end_date: Last game date to keep
+
+        Returns:
+            np.ndarray: Boolean mask over the shard's rows
+        """
+        columns = self.columns
+        mask = np.ones(self.size, dtype=bool)
+
+        if playclock_filter:
+            play_clock = columns['play_clock']
+            mask &= (play_clock >= playclock_filter[0]) & (play_clock <= playclock_filter[1])
+
+        # The quarter slider defaults to its full range, which should not drop
+        # plays with a missing clock
+        if time_filter and (time_filter[0] > 0 or time_filter[1] < QUARTER_SECONDS):
+            quarter_seconds = columns['quarter_seconds']
+            mask &= (quarter_seconds >= time_filter[0]) & (quarter_seconds <= time_filter[1])
+
+        if down_filter:
+            lookup = np.zeros(5, dtype=bool)
+            lookup[[int(down) for down in down_filter if 0 < int(down) <= 4]] = True
+            mask &= lookup[columns['down']]
+
+        if depth_filter:
+            air_yards = columns['air_yards']
+            depth_mask = np.zeros(self.size, dtype=bool)
+            if '0-10 yd' in depth_filter:
+                depth_mask |= (air_yards >= 0) & (air_yards <= 10)
+            if '10-20 yd' in depth_filter:
+                depth_mask |= (air_yards >= 10) & (air_yards <= 20)
+            if '20+ yd' in depth_filter:
+                depth_mask |= air_yards > 20
+            mask &= depth_mask
+
+        if receiver_filter:
+            mask &= _code_lookup(self.categories['receiver'], receiver_filter)[columns['receiver'] + 1]
+
+        if direction_filter:
+            mask &= _code_lookup(self.categories['direction'], direction_filter)[columns['direction'] + 1]
+
+        if start_date:
+            mask &= columns['game_date'] >= _day_number(start_date, 'ceil')
+
+        if end_date:
+            mask &= columns['game_date'] <= _day_number(end_date, 'floor')
+
+        return mask
+
+    def to_frame(self, mask=None):
+        """
+        Materialize the selected rows as a DataFrame with pbp column names.
+
+        Args:
+            mask: Boolean row mask (defaults to every row)
+
+        Returns:
+            DataFrame: Selected plays, plus their PlayStore row ids as
+                       play_key when the shard views a store
+        """
+        rows = np.flatnonzero(mask) if mask is not None else np.arange(self.size)
+        columns, categories = self.columns, self.categories
+
+        def decode(name):
+            return decode_categories(columns[name][rows], categories[name])
+
+        df = pd.DataFrame({
+            'receiver_player_name': decode('receiver'),
+            'air_yards': columns['air_yards'][rows],
+            'down': columns['down'][rows],
+            'distance': columns['distance'][rows],
+            'game_date': columns['game_date'][rows].astype('datetime64[D]').astype('datetime64[ns]'),
+            'play_clock': columns['play_clock'][rows],
+            'quarter_seconds_remaining': columns['quarter_seconds'][rows],
+            'pass_location_x': columns['location_x'][rows],
+            'pass_location_y': columns['location_y'][rows],
+            'pass_direction': decode('direction'),
+            'passer_player_name': self.passer,
+            'posteam': decode('posteam'),
+            'defteam': decode('defteam'),
+            'epa': columns['epa'][rows],
+            'complete_pass': columns['complete_pass'][rows],
+            'play_outcome_bin': decode_categories(columns['outcome'][rows], PLAY_OUTCOMES),
+        })
+        if self.first_row is not None:
+            df['play_key'] = rows + self.first_row
+        return df
+
+def load_qb_shard(con, passer):
+    """
+    Load one passer's plays from DuckDB into a QBShard.
+
+    Args:
+        con: DuckDB connection
+        passer: passer_player_name value
+
+    Returns:
+        QBShard: Columnar shard for the passer
+    """
+    query = PASS_PLAYS_QUERY.format(where='passer_player_name = ?')
+    df = pd.read_sql_query(query, con=con, params=[passer])
+    return QBShard.from_frame(passer, df)
+
+def store_qb_shard(store, passer):
+    """
+    Build a QBShard from zero-copy views into a PlayStore.
+
+    Args:
+        store: PlayStore holding every pass play
+        passer: passer_player_name value
+
+    Returns:
+        QBShard: Columnar shard for the passer
+    """
+    first_row = store.passer_slice(passer).start
+    return QBShard(passer, store.passer_columns(passer), store.categories, first_row=first_row)
+
+class ShardCache:
+    """
+    Thread-safe LRU of QBShard objects keyed by passer name.
+
+    Args:
+        loader: Function mapping a passer name to a QBShard
+        maxsize: Number of passers to keep
+    """
+
+    def __init__(self, loader, maxsize=32):
+        self.loader = loader
+        self.maxsize = maxsize
+        self._shards = OrderedDict()
+        self._lock = threading.Lock()
+        self._generation = 0
+        # A fork can happen while another thread holds the lock
+        os.register_at_fork(after_in_child=self._after_fork)
+
+    def _after_fork(self):
+        self._lock = threading.Lock()
+
+    def get(self, passer):
+        """
+        Return the passer's shard, loading it on a miss.
+        """
+        with self._lock:
+            shard = self._shards.get(passer)
+            if shard is not None:
+                self._shards.move_to_end(passer)
+                return shard
+            generation = self._generation
+
+        # Load outside the lock so one slow passer doesn't block the others
+        shard = self.loader(passer)
+
+        with self._lock:
+            if generation != self._generation:
+                # Cleared while loading: the shard may come from old data
+                return shard
+            self._shards[passer] = shard
+            self._shards.move_to_end(passer)
+            while len(self._shards) > self.maxsize:
+                self._shards.popitem(last=False)
+        return shard
+
+    def clear(self):
+        with self._lock:
+            self._shards.clear()
+            self._generation += 1
+
+    def __len__(self):
+        return len(self._shards)
@@ -0,0 +1,244 @@
+"""
+NFL QB Passing Tendencies Dashboard - Disk-Backed Result Cache
+
+This module keeps callback results (figures and table records) in a local
+SQLite file so that every server worker, and every restart, shares the same
+warm cache. Results are stored as compressed compact JSON and keyed by the
+function, its normalized arguments and the data version, with least
+recently used entries evicted once the cache grows past its size budget.
+"""
+
+import functools
+import hashlib
+import inspect
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+
+from plotly.utils import PlotlyJSONEncoder
+
+# Writes between full size checks; writes in between add to a running total
+EVICT_CHECK_EVERY = 64
+
+def data_version(database_path):
+    """
+    Short hash identifying the contents of the database file.
+
+    Args:
+        database_path: Path to the DuckDB database
+
+    Returns:
+        str: Version string, or None if the database does not exist
+    """
+    if not os.path.exists(database_path):
+        return None
+    stat = os.stat(database_path)
+    signature = f'{os.path.abspath(database_path)}:{stat.st_size}:{stat.st_mtime_ns}'
+    return hashlib.sha1(signature.encode()).hexdigest()[:12]
+
+def to_json(value):
+    """Compact JSON for figures, records and NumPy values."""
+    return json.dumps(value, cls=PlotlyJSONEncoder, separators=(',', ':'))
+
+def normalize_arguments(function, args, kwargs, unordered=()):
+    """
+    Bind a call's arguments to parameter names, sorting list arguments that
+    are used as sets so equivalent selections share one cache entry.
+    """
+    bound = inspect.signature(function).bind(*args, **kwargs)
+    bound.apply_defaults()
+    normalized = {}
+    for name, value in bound.arguments.items():
+        if name in unordered and isinstance(value, (list, tuple)):
+            value = sorted(value, key=str)
+        normalized[name] = value
+    return normalized
+
+class Uncached:
+    """
+    A result memoize hands back without storing it, such as the empty
+    figure a callback falls back to after an error.
+
+    Args:
+        value: The result to return
+    """
+
+    def __init__(self, value):
+        self.value = value
+
+def uncached(value):
+    """Mark a memoized function's result as not to be stored."""
+    return Uncached(value)
+
+class ResultCache:
+    """
+    SQLite-backed cache shared by every process on the machine.
+
+    Args:
+        path: SQLite file location
+        max_bytes: Size budget for stored (compressed) results
+        version: Function returning the current data version; caching is
+                 skipped while it returns None
+    """
+
+    def __init__(self, path, max_bytes=256 * 1024 * 1024, version=lambda: None):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.version = version
+        self._local = threading.local()
+        self.hits = 0
+        self.misses = 0
+        # This process's view of the stored size, resynced every EVICT_CHECK_EVERY writes
+        self._size = None
+        self._writes = 0
+
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        with self._connection() as connection:
+            connection.execute("""
+                CREATE TABLE IF NOT EXISTS results (
+                    key TEXT PRIMARY KEY,
+                    version TEXT,
+                    value BLOB,
+                    size INTEGER,
+                    accessed REAL
+                )
+            """)
+            connection.execute("CREATE INDEX IF NOT EXISTS idx_results_accessed ON results(accessed)")
+
+    def _connection(self):
+        # One connection per thread; SQLite connections can't be shared
+        connection = getattr(self._local, 'connection', None)
+        if connection is None or getattr(self._local, 'pid', None) != os.getpid():
+            connection = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self._local.connection = connection
+            self._local.pid = os.getpid()
+        return connection
+
+    def make_key(self, name, arguments, version=None):
+        version = self.version() if version is None else version
+        if version is None:
+            return None
+        payload = f'{name}|{version}|{to_json(arguments)}'
+        return hashlib.sha1(payload.encode()).hexdigest()
+
+    def get(self, key):
+        """
+        Look up a key, returning (found, value).
+        """
+        try:
+            connection = self._connection()
+            row = connection.execute("SELECT value FROM results WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return False, None
+            connection.execute("UPDATE results SET accessed = ? WHERE key = ?", (time.time(), key))
+        except sqlite3.Error as e:
+            print(f"Warning: Result cache read failed: {e}")
+            return False, None
+
+        self.hits += 1
+        return True, json.loads(zlib.decompress(row[0]))
+
+    def set(self, key, value, version=None):
+        """
+        Store a JSON-serializable value (figures included) under a key.
+
+        Args:
+            key: Key from make_key
+            value: Result to store
+            version: Data version the key was made with (the current one
+                     if omitted)
+        """
+        version = self.version() if version is None else version
+        blob = zlib.compress(to_json(value).encode(), 6)
+        try:
+            connection = self._connection()
+            connection.execute(
+                "INSERT OR REPLACE INTO results (key, version, value, size, accessed) VALUES (?, ?, ?, ?, ?)",
+                (key, version, blob, len(blob), time.time())
+            )
+            self._evict(connection, len(blob), version)
+        except sqlite3.Error as e:
+            print(f"Warning: Result cache write failed: {e}")
+
+    def _evict(self, connection, added, version):
+        # Other workers write too, so the running total is only an estimate
+        # between full counts
+        self._writes += 1
+        if self._size is None or self._writes % EVICT_CHECK_EVERY == 0:
+            self._size = connection.execute("SELECT COALESCE(SUM(size), 0) FROM results").fetchone()[0]
+        else:
+            self._size += added
+        if self._size <= self.max_bytes:
+            return
+
+        # Drop results from older data versions first, then the least
+        # recently used, until the cache is back under 90% of its budget
+        connection.execute("DELETE FROM results WHERE version IS NOT ?", (version,))
+        target = self.max_bytes * 0.9
+        rows = connection.execute("SELECT key, size FROM results ORDER BY accessed").fetchall()
+        total = sum(size for _, size in rows)
+        stale = []
+        for key, size in rows:
+            if total <= target:
+                break
+            stale.append((key,))
+            total -= size
+        connection.executemany("DELETE FROM results WHERE key = ?", stale)
+        self._size = total
+
+    def clear(self):
+        self._connection().execute("DELETE FROM results")
+        self._size = None
+
+    def drop_other_versions(self, version):
+        """
+        Delete every result computed from a data version other than version.
+        """
+        try:
+            self._connection().execute("DELETE FROM results WHERE version IS NOT ?", (version,))
+            self._size = None
+        except sqlite3.Error as e:
+            print(f"Warning: Result cache cleanup failed: {e}")
+
+    def stats(self):
+        entries, size = self._connection().execute(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM results").fetchone()
+        return {'entries': entries, 'bytes': size, 'hits': self.hits, 'misses': self.misses}
+
+    def memoize(self, name, unordered=()):
+        """
+        Decorator caching a function's result on disk. Results the function
+        wraps in uncached() are returned unwrapped and never stored.
+
+        Args:
+            name: Namespace for the function's entries
+            unordered: Parameter names whose list values are treated as sets
+        """
+        def decorator(function):
+            @functools.wraps(function)
+            def wrapper(*args, **kwargs):
+                # One version for the key and the stored row, even if the
+                # data is republished while the function runs
+                version = self.version()
+                if version is None:
+                    value = function(*args, **kwargs)
+                    return value.value if isinstance(value, Uncached) else value
+
+                key = self.make_key(name, normalize_arguments(function, args, kwargs, unordered), version)
+                found, value = self.get(key)
+                if found:
+                    return value
+
+                value = function(*args, **kwargs)
+                if isinstance(value, Uncached):
+                    return value.value
+                self.set(key, value, version)
+                return value
+            return wrapper
+        return decorator
@@ -0,0 +1,266 @@
+"""
+NFL QB Passing Tendencies Dashboard - QB Tendency Similarity Index
+
+This module summarizes every passer's career tendencies as one vector (depth,
+direction, play clock and outcome distributions plus EPA and air yard means
+and spreads) and finds a QB's most similar peers by cosine similarity. The
+vectors are built at ETL time next to the columnar store and saved already
+normalized, so a lookup is one matrix-vector product over a few hundred rows
+instead of a league-wide scan.
+
+The index keeps the per-passer sums the vectors are computed from, so a new
+snapshot only needs to add the weeks played since the previous one.
+"""
+
+import numpy as np
+
+from .columnar_store import save_arrays, load_arrays
+from .prerender import DEFAULT_VIEW
+from .qb_helpers import PLAYCLOCK_BINS, PLAY_OUTCOMES
+
+# Compass directions in the order of the direction filter
+DIRECTIONS = list(DEFAULT_VIEW['direction_filter'])
+
+DEPTH_SUMS = ['depth_0_10', 'depth_10_20', 'depth_20_plus']
+DIRECTION_SUMS = [f'direction_{direction}' for direction in DIRECTIONS]
+PLAYCLOCK_SUMS = [f'playclock_{position}' for position in range(len(PLAYCLOCK_BINS) - 1)]
+OUTCOME_SUMS = [f'outcome_{position}' for position in range(len(PLAY_OUTCOMES))]
+
+# Summed per passer; squares give the spread of EPA and air yards
+SUMS = ['attempts', *DEPTH_SUMS, *DIRECTION_SUMS, *PLAYCLOCK_SUMS, 'targets', *OUTCOME_SUMS,
+        'epa_count', 'epa_sum', 'epa_squares', 'air_yards_count', 'air_yards_sum', 'air_yards_squares']
+
+# Groups of tendency vector entries, each weighted equally in the similarity
+FEATURE_GROUPS = {
+    'depth': DEPTH_SUMS,
+    'direction': DIRECTION_SUMS,
+    'play_clock': PLAYCLOCK_SUMS,
+    'outcome': OUTCOME_SUMS,
+    'epa': ['epa_mean', 'epa_std'],
+    'air_yards': ['air_yards_mean', 'air_yards_std'],
+}
+FEATURES = [feature for features in FEATURE_GROUPS.values() for feature in features]
+
+# Passers with fewer attempts have no vector and are never suggested
+MIN_ATTEMPTS = 100
+
+def _tendency_sums(columns, rows, n_passers, directions):
+    """
+    SUMS per passer code over the given store rows.
+
+    Args:
+        columns: PlayStore columns
+        rows: Row positions to sum
+        n_passers: Number of passer codes
+        directions: Store direction categories
+
+    Returns:
+        np.ndarray: (passers, SUMS) float64 totals
+    """
+    passer = columns['passer'][rows].astype(np.int64)
+    air_yards = columns['air_yards'][rows].astype(np.float64)
+    epa = columns['epa'][rows].astype(np.float64)
+    play_clock = columns['play_clock'][rows].astype(np.float64)
+
+    values = np.zeros((len(rows), len(SUMS)), dtype=np.float64)
+    everywhere = np.arange(len(rows))
+    values[:, SUMS.index('attempts')] = 1
+
+    # Same bins as bin_depths and the date rollup
+    depth_codes = np.select([air_yards > 20, air_yards > 10], [2, 1], default=0)
+    values[everywhere, SUMS.index(DEPTH_SUMS[0]) + depth_codes] = 1
+
+    # Store direction codes -> position in DIRECTIONS (-1 for anything else)
+    lookup = np.array([DIRECTIONS.index(name) if name in DIRECTIONS else -1 for name in directions] + [-1])
+    direction_codes = lookup[columns['direction'][rows].astype(np.int64)] if 'direction' in columns \
+        else np.full(len(rows), -1)
+    known = direction_codes >= 0
+    values[everywhere[known], SUMS.index(DIRECTION_SUMS[0]) + direction_codes[known]] = 1
+
+    # Same right-inclusive bins as aggregate_playclock
+    clock_codes = np.searchsorted(PLAYCLOCK_BINS, play_clock, side='left') - 1
+    valid = (clock_codes >= 0) & (clock_codes < len(PLAYCLOCK_SUMS))
+    values[everywhere[valid], SUMS.index(PLAYCLOCK_SUMS[0]) + clock_codes[valid]] = 1
+
+    # Outcomes of targeted passes, as in the rose plot
+    targeted = columns['receiver'][rows] >= 0
+    values[:, SUMS.index('targets')] = targeted
+    values[everywhere[targeted], SUMS.index(OUTCOME_SUMS[0]) + columns['outcome'][rows][targeted]] = 1
+
+    for name, measure in (('epa', epa), ('air_yards', air_yards)):
+        measured = ~np.isnan(measure)
+        values[:, SUMS.index(f'{name}_count')] = measured
+        values[:, SUMS.index(f'{name}_sum')] = np.where(measured, measure, 0)
+        values[:, SUMS.index(f'{name}_squares')] = np.where(measured, measure, 0) ** 2
+
+    return np.stack([np.bincount(passer, weights=values[:, position], minlength=n_passers)
+                     for position in range(len(SUMS))], axis=1)
+
+def tendency_vectors(sums, min_attempts=MIN_ATTEMPTS):
+    """
+    Normalized tendency vectors from per-passer SUMS.
+
+    Distributions become shares and measurements a mean and standard
+    deviation. Each feature is then standardized across the eligible
+    passers and each group scaled by one over the square root of its size,
+    so the eight directions count no more than EPA's two moments. Rows are
+    scaled to unit length, making a dot product the cosine similarity.
+
+    Args:
+        sums: (passers, SUMS) totals
+        min_attempts: Attempts a passer needs for a vector
+
+    Returns:
+        tuple: (vectors, eligible) where vectors is (passers, FEATURES)
+               float32 and rows of ineligible passers are zero
+    """
+    sums = np.asarray(sums, dtype=np.float64)
+
+    def column(name):
+        return sums[:, SUMS.index(name)]
+
+    def ratio(numerator, denominator):
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return np.where(denominator > 0, numerator / np.maximum(denominator, 1), 0)
+
+    raw = {}
+    for names, total in ((DEPTH_SUMS, 'attempts'), (DIRECTION_SUMS, 'attempts'),
+                         (PLAYCLOCK_SUMS, 'attempts'), (OUTCOME_SUMS, 'targets')):
+        for name in names:
+            raw[name] = ratio(column(name), column(total))
+    for name in ('epa', 'air_yards'):
+        mean = ratio(column(f'{name}_sum'), column(f'{name}_count'))
+        squares = ratio(column(f'{name}_squares'), column(f'{name}_count'))
+        raw[f'{name}_mean'] = mean
+        raw[f'{name}_std'] = np.sqrt(np.maximum(squares - mean ** 2, 0))
+
+    eligible = column('attempts') >= min_attempts
+    features = np.stack([raw[feature] for feature in FEATURES], axis=1)
+    vectors = np.zeros_like(features)
+    if eligible.any():
+        chosen = features[eligible]
+        spread = chosen.std(axis=0)
+        # Features every eligible passer shares carry no signal
+        scaled = np.where(spread > 0, (chosen - chosen.mean(axis=0)) / np.where(spread > 0, spread, 1), 0)
+        weights = np.concatenate([np.full(len(names), 1 / np.sqrt(len(names)))
+                                  for names in FEATURE_GROUPS.values()])
+        scaled = scaled * weights
+        norms = np.linalg.norm(scaled, axis=1, keepdims=True)
+        vectors[eligible] = scaled / np.where(norms > 0, norms, 1)
+    return vectors.astype(np.float32), eligible
+
+class TendencyIndex:
+    """
+    Normalized career tendency vectors per passer, with the sums behind them.
+
+    Args:
+        passers: Passer names, indexed by row
+        sums: (passers, SUMS) totals
+        through: Last game day (days since the epoch) the sums cover
+        rows: Size of the store the sums were built from
+        vectors: Normalized vectors from tendency_vectors (computed if omitted)
+        eligible: Passers with a vector (computed if omitted)
+    """
+
+    def __init__(self, passers, sums, through, rows, vectors=None, eligible=None):
+        self.passers = list(passers)
+        self.sums = sums
+        self.through = through
+        self.rows = rows
+        if vectors is None or eligible is None:
+            vectors, eligible = tendency_vectors(sums)
+        self.vectors = vectors
+        self.eligible = eligible
+        self._passer_codes = {passer: code for code, passer in enumerate(self.passers)}
+
+    @classmethod
+    def from_store(cls, store, previous=None):
+        """
+        Build the index over every play in a PlayStore.
+
+        With a previous index, only plays after the last game day it covers
+        are summed and added to its sums. Weeks already covered are assumed
+        unchanged; if the store holds a different number of plays up to that
+        day, everything is summed again.
+
+        Args:
+            store: League PlayStore
+            previous: TendencyIndex of an earlier snapshot, or None
+
+        Returns:
+            TendencyIndex: Index over the store
+        """
+        columns, categories = store.columns, store.categories
+        passers = categories['passer']
+        days = np.asarray(columns['game_date'])
+        through = int(days.max()) if store.size else None
+
+        start = None
+        if previous is not None and previous.through is not None:
+            start = previous.through
+            if int(np.count_nonzero(days <= start)) != previous.rows:
+                print("Warning: Earlier weeks changed since the previous tendency index; rebuilding it")
+                start = None
+
+        rows = np.arange(store.size) if start is None else np.flatnonzero(days > start)
+        sums = _tendency_sums(columns, rows, len(passers), categories.get('direction', []))
+        if start is not None:
+            # The previous passers keep their sums under the store's codes
+            codes = {passer: code for code, passer in enumerate(passers)}
+            for code, passer in enumerate(previous.passers):
+                if passer in codes:
+                    sums[codes[passer]] += previous.sums[code]
+            through = max(through, previous.through) if through is not None else previous.through
+
+        return cls(passers, sums, through, store.size)
+
+    def save(self, directory):
+        """
+        Persist the index as .npy files so workers can memory-map them.
+        """
+        save_arrays(directory, {
+            'sums': self.sums,
+            'vectors': self.vectors,
+            'eligible': self.eligible,
+        }, {'passers': self.passers, 'sums': SUMS, 'features': FEATURES, 'through': self.through,
+            'rows': self.rows})
+
+    @classmethod
+    def load(cls, directory, store=None, mmap=True):
+        """
+        Load an index written by save(), checked against a PlayStore if given.
+        """
+        arrays, meta = load_arrays(directory, mmap=mmap)
+        if meta['sums'] != SUMS or meta['features'] != FEATURES:
+            raise ValueError(f"Tendency index at {directory} was built with other features")
+        if store is not None and meta['rows'] != store.size:
+            raise ValueError(f"Tendency index at {directory} does not match the store")
+        return cls(meta['passers'], arrays['sums'], meta['through'], meta['rows'],
+                   arrays['vectors'], arrays['eligible'])
+
+    def most_similar(self, passer, n=5):
+        """
+        The passers whose tendencies are closest to a passer's.
+
+        Args:
+            passer: Passer to compare against
+            n: Number of peers to return
+
+        Returns:
+            list: Up to n (passer, cosine similarity) pairs, most similar
+                  first; empty if the passer has too few attempts
+        """
+        code = self._passer_codes.get(passer)
+        if code is None or not self.eligible[code]:
+            return []
+        vectors = np.asarray(self.vectors)
+        similarity = vectors @ vectors[code]
+        similarity[~np.asarray(self.eligible)] = -np.inf
+        similarity[code] = -np.inf
+        n = min(n, int(np.count_nonzero(np.isfinite(similarity))))
+        if n <= 0:
+            return []
+        top = np.argpartition(-similarity, n - 1)[:n]
+        # Ties go to the alphabetically first passer
+        top = top[np.lexsort((top, -similarity[top]))]
+        return [(self.passers[i], float(similarity[i])) for i in top]
@@ -0,0 +1,141 @@
+"""
+NFL QB Passing Tendencies Dashboard - Versioned Data Snapshots
+
+This module lets the ETL publish a new database while the dashboard keeps
+serving the old one. Each ETL run builds a self-contained snapshot directory
+(DuckDB database plus columnar export) named for a hash of its source data,
+then points data/manifest.json at it with an atomic rename. Running servers
+poll the manifest and switch over when the version changes.
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import threading
+
+MANIFEST_PATH = os.path.join('data', 'manifest.json')
+SNAPSHOT_DIR = os.path.join('data', 'snapshots')
+
+def content_hash(paths, length=12, salt=''):
+    """
+    Hash of the contents of the given files, in order.
+
+    Args:
+        paths: Files to hash (missing files are skipped)
+        length: Hex digits to keep
+        salt: Hashed ahead of the files, e.g. the version of whatever is
+              built from them
+
+    Returns:
+        str: Hex digest prefix
+    """
+    digest = hashlib.sha256()
+    if salt:
+        digest.update(salt.encode())
+    for path in paths:
+        if not os.path.exists(path):
+            continue
+        digest.update(os.path.basename(path).encode())
+        with open(path, 'rb') as f:
+            for block in iter(lambda: f.read(1 << 20), b''):
+                digest.update(block)
+    return digest.hexdigest()[:length]
+
+def read_manifest(path=MANIFEST_PATH):
+    """
+    The published manifest, or None if there is none (or it is unreadable).
+    """
+    try:
+        with open(path) as f:
+            manifest = json.load(f)
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError) as e:
+        print(f"Warning: Could not read data manifest {path}: {e}")
+        return None
+    return manifest if 'version' in manifest and 'database' in manifest else None
+
+def write_manifest(manifest, path=MANIFEST_PATH):
+    """
+    Publish a manifest atomically: readers see the old or the new file,
+    never a partial one.
+    """
+    temporary = f'{path}.{os.getpid()}.tmp'
+    with open(temporary, 'w') as f:
+        json.dump(manifest, f, indent=2)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temporary, path)
+
+def snapshot_paths(manifest, manifest_path=MANIFEST_PATH):
+    """
+    Absolute database and columnar store paths named by a manifest, which
+    records them relative to its own directory.
+
+    Returns:
+        tuple: (database path, columnar store directory)
+    """
+    root = os.path.dirname(os.path.abspath(manifest_path))
+    return os.path.join(root, manifest['database']), os.path.join(root, manifest['columnar'])
+
+def prune_snapshots(keep, directory=SNAPSHOT_DIR):
+    """
+    Delete snapshot directories other than the versions in keep.
+
+    Servers that still have an older snapshot open keep reading it: open
+    files and memory maps outlive their directory entries.
+    """
+    if not os.path.isdir(directory):
+        return
+    for name in os.listdir(directory):
+        if name not in keep:
+            shutil.rmtree(os.path.join(directory, name), ignore_errors=True)
+
+class ManifestWatcher:
+    """
+    Daemon thread calling on_change whenever the manifest file changes.
+
+    Args:
+        path: Manifest location
+        on_change: Function called (with no arguments) after a change,
+                   returning False to have the change retried
+        interval: Seconds between checks
+    """
+
+    def __init__(self, path, on_change, interval=30):
+        self.path = path
+        self.on_change = on_change
+        self.interval = interval
+        self._signature = self._stat()
+        self._thread = None
+        self._stop = threading.Event()
+
+    def _stat(self):
+        try:
+            stat = os.stat(self.path)
+            return stat.st_ino, stat.st_size, stat.st_mtime_ns
+        except OSError:
+            return None
+
+    def start(self):
+        if self.interval <= 0 or (self._thread is not None and self._thread.is_alive()):
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='manifest-watcher', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            signature = self._stat()
+            if signature is None or signature == self._signature:
+                continue
+            try:
+                if self.on_change() is not False:
+                    self._signature = signature
+            except Exception as e:
+                # Retried on the next check
+                print(f"Error applying data manifest change: {e}")
@@ -0,0 +1,743 @@
+"""
+NFL QB Passing Tendencies Dashboard - SQL Aggregations
+
+This module builds parameterized DuckDB queries for the dashboard's summary
+figures. Grouping, ranking and outcome binning all run inside the database,
+so only the handful of rows a figure actually draws are returned to Python.
+"""
+
+import hashlib
+import os
+import re
+import shutil
+import threading
+
+import pandas as pd
+
+from .field_tiers import FIELD_LENGTH_FT, FIELD_WIDTH_FT
+from .qb_helpers import PLAY_OUTCOMES, PLAYCLOCK_BINS
+from .qb_shards import QUARTER_SECONDS
+
+# SQL version of bin_play_outcome
+OUTCOME_SQL = """
+    CASE
+        WHEN pass_touchdown = 1 THEN 'Touchdown'
+        WHEN first_down_pass = 1 OR first_down = 1 THEN 'First Down'
+        ELSE 'No First Down'
+    END
+"""
+
+# Label for the slice that collects everything outside the top K
+OTHER = 'Other'
+
+# DataTable filter_query operators -> SQL comparison
+TABLE_COMPARISONS = {
+    'eq': '=', '=': '=', 'ne': '<>', '!=': '<>',
+    'lt': '<', '<': '<', 'le': '<=', '<=': '<=',
+    'gt': '>', '>': '>', 'ge': '>=', '>=': '>=',
+}
+
+# One '{column} operator value' term of a filter_query
+TABLE_FILTER_TERM = re.compile(r'^\s*\{(?P<column>[^}]+)\}\s+(?P<operator>\S+)\s*(?P<value>.*?)\s*$')
+
+# Third-stage groupings available to the Sankey diagram
+SANKEY_STAGES = {
+    'depth': 'depth_bin',
+    'outcome': OUTCOME_SQL,
+    'direction': "COALESCE(pass_direction, 'Unknown')",
+}
+
+def filter_clause(qb_name=None, down_filter=None, depth_filter=None, receiver_filter=None,
+                  direction_filter=None, playclock_filter=None, time_filter=None,
+                  start_date=None, end_date=None, passers=None):
+    """
+    Build a WHERE clause for the sidebar filters.
+
+    Mirrors QBShard.mask: an empty or missing filter leaves that dimension
+    unfiltered and ranges are inclusive on both ends.
+
+    Args:
+        qb_name: Passer to keep
+        down_filter: Downs to keep
+        depth_filter: Depth bins to keep ('0-10 yd', '10-20 yd', '20+ yd')
+        receiver_filter: Receiver names to keep
+        direction_filter: Pass directions to keep
+        playclock_filter: [min, max] play clock seconds
+        time_filter: [min, max] seconds remaining in the quarter
+        start_date: First game date to keep
+        end_date: Last game date to keep
+        passers: Several passers to keep, for grouped queries
+
+    Returns:
+        tuple: (clause, params) ready to follow WHERE
+    """
+    conditions = ['passer_player_name IS NOT NULL']
+    params = []
+
+    def add_in(column, values):
+        conditions.append(f"{column} IN ({','.join('?' for _ in values)})")
+        params.extend(values)
+
+    # Written as IN so DuckDB scans rather than probing idx_pbp_passer; index
+    # lookups fetch rows one at a time and are far slower for a whole career
+    if qb_name:
+        add_in('passer_player_name', [qb_name])
+
+    if passers:
+        add_in('passer_player_name', list(passers))
+
+    if playclock_filter:
+        conditions.append('play_clock BETWEEN ? AND ?')
+        params.extend([playclock_filter[0], playclock_filter[1]])
+
+    if time_filter and (time_filter[0] > 0 or time_filter[1] < QUARTER_SECONDS):
+        conditions.append('quarter_seconds_remaining BETWEEN ? AND ?')
+        params.extend([time_filter[0], time_filter[1]])
+
+    if down_filter:
+        add_in('down', [int(down) for down in down_filter])
+
+    if depth_filter:
+        depth_conditions = []
+        if '0-10 yd' in depth_filter:
+            depth_conditions.append('air_yards BETWEEN 0 AND 10')
+        if '10-20 yd' in depth_filter:
+            depth_conditions.append('air_yards BETWEEN 10 AND 20')
+        if '20+ yd' in depth_filter:
+            depth_conditions.append('air_yards > 20')
+        conditions.append('(' + (' OR '.join(depth_conditions) or 'FALSE') + ')')
+
+    if receiver_filter:
+        add_in('receiver_player_name', list(receiver_filter))
+
+    if direction_filter:
+        add_in('pass_direction', list(direction_filter))
+
+    if start_date:
+        conditions.append('CAST(game_date AS DATE) >= CAST(? AS TIMESTAMP)')
+        params.append(str(start_date))
+
+    if end_date:
+        conditions.append('CAST(game_date AS DATE) <= CAST(? AS TIMESTAMP)')
+        params.append(str(end_date))
+
+    return ' AND '.join(conditions), params
+
+def _top_receivers(value_sql, where, by_passer=False):
+    """
+    CTEs ranking receivers by targets (ties alphabetically) and relabelling
+    everyone past the top K as OTHER. Takes two parameters after the filter
+    clause's: K, twice. With by_passer, receivers are ranked within each
+    passer's targets and every CTE keeps a passer column.
+    """
+    keys = 'passer, receiver' if by_passer else 'receiver'
+    partition = 'PARTITION BY passer ' if by_passer else ''
+    # Materialized so the filtered plays are scanned once, not per reference
+    return f"""
+        plays AS MATERIALIZED (
+            SELECT passer_player_name AS passer, receiver_player_name AS receiver, {value_sql} AS value
+            FROM pbp
+            WHERE receiver_player_name IS NOT NULL AND {where}
+        ),
+        ranked AS (
+            SELECT {keys}, ROW_NUMBER() OVER ({partition}ORDER BY COUNT(*) DESC, receiver) AS rank
+            FROM plays
+            GROUP BY {keys}
+        ),
+        sliced AS (
+            SELECT plays.passer,
+                   CASE WHEN ranked.rank <= ? THEN plays.receiver ELSE '{OTHER}' END AS receiver,
+                   LEAST(ranked.rank, ? + 1) AS rank,
+                   plays.value
+            FROM plays JOIN ranked USING ({keys})
+        )
+    """
+
+def _outcome_values():
+    return ', '.join(f"('{outcome}', {position})" for position, outcome in enumerate(PLAY_OUTCOMES))
+
+def rose_counts(con, where='TRUE', params=(), top_k=8):
+    """
+    Dense receiver x play outcome target counts for the rose plot.
+
+    Receivers are ranked by targets (ties alphabetically); the top_k keep
+    their own slice and the rest fold into an 'Other' slice. Every kept
+    receiver gets a row for every outcome, zero-filled.
+
+    Args:
+        con: DuckDB connection
+        where: Filter clause from filter_clause
+        params: Parameters for the filter clause
+        top_k: Number of receivers to show individually
+
+    Returns:
+        DataFrame: Receiver, Play Outcome and Frequency columns, at most
+                   (top_k + 1) * 3 rows ordered by receiver rank then outcome
+    """
+    query = f"""
+        WITH {_top_receivers(OUTCOME_SQL, where)},
+        counts AS (
+            SELECT receiver, MIN(rank) AS rank, value AS outcome, COUNT(*) AS frequency
+            FROM sliced
+            GROUP BY receiver, value
+        ),
+        slices AS (
+            SELECT receiver, MIN(rank) AS rank FROM counts GROUP BY receiver
+        )
+        SELECT slices.receiver AS "Receiver",
+               outcomes.outcome AS "Play Outcome",
+               COALESCE(counts.frequency, 0) AS "Frequency"
+        FROM slices
+        CROSS JOIN (VALUES {_outcome_values()}) AS outcomes(outcome, position)
+        LEFT JOIN counts ON counts.receiver = slices.receiver AND counts.outcome = outcomes.outcome
+        ORDER BY slices.rank, outcomes.position
+    """
+    # A cursor gives each server thread its own handle on the shared database
+    df = con.cursor().execute(query, [*params, top_k, top_k]).df()
+    if df.empty:
+        return pd.DataFrame(columns=['Receiver', 'Play Outcome', 'Frequency'])
+    return df
+
+def rose_counts_by_passer(con, where='TRUE', params=(), top_k=8):
+    """
+    rose_counts for several passers in one scan.
+
+    Each passer's receivers are ranked and folded into 'Other' separately,
+    so every passer gets the same rows rose_counts would return for them.
+
+    Args:
+        con: DuckDB connection
+        where: Filter clause from filter_clause (usually with passers)
+        params: Parameters for the filter clause
+        top_k: Number of receivers to show individually per passer
+
+    Returns:
+        DataFrame: passer, Receiver, Play Outcome and Frequency columns,
+                   ordered by passer, receiver rank then outcome
+    """
+    query = f"""
+        WITH {_top_receivers(OUTCOME_SQL, where, by_passer=True)},
+        counts AS (
+            SELECT passer, receiver, MIN(rank) AS rank, value AS outcome, COUNT(*) AS frequency
+            FROM sliced
+            GROUP BY passer, receiver, value
+        ),
+        slices AS (
+            SELECT passer, receiver, MIN(rank) AS rank FROM counts GROUP BY passer, receiver
+        )
+        SELECT slices.passer,
+               slices.receiver AS "Receiver",
+               outcomes.outcome AS "Play Outcome",
+               COALESCE(counts.frequency, 0) AS "Frequency"
+        FROM slices
+        CROSS JOIN (VALUES {_outcome_values()}) AS outcomes(outcome, position)
+        LEFT JOIN counts ON counts.passer = slices.passer AND counts.receiver = slices.receiver
+                        AND counts.outcome = outcomes.outcome
+        ORDER BY slices.passer, slices.rank, outcomes.position
+    """
+    return con.cursor().execute(query, [*params, top_k, top_k]).df()
+
+def field_cell_counts(con, where='TRUE', params=(), bins=(30, 16)):
+    """
+    Passes per passer and field grid cell, the grouped version of
+    field_tiers.density_grid.
+
+    Locations are converted to field feet as field_coordinates does;
+    passes off the field or without a location are not counted.
+
+    Args:
+        con: DuckDB connection
+        where: Filter clause from filter_clause
+        params: Parameters for the filter clause
+        bins: Cells along the field's length and width
+
+    Returns:
+        DataFrame: passer, cell_x, cell_y and passes columns, one row per
+                   non-empty cell
+    """
+    query = f"""
+        WITH located AS (
+            SELECT passer_player_name AS passer,
+                   30 + pass_location_x * 3 AS x,
+                   pass_location_y * 3 AS y
+            FROM pbp
+            WHERE {where}
+        )
+        SELECT passer,
+               LEAST(CAST(FLOOR(x * ? / {FIELD_LENGTH_FT}) AS INTEGER), ? - 1) AS cell_x,
+               LEAST(CAST(FLOOR(y * ? / {FIELD_WIDTH_FT}) AS INTEGER), ? - 1) AS cell_y,
+               COUNT(*) AS passes
+        FROM located
+        WHERE x BETWEEN 0 AND {FIELD_LENGTH_FT} AND y BETWEEN 0 AND {FIELD_WIDTH_FT}
+        GROUP BY ALL
+        ORDER BY passer, cell_y, cell_x
+    """
+    return con.cursor().execute(query, [*params, bins[0], bins[0], bins[1], bins[1]]).df()
+
+def playclock_counts(con, where='TRUE', params=(), bins=PLAYCLOCK_BINS):
+    """
+    Attempts per passer and play clock range, the grouped version of
+    aggregate_playclock. Ranges are right-inclusive, and plays outside
+    (bins[0], bins[-1]] are not counted.
+
+    Args:
+        con: DuckDB connection
+        where: Filter clause from filter_clause
+        params: Parameters for the filter clause
+        bins: Play clock bin edges
+
+    Returns:
+        DataFrame: passer, bin (index into the ranges) and plays columns
+    """
+    cases = ' '.join(f'WHEN play_clock <= {upper} THEN {position}'
+                     for position, upper in enumerate(bins[1:]))
+    query = f"""
+        SELECT passer_player_name AS passer,
+               CASE {cases} END AS bin,
+               COUNT(*) AS plays
+        FROM pbp
+        WHERE {where} AND play_clock > {bins[0]} AND play_clock <= {bins[-1]}
+        GROUP BY ALL
+        ORDER BY passer, bin
+    """
+    return con.cursor().execute(query, list(params)).df()
+
+def sankey_counts(con, where='TRUE', params=(), top_k=10, stage='depth'):
+    """
+    Target counts by receiver and a third stage for the Sankey diagram.
+
+    Receivers are ranked and folded into an 'Other' node exactly as in
+    rose_counts, so the result size depends on top_k, not on how many
+    receivers a QB has thrown to.
+
+    Args:
+        con: DuckDB connection
+        where: Filter clause from filter_clause
+        params: Parameters for the filter clause
+        top_k: Number of receivers to show individually
+        stage: Key of SANKEY_STAGES to split each receiver's targets by
+
+    Returns:
+        DataFrame: receiver, rank, stage and passes columns ordered by
+                   receiver rank then stage
+    """
+    query = f"""
+        WITH {_top_receivers(SANKEY_STAGES[stage], where)}
+        SELECT receiver, rank, value AS stage, COUNT(*) AS passes
+        FROM sliced
+        GROUP BY receiver, rank, value
+        ORDER BY rank, stage
+    """
+    return con.cursor().execute(query, [*params, top_k, top_k]).df()
+
+# Per passer and week totals behind the trend view. The ETL stores them as
+# the passer_weeks table; older databases get them as a subquery instead.
+PASSER_WEEKS_QUERY = """
+    SELECT passer_player_name AS passer, season, week, MIN(game_date) AS game_date,
+           COUNT(*) AS attempts,
+           SUM(COALESCE(complete_pass, 0)) AS completions,
+           COUNT(complete_pass) AS completion_count,
+           COUNT(epa) AS epa_count,
+           SUM(COALESCE(epa, 0)) AS epa_sum,
+           COUNT(air_yards) AS air_yards_count,
+           SUM(COALESCE(air_yards, 0)) AS air_yards_sum,
+           COUNT(*) FILTER (WHERE air_yards > 20) AS deep_attempts
+    FROM pbp
+    WHERE passer_player_name IS NOT NULL
+    GROUP BY passer_player_name, season, week
+"""
+
+# Summed columns of PASSER_WEEKS_QUERY
+WEEKLY_TOTALS = ['attempts', 'completions', 'completion_count', 'epa_count', 'epa_sum', 'air_yards_count',
+                 'air_yards_sum', 'deep_attempts']
+
+def weekly_running_totals(con, passer):
+    """
+    Running totals of WEEKLY_TOTALS over a passer's weeks, in one window
+    query over the per-week rollup.
+
+    Any N-week rolling total is the difference of two rows, so the result
+    answers every window size without another query (see trends).
+
+    Args:
+        con: DuckDB connection
+        passer: Passer name
+
+    Returns:
+        DataFrame: season, week, game_date and WEEKLY_TOTALS columns, one
+                   row per week played, in order
+    """
+    cursor = con.cursor()
+    stored = cursor.execute(
+        "SELECT COUNT(*) FROM duckdb_tables() WHERE table_name = 'passer_weeks'").fetchone()[0]
+    source = 'passer_weeks' if stored else f'({PASSER_WEEKS_QUERY})'
+    running = ', '.join(f'SUM({column}) OVER weeks AS {column}' for column in WEEKLY_TOTALS)
+    query = f"""
+        SELECT season, week, game_date, {running}
+        FROM {source}
+        WHERE passer = ?
+        WINDOW weeks AS (ORDER BY season, week ROWS BETWEEN UNBOUNDED PRECEDING AND CURRENT ROW)
+        ORDER BY season, week
+    """
+    return cursor.execute(query, [passer]).df()
+
+# What each defense allowed per week: pass EPA from pbp, and the passing
+# line of the offense it faced plus its own sacks and interceptions from the
+# team stats tables. The ETL stores it as the defense_weeks table.
+DEFENSE_WEEKS_QUERY = """
+    WITH allowed_epa AS (
+        SELECT defteam AS team, season, week, COUNT(epa) AS epa_count, SUM(COALESCE(epa, 0)) AS epa_sum
+        FROM pbp
+        WHERE passer_player_name IS NOT NULL AND defteam IS NOT NULL
+        GROUP BY ALL
+    ),
+    allowed_passing AS (
+        -- The other offense's line in each game is what this defense allowed
+        SELECT defense.team, defense.season, defense.week,
+               offense.pass_attempts, offense.complete_pass AS completions,
+               defense.interception AS interceptions, defense.sack AS sacks
+        FROM team_weeks_defense AS defense
+        JOIN team_weeks_offense AS offense
+          ON offense.game_id = defense.game_id AND offense.team <> defense.team
+    )
+    SELECT team, season, week,
+           COALESCE(epa_count, 0) AS epa_count, COALESCE(epa_sum, 0) AS epa_sum,
+           COALESCE(pass_attempts, 0) AS pass_attempts, COALESCE(completions, 0) AS completions,
+           COALESCE(interceptions, 0) AS interceptions, COALESCE(sacks, 0) AS sacks
+    FROM allowed_epa
+    FULL OUTER JOIN allowed_passing USING (team, season, week)
+"""
+
+# Opponent-adjusted table split levels, by GROUPING(season, week, defteam)
+OPPONENT_SPLITS = {0: 'game', 3: 'season', 7: 'career'}
+
+def opponent_adjusted(con, where='TRUE', params=()):
+    """
+    A passer's EPA/play and completion % against what each defense allowed
+    everyone else that season, per game, per season and for the career.
+
+    Each game's plays are compared with the defense's season totals in
+    defense_weeks less every week the passer faced it that season (whatever
+    the date filter), so neither the game nor a rematch counts towards the
+    baseline. Season and career rows weight each game's baseline by the
+    passer's plays in it.
+
+    Args:
+        con: DuckDB connection with the defense_weeks table
+        where: Filter clause from filter_clause
+        params: Parameters for the filter clause
+
+    Returns:
+        DataFrame: split, Season, Week, Opponent, Attempts, then EPA/Play and
+                   Completion % each with the opponents' allowed rate and the
+                   difference, ordered season by season with each season's
+                   games before its total and the career row last
+    """
+    levels = ' '.join(f"WHEN {grouping} THEN '{split}'"
+                      for grouping, split in OPPONENT_SPLITS.items())
+    query = f"""
+        WITH games AS (
+            SELECT passer_player_name AS passer, season, week, defteam,
+                   COUNT(*) AS attempts,
+                   SUM(COALESCE(complete_pass, 0)) AS completions,
+                   COUNT(complete_pass) AS completion_count,
+                   COUNT(epa) AS epa_count,
+                   SUM(COALESCE(epa, 0)) AS epa_sum
+            FROM pbp
+            WHERE {where} AND defteam IS NOT NULL
+            GROUP BY ALL
+        ),
+        faced AS (
+            -- Every week each passer met each defense, rematches included
+            SELECT DISTINCT passer_player_name AS passer, season, week, defteam AS team
+            FROM pbp
+            WHERE passer_player_name IN (SELECT passer FROM games) AND defteam IS NOT NULL
+        ),
+        seasons AS (
+            SELECT team, season, SUM(epa_sum) AS epa_sum, SUM(epa_count) AS epa_count,
+                   SUM(completions) AS completions, SUM(pass_attempts) AS pass_attempts
+            FROM defense_weeks
+            GROUP BY ALL
+        ),
+        defenses AS (
+            SELECT faced.passer, faced.team, faced.season,
+                   seasons.epa_sum - COALESCE(SUM(weeks.epa_sum), 0) AS other_epa_sum,
+                   seasons.epa_count - COALESCE(SUM(weeks.epa_count), 0) AS other_epa_count,
+                   seasons.completions - COALESCE(SUM(weeks.completions), 0) AS other_completions,
+                   seasons.pass_attempts - COALESCE(SUM(weeks.pass_attempts), 0) AS other_attempts
+            FROM faced
+            JOIN seasons ON seasons.team = faced.team AND seasons.season = faced.season
+            LEFT JOIN defense_weeks AS weeks
+              ON weeks.team = faced.team AND weeks.season = faced.season AND weeks.week = faced.week
+            GROUP BY faced.passer, faced.team, faced.season, seasons.epa_sum, seasons.epa_count,
+                     seasons.completions, seasons.pass_attempts
+        ),
+        adjusted AS (
+            SELECT games.*,
+                   other_epa_sum / NULLIF(other_epa_count, 0) AS allowed_epa,
+                   other_completions / NULLIF(other_attempts, 0) AS allowed_completion
+            FROM games
+            LEFT JOIN defenses
+              ON defenses.passer = games.passer AND defenses.team = games.defteam
+             AND defenses.season = games.season
+        ),
+        rates AS (
+            SELECT CASE GROUPING(season, week, defteam) {levels} END AS split,
+                   CAST(season AS INTEGER) AS "Season",
+                   CAST(week AS INTEGER) AS "Week",
+                   defteam AS "Opponent",
+                   SUM(attempts) AS "Attempts",
+                   SUM(epa_sum) / NULLIF(SUM(epa_count), 0) AS epa,
+                   SUM(epa_count * allowed_epa) / NULLIF(SUM(epa_count) FILTER (WHERE allowed_epa IS NOT NULL), 0)
+                       AS allowed_epa,
+                   -- Passes with an unknown completion are left out, as in pass_stats_splits
+                   SUM(completions) / NULLIF(SUM(completion_count), 0) AS completion,
+                   SUM(completion_count * allowed_completion)
+                       / NULLIF(SUM(completion_count) FILTER (WHERE allowed_completion IS NOT NULL), 0)
+                       AS allowed_completion,
+                   -- Differences only over the games with a baseline
+                   SUM(epa_sum - epa_count * allowed_epa)
+                       / NULLIF(SUM(epa_count) FILTER (WHERE allowed_epa IS NOT NULL), 0) AS epa_over,
+                   SUM(completions - completion_count * allowed_completion)
+                       / NULLIF(SUM(completion_count) FILTER (WHERE allowed_completion IS NOT NULL), 0)
+                       AS completion_over
+            FROM adjusted
+            GROUP BY GROUPING SETS ((season, week, defteam), (season), ())
+        )
+        SELECT split, "Season", "Week", "Opponent", "Attempts",
+               ROUND(epa, 3) AS "EPA/Play",
+               ROUND(allowed_epa, 3) AS "Opp EPA/Play Allowed",
+               ROUND(epa_over, 3) AS "EPA/Play vs Opp",
+               ROUND(completion, 3) AS "Completion %",
+               ROUND(allowed_completion, 3) AS "Opp Completion % Allowed",
+               ROUND(completion_over, 3) AS "Completion % vs Opp"
+        FROM rates
+        ORDER BY split = 'career', "Season", split = 'season', "Week", "Opponent"
+    """
+    return con.cursor().execute(query, list(params)).df()
+
+# Stats table split levels, by GROUPING(season, posteam)
+STATS_SPLITS = {3: 'career', 1: 'season', 2: 'team'}
+
+def pass_stats_splits(con, where='TRUE', params=()):
+    """
+    Stats table rows for every passer at every split level in one scan.
+
+    GROUPING SETS computes each passer's career row, one row per season and
+    one per team together; the split column says which level a row is.
+    Depth bins follow bin_depths, and a bin no pass fell in is left NULL.
+
+    Args:
+        con: DuckDB connection
+        where: Filter clause from filter_clause
+        params: Parameters for the filter clause
+
+    Returns:
+        DataFrame: Player, split, Season, Team and the stats columns,
+                   ordered by player, split, season and team
+    """
+    def depth_share(condition):
+        return f"""
+            CASE WHEN COUNT(*) FILTER (WHERE {condition}) > 0
+                 THEN ROUND(COUNT(*) FILTER (WHERE {condition}) / COUNT(*), 3) END
+        """
+
+    levels = ' '.join(f"WHEN {grouping} THEN '{split}'" for grouping, split in STATS_SPLITS.items())
+    query = f"""
+        SELECT passer_player_name AS "Player",
+               CASE GROUPING(season, posteam) {levels} END AS split,
+               CAST(season AS INTEGER) AS "Season",
+               posteam AS "Team",
+               {depth_share('COALESCE(air_yards, 0) <= 10')} AS "% of Short Passes",
+               {depth_share('air_yards > 10 AND air_yards <= 20')} AS "% of Intermediate Passes",
+               {depth_share('air_yards > 20')} AS "% of Deep Passes",
+               AVG(epa) AS "Avg EPA/Play",
+               AVG(complete_pass) AS "Completion %",
+               AVG(air_yards) AS "Avg Air Yards"
+        FROM pbp
+        WHERE {where}
+        GROUP BY GROUPING SETS ((passer_player_name), (passer_player_name, season),
+                                (passer_player_name, posteam))
+        ORDER BY "Player", split, "Season", "Team"
+    """
+    return con.cursor().execute(query, list(params)).df()
+
+def _identifier(name):
+    return '"' + str(name).replace('"', '""') + '"'
+
+def _table_value(text):
+    # Quoted values are strings; anything else is a number if it parses
+    if len(text) >= 2 and text[0] == text[-1] and text[0] in '"\'`':
+        return text[1:-1].replace('\\' + text[0], text[0])
+    try:
+        return float(text)
+    except ValueError:
+        return text
+
+def table_filter_clause(filter_query, columns):
+    """
+    Translate a DataTable filter_query into a WHERE clause.
+
+    Supports the relational operators, contains and datestartswith, each
+    optionally prefixed with i (case-insensitive) or s (case-sensitive).
+    Terms naming unknown columns or operators are ignored.
+
+    Args:
+        filter_query: Filter string as the table sends it, e.g.
+                      '{Player} contains "Allen" && {Avg EPA/Play} > 0.1'
+        columns: Column names that may be filtered on
+
+    Returns:
+        tuple: (clause, params) ready to follow WHERE
+    """
+    conditions, params = ['TRUE'], []
+    for term in (filter_query or '').split(' && '):
+        match = TABLE_FILTER_TERM.match(term)
+        if not match or match.group('column') not in columns:
+            continue
+        operator, value = match.group('operator'), _table_value(match.group('value'))
+        column = _identifier(match.group('column'))
+
+        insensitive = operator[0] == 'i' and operator[1:] in (*TABLE_COMPARISONS, 'contains')
+        if operator[0] in 'is' and operator[1:] in (*TABLE_COMPARISONS, 'contains', 'datestartswith'):
+            operator = operator[1:]
+
+        if isinstance(value, float) and operator in TABLE_COMPARISONS:
+            conditions.append(f'TRY_CAST({column} AS DOUBLE) {TABLE_COMPARISONS[operator]} ?')
+            params.append(value)
+            continue
+
+        text = f'CAST({column} AS VARCHAR)'
+        value = str(value) if not isinstance(value, float) else match.group('value')
+        if insensitive:
+            text, value = f'LOWER({text})', value.lower()
+        if operator in TABLE_COMPARISONS:
+            conditions.append(f'{text} {TABLE_COMPARISONS[operator]} ?')
+        elif operator == 'contains':
+            conditions.append(f'contains({text}, ?)')
+        elif operator == 'datestartswith':
+            conditions.append(f'starts_with({text}, ?)')
+        else:
+            continue
+        params.append(value)
+    return ' AND '.join(conditions), params
+
+def summary_frame(rows):
+    """
+    Summary records as a DataFrame ready for table_page, with a __position
+    column keeping the summary's order.
+    """
+    summary = pd.DataFrame.from_records(rows)
+    # Rows not separated by sort_by keep the summary's order
+    summary['__position'] = range(len(summary))
+    return summary
+
+class SummaryTables:
+    """
+    Summary tables materialized once as Parquet files, one per data version
+    and key, shared on disk by every worker and background job. Paging,
+    sorting and filtering a table then reads the file in DuckDB instead of
+    decoding and registering the whole summary on every request.
+
+    Args:
+        directory: Where the files are kept, one subdirectory per version
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+
+    def path(self, version, key):
+        return os.path.join(self.directory, version, hashlib.sha1(key.encode()).hexdigest() + '.parquet')
+
+    def materialize(self, con, version, key, build):
+        """
+        Path of the table stored under key, written on first use.
+
+        Args:
+            con: DuckDB connection used to write the file
+            version: Data version the table is built from
+            key: String identifying the table within the version
+            build: Function returning the table's records
+
+        Returns:
+            str: Parquet file for table_page, or None if build returned no
+                 rows (nothing is stored, so the next call tries again)
+        """
+        path = self.path(version, key)
+        if os.path.exists(path):
+            return path
+        rows = build()
+        if not rows:
+            return None
+
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Written under a private name and renamed, so readers never see half a file
+        temporary = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+        quoted = temporary.replace("'", "''")
+        cursor = con.cursor()
+        try:
+            cursor.register('summary', summary_frame(rows))
+            cursor.execute(f"COPY summary TO '{quoted}' (FORMAT PARQUET)")
+        finally:
+            cursor.close()
+        os.replace(temporary, path)
+        return path
+
+    def drop_other_versions(self, version):
+        """
+        Delete every table built from a data version other than version.
+        """
+        if not os.path.isdir(self.directory):
+            return
+        for name in os.listdir(self.directory):
+            if name != version:
+                shutil.rmtree(os.path.join(self.directory, name), ignore_errors=True)
+
+def table_page(con, rows, filter_query=None, sort_by=None, page_current=0, page_size=20):
+    """
+    One page of a summary table, filtered and sorted in DuckDB.
+
+    The summary is queried with WHERE, ORDER BY and LIMIT/OFFSET, so only
+    the page is returned whatever its size. Pass the Parquet file from
+    SummaryTables.materialize to avoid rebuilding the summary per page.
+
+    Args:
+        con: DuckDB connection
+        rows: Summary records (list of dicts with the same keys), or the
+              path of a materialized summary table
+        filter_query: DataTable filter_query
+        sort_by: DataTable sort_by, a list of {'column_id', 'direction'}
+        page_current: Zero-based page number
+        page_size: Rows per page
+
+    Returns:
+        tuple: (page records, number of rows passing the filter)
+    """
+    if not rows:
+        return [], 0
+
+    cursor = con.cursor()
+    try:
+        if isinstance(rows, str):
+            source, source_params = 'read_parquet(?)', [rows]
+        else:
+            cursor.register('summary', summary_frame(rows))
+            source, source_params = 'summary', []
+        columns = [column[0] for column in cursor.execute(f"SELECT * FROM {source} LIMIT 0",
+                                                          source_params).description if column[0] != '__position']
+        where, params = table_filter_clause(filter_query, columns)
+        order = [f"{_identifier(sort['column_id'])} {'DESC' if sort.get('direction') == 'desc' else 'ASC'} NULLS LAST"
+                 for sort in sort_by or [] if sort.get('column_id') in columns]
+
+        total = cursor.execute(f"SELECT COUNT(*) FROM {source} WHERE {where}",
+                               [*source_params, *params]).fetchone()[0]
+        page = cursor.execute(f"""
+            SELECT * EXCLUDE (__position)
+            FROM {source}
+            WHERE {where}
+            ORDER BY {', '.join(order + ['__position'])}
+            LIMIT ? OFFSET ?
+        """, [*source_params, *params, page_size, max(page_current or 0, 0) * page_size]).df()
+    finally:
+        cursor.close()
+    return page.to_dict(orient='records'), int(total)
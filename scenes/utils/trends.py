@@ -0,0 +1,91 @@
+"""
+NFL QB Passing Tendencies Dashboard - Weekly Trends
+
+This module turns a QB's running weekly totals (see
+sql_aggregates.weekly_running_totals) into rolling N-week rates and draws
+them. A rolling window is the difference of two running totals, so any
+window size is computed from the same cached rows without another query.
+"""
+
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+from plotly.subplots import make_subplots
+
+from .sql_aggregates import WEEKLY_TOTALS
+
+# Rolling window sizes offered by the trend view, in weeks played
+TREND_WINDOWS = [1, 3, 5, 8]
+
+# Rate -> (numerator, denominator, axis format)
+TREND_METRICS = {
+    'EPA/Play': ('epa_sum', 'epa_count', '.2f'),
+    'Completion %': ('completions', 'completion_count', '0%'),
+    'Avg Air Yards': ('air_yards_sum', 'air_yards_count', '.1f'),
+    '% of Deep Passes': ('deep_attempts', 'attempts', '0%'),
+}
+
+def rolling_trends(totals, window):
+    """
+    Rolling rates over each week and the window - 1 weeks played before it.
+
+    Early weeks use however many weeks there are so far.
+
+    Args:
+        totals: DataFrame from weekly_running_totals
+        window: Weeks per window
+
+    Returns:
+        DataFrame: season, week, game_date, weeks (in the window) and one
+                   column per TREND_METRICS rate (NaN without a denominator)
+    """
+    running = totals[WEEKLY_TOTALS].to_numpy(dtype=np.float64)
+    # Row i holds the totals before week i
+    prefix = np.vstack([np.zeros((1, len(WEEKLY_TOTALS))), running])
+    ends = np.arange(1, len(running) + 1)
+    starts = np.maximum(ends - max(int(window), 1), 0)
+    windowed = pd.DataFrame(prefix[ends] - prefix[starts], columns=WEEKLY_TOTALS)
+
+    trends = pd.DataFrame({
+        'season': totals['season'].to_numpy(),
+        'week': totals['week'].to_numpy(),
+        'game_date': pd.to_datetime(totals['game_date']).to_numpy(),
+        'weeks': ends - starts,
+    })
+    for metric, (numerator, denominator, _) in TREND_METRICS.items():
+        with np.errstate(invalid='ignore', divide='ignore'):
+            trends[metric] = np.where(windowed[denominator] > 0, windowed[numerator] / windowed[denominator], np.nan)
+    return trends
+
+def trend_figure(trends, qb_name, window):
+    """
+    One panel per TREND_METRICS rate, sharing the date axis.
+
+    Args:
+        trends: DataFrame from rolling_trends
+        qb_name: Passer the trends belong to
+        window: Weeks per window, for the title
+
+    Returns:
+        go.Figure: Stacked line charts
+    """
+    fig = make_subplots(rows=len(TREND_METRICS), cols=1, shared_xaxes=True, vertical_spacing=0.04,
+                        subplot_titles=list(TREND_METRICS))
+    labels = [f"{season} Week {week}" for season, week in zip(trends['season'], trends['week'])]
+
+    for row, (metric, (_, _, axis_format)) in enumerate(TREND_METRICS.items(), start=1):
+        fig.add_trace(go.Scatter(x=trends['game_date'], y=trends[metric], name=metric, mode='lines+markers',
+                                 customdata=np.stack([labels, trends['weeks']], axis=1) if labels else None,
+                                 hovertemplate=f'%{{customdata[0]}}<br>{metric}: %{{y:{axis_format}}}'
+                                               '<br>Over %{customdata[1]} weeks<extra></extra>',
+                                 line=dict(color='rgb(233,84,32)', width=3), marker=dict(size=5),
+                                 showlegend=False),
+                      row=row, col=1)
+        fig.update_yaxes(tickformat=axis_format, gridcolor='white', row=row, col=1)
+
+    title = f"{qb_name}'s {window}-week rolling trends" if window > 1 else f"{qb_name}'s weekly trends"
+    fig.update_xaxes(showgrid=False)
+    fig.update_layout(title=title, title_x=0.5, height=180 * len(TREND_METRICS) + 80,
+                      margin=dict(l=50, r=20, t=80, b=30), plot_bgcolor='#F8F5F0',
+                      font=dict(family='Ubuntu', color='black'))
+    return fig
@@ -11,8 +11,33 @@ import numpy as np
 import nfl_data_py as nfl
 import duckdb
 import os
+import shutil
 from datetime import datetime
 
+from scenes.utils.columnar_store import PASS_PLAYS_QUERY, PlayStore, database_signature
+from scenes.utils.bitmap_index import LeagueIndex
+from scenes.utils.date_rollup import DateRollup
+from scenes.utils.similarity import TendencyIndex
+from scenes.utils.sql_aggregates import DEFENSE_WEEKS_QUERY, PASSER_WEEKS_QUERY
+from scenes.utils.snapshots import (
+    MANIFEST_PATH, SNAPSHOT_DIR, content_hash, prune_snapshots, read_manifest, snapshot_paths, write_manifest
+)
+
+# Team stats CSVs shipped with the repo -> (table, key columns)
+TEAM_STATS = {
+    "data/stats/weekly_team_stats_offense.csv": ("team_weeks_offense", ["team", "season", "week"]),
+    "data/stats/weekly_team_stats_defense.csv": ("team_weeks_defense", ["team", "season", "week"]),
+    "data/stats/yearly_team_stats_offense.csv": ("team_seasons_offense", ["team", "season", "season_type"]),
+    "data/stats/yearly_team_stats_defense.csv": ("team_seasons_defense", ["team", "season", "season_type"]),
+}
+
+# Files every snapshot is built from
+SOURCE_FILES = ["data/pbp_2022_23.parquet", "data/roster_2023.parquet", *TEAM_STATS]
+
+# Bump whenever the tables, rollups or columnar export built from the
+# source files change, so the next run publishes a new data version
+ETL_VERSION = 2
+
 def create_data_directory():
     """Create the data directory if it doesn't exist."""
     os.makedirs("data", exist_ok=True)
@@ -109,12 +134,45 @@ def save_to_parquet(pbp_data, roster_data):
         roster_data.to_parquet("data/roster_2023.parquet", index=False)
         print("Saved roster_2023.parquet")
 
-def setup_duckdb():
+def load_team_stats(con):
+    """
+    Load the team stats CSVs into typed DuckDB tables, one row per key.
+
+    Column types are inferred from every row rather than a sample, seasons
+    and weeks are stored as small integers, and the quote the CSVs put in
+    front of each record (so spreadsheets don't read it as a date) is dropped.
+
+    Returns:
+        bool: True when every table was loaded
+    """
+    loaded = True
+    for path, (table, keys) in TEAM_STATS.items():
+        if not os.path.exists(path):
+            print(f"Warning: {path} not found; skipping the {table} table")
+            loaded = False
+            continue
+
+        replacements = ["CAST(season AS SMALLINT) AS season", "LTRIM(record, '''') AS record"]
+        if "week" in keys:
+            replacements.append("CAST(week AS SMALLINT) AS week")
+        con.execute(f"""
+            CREATE OR REPLACE TABLE {table} AS
+            SELECT * REPLACE ({', '.join(replacements)})
+            FROM read_csv_auto('{path}', header = true, sample_size = -1)
+            ORDER BY {', '.join(keys)}
+        """)
+        # Fails the ETL if a key repeats
+        con.execute(f"CREATE UNIQUE INDEX idx_{table}_key ON {table}({', '.join(keys)})")
+        rows = con.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+        print(f"Loaded {rows} rows into {table}")
+    return loaded
+
+def setup_duckdb(database_path):
     """Set up DuckDB database and register tables."""
     print("Setting up DuckDB database...")
     
     # Connect to DuckDB
-    con = duckdb.connect("data/nfl.db")
+    con = duckdb.connect(database_path)
     
     # Register play-by-play table
     con.execute("""
@@ -129,10 +187,19 @@ def setup_duckdb():
             SELECT * FROM read_parquet('data/roster_2023.parquet')
         """)
     
+    # Per passer and week totals for the trend view's window queries
+    con.execute(f"CREATE OR REPLACE TABLE passer_weeks AS {PASSER_WEEKS_QUERY}")
+    
+    # Team stats, and what each defense allowed per week for the
+    # opponent-adjusted metrics
+    if load_team_stats(con):
+        con.execute(f"CREATE OR REPLACE TABLE defense_weeks AS {DEFENSE_WEEKS_QUERY}")
+    
     # Create some useful indexes
     con.execute("CREATE INDEX IF NOT EXISTS idx_pbp_passer ON pbp(passer_player_name)")
     con.execute("CREATE INDEX IF NOT EXISTS idx_pbp_receiver ON pbp(receiver_player_name)")
     con.execute("CREATE INDEX IF NOT EXISTS idx_pbp_date ON pbp(game_date)")
+    con.execute("CREATE INDEX IF NOT EXISTS idx_pbp_play ON pbp(game_id, play_id)")
     
     # Test the database
     result = con.execute("SELECT COUNT(*) FROM pbp").fetchone()
@@ -140,6 +207,96 @@ def setup_duckdb():
     
     con.close()
 
+def export_shared_dataset(database_path, store_dir, previous_dir=None):
+    """
+    Export the slim pass-play table, its bitmap index, the date-range
+    prefix sums and the QB tendency index as memory-mappable arrays so that
+    every server worker shares one copy of the data.
+
+    The tendency index only adds the weeks played since the one exported
+    to previous_dir, when there is one.
+    """
+    print("Exporting shared columnar dataset...")
+
+    con = duckdb.connect(database_path, read_only=True)
+    plays = pd.read_sql_query(PASS_PLAYS_QUERY.format(where='passer_player_name IS NOT NULL'), con=con)
+    con.close()
+
+    store = PlayStore.from_frame(plays, meta={'database': database_signature(database_path)})
+    store.save(store_dir)
+    index = LeagueIndex.from_store(store)
+    index.save(os.path.join(store_dir, 'league_index'))
+    DateRollup.from_index(index).save(os.path.join(store_dir, 'date_rollup'))
+    TendencyIndex.from_store(store, previous=load_previous_tendencies(previous_dir)).save(
+        os.path.join(store_dir, 'tendency_index'))
+
+    print(f"Exported {store.size} pass plays to {store_dir}")
+
+def load_previous_tendencies(previous_dir):
+    """
+    The tendency index of the published snapshot, or None if there is none
+    or it can't be read.
+    """
+    if previous_dir is None or not os.path.exists(os.path.join(previous_dir, 'meta.json')):
+        return None
+    try:
+        return TendencyIndex.load(previous_dir, mmap=False)
+    except (OSError, ValueError, KeyError) as e:
+        print(f"Warning: Could not load the previous tendency index: {e}")
+        return None
+
+def build_snapshot():
+    """
+    Build the database and columnar export in a new snapshot directory and
+    publish it through the manifest.
+
+    The snapshot is named for a hash of the source files and ETL_VERSION. It is
+    built under a temporary name and renamed into place before the manifest
+    is swapped, so running servers only ever see complete snapshots and
+    never contend for a lock on the database they are reading.
+
+    Returns:
+        str: The published data version
+    """
+    digest = content_hash(SOURCE_FILES, length=64, salt=f'etl-{ETL_VERSION}')
+    version = digest[:12]
+    current = read_manifest(MANIFEST_PATH)
+    snapshot_dir = os.path.join(SNAPSHOT_DIR, version)
+
+    if current is not None and current['version'] == version and os.path.isdir(snapshot_dir):
+        print(f"Data unchanged (version {version}); keeping the published snapshot")
+        return version
+
+    staging = snapshot_dir + '.building'
+    shutil.rmtree(staging, ignore_errors=True)
+    os.makedirs(staging)
+    setup_duckdb(os.path.join(staging, 'nfl.db'))
+    # The published snapshot's tendency index only needs the new weeks added
+    previous_dir = None
+    if current is not None:
+        previous_dir = os.path.join(snapshot_paths(current)[1], 'tendency_index')
+    export_shared_dataset(os.path.join(staging, 'nfl.db'), os.path.join(staging, 'columnar'), previous_dir)
+
+    shutil.rmtree(snapshot_dir, ignore_errors=True)
+    os.replace(staging, snapshot_dir)
+
+    data_root = os.path.dirname(os.path.abspath(MANIFEST_PATH))
+    write_manifest({
+        'version': version,
+        'database': os.path.relpath(os.path.join(snapshot_dir, 'nfl.db'), data_root),
+        'columnar': os.path.relpath(os.path.join(snapshot_dir, 'columnar'), data_root),
+        'sha256': digest,
+        'etl_version': ETL_VERSION,
+        'sources': [os.path.basename(path) for path in SOURCE_FILES if os.path.exists(path)],
+        'created': datetime.now().isoformat(timespec='seconds'),
+    }, MANIFEST_PATH)
+    print(f"Published data version {version}")
+
+    # Keep the previous snapshot too: servers may still be switching away
+    keep = {version} | ({current['version']} if current is not None else set())
+    prune_snapshots(keep, SNAPSHOT_DIR)
+    return version
+
 def main():
     """Main ETL function."""
     print("Starting NFL QB Passing Tendencies Data ETL...")
@@ -155,8 +312,9 @@ def main():
     # Save to parquet
     save_to_parquet(pbp_data, roster_data)
     
-    # Setup DuckDB
-    setup_duckdb()
+    # Build DuckDB and the memory-mapped dataset for multi-worker serving
+    # as a new snapshot, then publish it to running servers
+    build_snapshot()
     
     print(f"ETL completed at: {datetime.now()}")
     print("Data is ready for the dashboard!")
@@ -0,0 +1,52 @@
+"""
+Unit tests for registering league-wide callbacks as background jobs.
+"""
+
+import sys
+import pytest
+from scenes.utils.background_jobs import BackgroundJobs, make_manager, report_progress
+
+def heavy(qb_name, steps=2):
+    report_progress(1, steps)
+    return qb_name
+
+class TestBackgroundJobs:
+    """Test cases for the background callback options and job wrapper."""
+
+    def test_disabled_runs_in_request_thread(self):
+        jobs = BackgroundJobs(None)
+        assert jobs.options(progress=['p'], running=['r'], cancel=['c']) == {'running': ['r']}
+        assert jobs.job(heavy) is heavy
+        # Reporting outside a job does nothing
+        assert heavy('J.Allen') == 'J.Allen'
+
+    def test_job_reports_progress_and_runs_hooks(self):
+        calls = []
+        jobs = BackgroundJobs(object(), on_start=lambda: calls.append('start'),
+                              on_finish=lambda: calls.append('finish'))
+        options = jobs.options(progress=['p'], cancel=['c'])
+        assert options['background'] and options['progress'] == ['p'] and options['cancel'] == ['c']
+
+        job = jobs.job(heavy)
+        assert job(calls.append, 'J.Allen', steps=3) == 'J.Allen'
+        assert calls == ['start', [1, 3], 'finish']
+
+    def test_manager_modes(self, tmp_path, monkeypatch):
+        assert make_manager(str(tmp_path), 'off') == (None, None)
+
+        # Without diskcache, 'auto' runs callbacks in the request thread
+        monkeypatch.setitem(sys.modules, 'diskcache', None)
+        assert make_manager(str(tmp_path), 'auto') == (None, None)
+        with pytest.raises(RuntimeError):
+            make_manager(str(tmp_path), 'on')
+
+    def test_manager_with_diskcache(self, tmp_path):
+        pytest.importorskip('diskcache')
+        pytest.importorskip('multiprocess')
+        pytest.importorskip('psutil')
+        manager, cache = make_manager(str(tmp_path), 'auto')
+        assert manager is not None and cache is not None
+        cache.close()
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,118 @@
+"""
+Unit tests for the league-wide bitmap index.
+"""
+
+import pytest
+import pandas as pd
+import numpy as np
+from scenes.utils.bitmap_index import LeagueIndex
+from scenes.utils.columnar_store import PlayStore
+from scenes.utils.qb_shards import store_qb_shard
+
+def make_plays():
+    # Sorted by passer and date, the order the play store keeps rows in
+    return pd.DataFrame({
+        'passer_player_name': ['J.Allen', 'J.Allen', 'J.Allen', 'J.Hurts', 'J.Hurts', 'J.Hurts', 'P.Mahomes', 'P.Mahomes', 'P.Mahomes'],
+        'receiver_player_name': ['S.Diggs', None, 'S.Diggs', 'A.Brown', 'D.Smith', 'A.Brown', 'T.Kelce', 'T.Kelce', None],
+        'down': [1.0, 2.0, 2.0, np.nan, 4.0, 3.0, 3.0, 1.0, 1.0],
+        'air_yards': [5.0, 10.0, 30.0, 15.0, np.nan, 12.0, 22.0, -3.0, 8.0],
+        'pass_direction': ['N', 'NE', 'N', 'W', 'SW', 'E', 'E', 'N', 'S'],
+        'play_clock': [0, 5, 30, 20, 25, 40, 10, 15, 35],
+        'quarter_seconds_remaining': [900.0, 800.0, 300.0, 500.0, 400.0, 100.0, 700.0, np.nan, 200.0],
+        'game_date': ['2022-09-11', '2022-09-15', '2023-10-01', '2023-01-08', '2023-09-10', '2023-12-31', '2022-10-02', '2022-12-24', '2023-11-05'],
+        'season': [2022, 2022, 2023, 2022, 2023, 2023, 2022, 2022, 2023],
+        'week': [1, 2, 4, 18, 1, 17, 4, 16, 9],
+        'epa': [0.1, -0.3, 2.4, 0.5, -1.1, 0.2, 1.2, 0.0, 0.3],
+        'complete_pass': [1.0, 0.0, 1.0, 1.0, 0.0, 1.0, 1.0, 1.0, 0.0],
+        'posteam': ['BUF', 'BUF', 'BUF', 'PHI', 'PHI', 'PHI', 'KC', 'KC', 'KC'],
+        'defteam': ['MIA', 'NYJ', 'MIA', 'NYG', 'NE', 'DAL', 'LV', 'DEN', 'LAC'],
+        'distance': [10, 7, 8, 1, 5, 2, 3, 10, 10],
+        'pass_location_x': [20.0, 30.0, 80.0, 60.0, 70.0, 10.0, 40.0, 50.0, 90.0],
+        'pass_location_y': [10.0, 20.0, 22.0, 45.0, 12.0, 42.0, 30.0, 40.0, 32.0],
+        'pass_touchdown': [0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0],
+        'first_down_pass': [0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0],
+        'first_down': [0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0],
+    })
+
+class TestLeagueIndex:
+    """Test cases for bitmap index construction and filter resolution."""
+
+    def test_no_filters_selects_everything(self):
+        index = LeagueIndex.from_frame(make_plays())
+        assert index.rows(index.select()).tolist() == list(range(9))
+
+    def test_categorical_filters_or_within_and_across(self):
+        index = LeagueIndex.from_frame(make_plays())
+        bits = index.select(passer=['J.Allen', 'J.Hurts'], direction=['N', 'E'])
+        assert index.rows(bits).tolist() == [0, 2, 5]
+        assert index.count(index.select(receiver=['T.Kelce'])) == 2
+        assert index.count(index.select(down=[1])) == 3
+        assert index.count(index.select(passer=['Nobody'])) == 0
+
+    def test_depth_filter_matches_sql_ranges(self):
+        index = LeagueIndex.from_frame(make_plays())
+        assert index.rows(index.select(depth=['0-10 yd'])).tolist() == [0, 1, 8]
+        assert index.rows(index.select(depth=['10-20 yd', '20+ yd'])).tolist() == [1, 2, 3, 5, 6]
+
+    def test_range_filters(self):
+        index = LeagueIndex.from_frame(make_plays())
+        assert index.rows(index.select(play_clock=(5, 15))).tolist() == [1, 6, 7]
+        # Missing quarter time never matches a range
+        assert index.rows(index.select(quarter_seconds=(0, 900))).tolist() == [0, 1, 2, 3, 4, 5, 6, 8]
+        bits = index.select(game_date=('2022-09-15', '2023-01-08'))
+        assert index.rows(bits).tolist() == [1, 3, 6, 7]
+        bits = index.select(game_date=(None, '2022-09-14'))
+        assert index.rows(bits).tolist() == [0]
+
+    def test_week_and_filter_frame(self):
+        index = LeagueIndex.from_frame(make_plays())
+        frame = index.filter_frame(index.select(week=['2023-04']))
+        assert frame['passer_player_name'].tolist() == ['J.Allen']
+        assert frame['depth_bin'].tolist() == ['20+ yd']
+
+class TestSharedDataset:
+    """Test cases for the memory-mapped store and index round trip."""
+
+    def test_save_and_load_memory_mapped(self, tmp_path):
+        store = PlayStore.from_frame(make_plays(), meta={'database': {'size': 1}})
+        store.save(str(tmp_path))
+        LeagueIndex.from_store(store).save(str(tmp_path / 'league_index'))
+
+        loaded = PlayStore.load(str(tmp_path))
+        index = LeagueIndex.load(str(tmp_path / 'league_index'), loaded)
+        assert isinstance(loaded.columns['epa'], np.memmap)
+        assert loaded.meta == {'database': {'size': 1}}
+        assert index.rows(index.select(passer=['J.Hurts'], depth=['10-20 yd'])).tolist() == [3, 5]
+        assert index.rows(index.select(play_clock=(5, 15))).tolist() == [1, 6, 7]
+
+    def test_passer_slices_are_contiguous_views(self):
+        store = PlayStore.from_frame(make_plays())
+        assert store.passer_slice('J.Hurts') == slice(3, 6)
+        assert store.passer_slice('Nobody') == slice(0, 0)
+
+        shard = store_qb_shard(store, 'P.Mahomes')
+        assert shard.size == 3
+        assert shard.receivers == ['T.Kelce']
+        assert shard.columns['epa'].base is not None
+
+    def test_play_lookup_by_row_id(self):
+        plays = make_plays()
+        plays['game_id'] = [f'2022_{i:02d}_GAME' for i in range(len(plays))]
+        plays['play_id'] = np.arange(len(plays)) * 10 + 1
+        store = PlayStore.from_frame(plays)
+
+        play = store.play(4)
+        assert play['game_id'] == '2022_04_GAME'
+        assert play['play_id'] == 41
+        assert play['receiver_player_name'] == 'D.Smith'
+        assert play['air_yards'] is None
+        assert play['game_date'] == '2023-09-10'
+        assert store.play(len(plays)) is None
+
+        # Shard frames carry the row ids the field figure sends to the browser
+        frame = store_qb_shard(store, 'J.Hurts').to_frame()
+        assert frame['play_key'].tolist() == [3, 4, 5]
+        assert store.play(frame['play_key'].iloc[2])['defteam'] == 'DAL'
+
+if __name__ == "__main__":
+    pytest.main([__file__])
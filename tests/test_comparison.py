@@ -0,0 +1,50 @@
+"""
+Unit tests for the QB comparison small multiples.
+"""
+
+import pytest
+import numpy as np
+import pandas as pd
+from scenes.utils.comparison import (
+    compared_passers, field_multiples, grid_shape, lineplot_multiples, playclock_matrix, rose_multiples
+)
+
+class TestComparison:
+    """Test cases for splitting grouped results into panels."""
+
+    def test_compared_passers(self):
+        assert compared_passers(None) == []
+        assert compared_passers(['A', 'B', 'A', None, 'C'], limit=2) == ['A', 'B']
+
+    def test_grid_shape(self):
+        assert grid_shape(1) == (1, 1)
+        assert grid_shape(3) == (1, 3)
+        assert grid_shape(5) == (2, 3)
+
+    def test_playclock_matrix(self):
+        counts = pd.DataFrame({'passer': ['A', 'A', 'B', 'Z'], 'bin': [0, 2, 1, 0], 'plays': [1, 3, 2, 9]})
+        shares = playclock_matrix(['B', 'A', 'C'], counts, n_bins=3)
+        assert shares.tolist() == [[0, 1, 0], [0.25, 0, 0.75], [0, 0, 0]]
+
+    def test_panels_per_passer(self):
+        passers = ['A', 'B', 'C', 'D']
+        cells = pd.DataFrame({'passer': ['A', 'C'], 'cell_x': [3, 4], 'cell_y': [2, 5], 'passes': [7, 2]})
+        field = field_multiples(passers, cells)
+        assert len(field.data) == 4
+        assert np.asarray(field.data[0].z)[2, 3] == 7 and np.asarray(field.data[1].z).sum() == 0
+        # Every panel gets its own field outline
+        assert {shape.xref for shape in field.layout.shapes} == {'x', 'x2', 'x3', 'x4'}
+
+        receivers = pd.DataFrame({'passer': ['A'] * 3, 'Receiver': ['R'] * 3,
+                                  'Play Outcome': ['No First Down', 'First Down', 'Touchdown'],
+                                  'Frequency': [1, 2, 3]})
+        rose = rose_multiples(passers, receivers)
+        assert [trace.name for trace in rose.data] == ['No First Down', 'First Down', 'Touchdown']
+        assert rose.layout.polar.radialaxis.range == pytest.approx((0, 6.6))
+
+        lines = lineplot_multiples(passers, np.eye(4, 8))
+        # Each panel draws the other three QBs and its own
+        assert len(lines.data) == 16
+
+if __name__ == "__main__":
+    pytest.main([__file__])
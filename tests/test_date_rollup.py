@@ -0,0 +1,86 @@
+"""
+Unit tests for the date-range prefix sums.
+"""
+
+import pytest
+import numpy as np
+from scenes.utils.bitmap_index import LeagueIndex
+from scenes.utils.date_rollup import (
+    BASELINE_FILTERS, DateRollup, covers, pass_stats, playclock_shares, rose_frame
+)
+from scenes.utils.prerender import DEFAULT_VIEW
+from scenes.utils.qb_helpers import aggregate_playclock
+
+from test_bitmap_index import make_plays
+
+RANGES = [(None, None), ('2022-09-11', '2022-09-15'), ('2023-01-01T00:00:00', '2023-12-31'),
+          ('2023-10-01', '2023-10-01'), ('2023-05-01', '2023-04-01')]
+
+class TestDateRollup:
+    """Test cases for prefix sums matching the bitmap index's aggregations."""
+
+    def test_totals_match_filtered_plays(self, tmp_path):
+        plays = make_plays()
+        plays.loc[1, 'complete_pass'] = None
+        index = LeagueIndex.from_frame(plays)
+        DateRollup.from_index(index).save(str(tmp_path / 'rollup'))
+        rollup = DateRollup.load(str(tmp_path / 'rollup'), index.store)
+
+        for start_date, end_date in RANGES:
+            df = index.filter_frame(index.select(**BASELINE_FILTERS, game_date=(start_date, end_date)))
+            totals = rollup.passer_totals(start_date, end_date)
+            assert totals['attempts'].to_dict() == df.groupby('passer_player_name').size().to_dict()
+
+            stats = pass_stats(rollup.passer_splits(start_date, end_date))
+            career = stats[stats['split'] == 'career']
+            expected = df.groupby('passer_player_name')['epa'].mean()
+            assert np.allclose(career['Avg EPA/Play'], expected.to_numpy())
+            # Plays without a known completion are left out, as in pass_stats_splits
+            expected = df.groupby('passer_player_name')['complete_pass'].mean()
+            assert np.allclose(career['Completion %'], expected.to_numpy(), equal_nan=True)
+
+            passers, shares, sample_shares = playclock_shares(totals)
+            expected_passers, expected_shares, expected_sample = aggregate_playclock(df)
+            assert passers == expected_passers
+            assert np.array_equal(shares, expected_shares) and np.array_equal(sample_shares, expected_sample)
+
+    def test_season_and_team_splits(self):
+        plays = make_plays()
+        plays.loc[2, 'posteam'] = 'NYJ'
+        rollup = DateRollup.from_index(LeagueIndex.from_frame(plays))
+        splits = rollup.passer_splits()
+        allen = splits[splits['Player'] == 'J.Allen']
+        assert allen['split'].tolist() == ['career', 'season', 'season', 'team', 'team']
+        assert allen['Season'].tolist()[1:3] == [2022, 2023]
+        assert allen['Team'].tolist()[3:] == ['BUF', 'NYJ']
+        assert allen['attempts'].tolist() == [3, 2, 1, 2, 1]
+
+        splits = rollup.passer_splits('2023-01-01', None)
+        assert splits[splits['Player'] == 'J.Allen']['attempts'].tolist() == [1, 1, 1]
+
+    def test_receiver_outcomes_by_date(self):
+        rollup = DateRollup.from_index(LeagueIndex.from_frame(make_plays()))
+        # The incompletion to nobody and the untargeted play don't count
+        receivers, counts = rollup.receiver_outcomes('J.Allen')
+        assert receivers == ['S.Diggs'] and counts.tolist() == [[2, 0, 0]]
+        receivers, counts = rollup.receiver_outcomes('J.Allen', '2023-01-01', None)
+        assert receivers == ['S.Diggs'] and counts.tolist() == [[1, 0, 0]]
+        assert rollup.receiver_outcomes('J.Allen', '2024-01-01', None)[0] == []
+        assert rollup.receiver_outcomes('Nobody')[0] == []
+
+    def test_rose_frame_folds_past_top_k(self):
+        counts = np.array([[1, 0, 0], [2, 1, 0], [2, 0, 1]])
+        frame = rose_frame(['C', 'B', 'A'], counts, top_k=2)
+        assert frame['Receiver'].tolist() == ['A'] * 3 + ['B'] * 3 + ['Other'] * 3
+        assert frame['Frequency'].tolist() == [2, 0, 1, 2, 1, 0, 1, 0, 0]
+
+    def test_covers_only_default_filters(self):
+        view = {name: DEFAULT_VIEW[name] for name in ('playclock_filter', 'time_filter', 'depth_filter',
+                                                       'down_filter', 'direction_filter')}
+        assert covers({**view, 'start_date': '2023-01-01', 'end_date': '2023-01-08'})
+        assert covers({**view, 'receiver_filter': ['S.Diggs']}, receivers=['S.Diggs'])
+        assert not covers({**view, 'down_filter': [3, 4]})
+        assert not covers({**view, 'playclock_filter': [0, 20]})
+
+if __name__ == "__main__":
+    pytest.main([__file__])
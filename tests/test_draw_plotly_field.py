@@ -0,0 +1,61 @@
+"""
+Unit tests for the field scatter trace factory.
+"""
+
+import pytest
+import numpy as np
+import plotly.graph_objects as go
+from scenes.utils.drawPlotlyField import add_field_scatter, field_scatter_trace, thin_by_density
+
+def crowded_field(n_crowded=5000, n_sparse=50):
+    # A crowded pocket plus a few throws spread over the field
+    rng = np.random.default_rng(1)
+    x = np.concatenate([rng.normal(120, 3, n_crowded), np.linspace(200, 340, n_sparse)])
+    y = np.concatenate([rng.normal(80, 3, n_crowded), np.linspace(5, 155, n_sparse)])
+    return x, y
+
+class TestFieldScatter:
+    """Test cases for WebGL selection and density thinning."""
+
+    def test_trace_type_follows_point_count(self):
+        assert isinstance(field_scatter_trace([1, 2], [1, 2], gl_threshold=3), go.Scatter)
+        assert isinstance(field_scatter_trace([1, 2, 3], [1, 2, 3], gl_threshold=3), go.Scattergl)
+        assert isinstance(field_scatter_trace([1, 2, 3], [1, 2, 3], gl_threshold=0), go.Scatter)
+
+    def test_thinning_keeps_sparse_points(self):
+        x, y = crowded_field()
+        keep = thin_by_density(x, y, max_points=1000)
+        assert len(keep) <= 1000 and np.all(np.diff(keep) > 0)
+        # Every one of the spread-out throws survives
+        assert set(range(5000, 5050)) <= set(keep.tolist())
+        assert np.array_equal(keep, thin_by_density(x, y, max_points=1000))
+
+    def test_thinning_handles_missing_coordinates(self):
+        x, y = crowded_field(n_crowded=200, n_sparse=0)
+        x[:50] = np.nan
+        keep = thin_by_density(x, y, max_points=100)
+        assert 0 < len(keep) <= 100
+        assert len(thin_by_density(x, y, max_points=500)) == 200
+
+    def test_missing_coordinates_do_not_share_the_first_cell(self):
+        # A few throws in the corner cell and many without (or below zero) coordinates
+        x = np.concatenate([np.full(10, 1.0), np.full(190, np.nan), np.full(10, -0.5)])
+        y = np.full(210, 1.0)
+        keep = thin_by_density(x, y, max_points=110)
+        # The corner cell keeps all of its throws; the extra cell is capped
+        assert set(range(10)) <= set(keep.tolist()) and len(keep) == 110
+
+    def test_customdata_thinned_with_points(self):
+        x, y = crowded_field()
+        ids = np.arange(len(x))
+        trace = field_scatter_trace(x, y, customdata=ids, max_points=1000, mode='markers')
+        assert len(trace.x) == len(trace.customdata) <= 1000
+        assert np.array_equal(np.asarray(trace.x), x[np.asarray(trace.customdata)])
+
+    def test_add_field_scatter_uses_factory(self):
+        x, y = crowded_field()
+        fig = add_field_scatter(go.Figure(), x, y, max_points=2000, gl_threshold=1000)
+        assert fig.data[0].type == 'scattergl' and len(fig.data[0].x) <= 2000
+
+if __name__ == "__main__":
+    pytest.main([__file__])
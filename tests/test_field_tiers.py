@@ -0,0 +1,75 @@
+"""
+Unit tests for the field heatmap tiers.
+"""
+
+import base64
+import struct
+import zlib
+
+import pytest
+import numpy as np
+import plotly.graph_objects as go
+from scenes.utils.field_tiers import (
+    COARSE_BINS, FINE_BINS, RASTER_SIZE, coarse_trace, density_grid, field_coordinates, figure_tier,
+    fine_trace, raster_image
+)
+
+def decode_png(source):
+    # Just enough of PNG for unfiltered 8-bit RGBA from encode_png
+    png = base64.b64decode(source.split(',', 1)[1])
+    assert png[:8] == b'\x89PNG\r\n\x1a\n'
+    width, height = struct.unpack('>II', png[16:24])
+    length = struct.unpack('>I', png[33:37])[0]
+    assert png[37:41] == b'IDAT'
+    scanlines = np.frombuffer(zlib.decompress(png[41:41 + length]), dtype=np.uint8)
+    return scanlines.reshape(height, width * 4 + 1)[:, 1:].reshape(height, width, 4)
+
+class TestFieldTiers:
+    """Test cases for binning pass locations into tiers."""
+
+    def test_field_coordinates_in_feet(self):
+        x, y = field_coordinates([0, 50, np.nan], [0, 26.65, 10])
+        assert x[:2].tolist() == [30, 180] and np.isnan(x[2])
+        assert np.allclose(y, [0, 79.95, 30])
+
+    def test_density_grid_counts_every_finite_point(self):
+        x = np.array([5, 6, 355, np.nan, 100])
+        y = np.array([5, 6, 155, 10, np.nan])
+        x_centres, y_centres, counts = density_grid(x, y, COARSE_BINS)
+        assert counts.shape == (COARSE_BINS[1], COARSE_BINS[0])
+        assert len(x_centres) == COARSE_BINS[0] and len(y_centres) == COARSE_BINS[1]
+        assert counts.sum() == 3
+        assert counts[0, 0] == 2 and counts[-1, -1] == 1
+
+    def test_tiers_bin_the_same_points(self):
+        rng = np.random.default_rng(0)
+        x, y = rng.uniform(30, 330, 500), rng.uniform(0, 160, 500)
+        coarse, fine = coarse_trace(x, y), fine_trace(x, y)
+        assert np.asarray(coarse.z).sum() == np.asarray(fine.z).sum() == 500
+        assert np.asarray(fine.z).shape == (FINE_BINS[1], FINE_BINS[0])
+
+    def test_raster_covers_the_field(self):
+        image = raster_image([45, 45, 45, 300], [10, 10, 10, 150])
+        assert (image['x'], image['y'], image['sizex'], image['sizey']) == (0, 160, 360, 160)
+        pixels = decode_png(image['source'])
+        assert pixels.shape == (RASTER_SIZE[1], RASTER_SIZE[0], 4)
+        # Top row first: y=10 ft is near the bottom of the image
+        crowded, single = pixels[160 - 1 - 10, 45], pixels[160 - 1 - 150, 300]
+        assert crowded[3] > single[3] > 0
+        assert (pixels[..., 3] > 0).sum() == 2
+
+    def test_raster_size_is_bounded(self):
+        rng = np.random.default_rng(0)
+        sizes = [len(raster_image(rng.uniform(0, 360, n), rng.uniform(0, 160, n))['source'])
+                 for n in (10, 100000)]
+        assert sizes[1] < RASTER_SIZE[0] * RASTER_SIZE[1] * 4
+        assert decode_png(raster_image([], [])['source'])[..., 3].max() == 0
+
+    def test_figure_tier(self):
+        assert figure_tier({'data': [], 'layout': {'meta': {'tier': 'coarse'}}}) == 'coarse'
+        assert figure_tier(go.Figure(layout={'meta': {'tier': 'full'}})) == 'full'
+        assert figure_tier(go.Figure()) is None
+        assert figure_tier({'data': []}) is None
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,67 @@
+"""
+Unit tests for compact figure serialization.
+"""
+
+import base64
+import pytest
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+from scenes.utils.figure_payload import FigureCompactor
+
+def make_figure(n=10):
+    customdata = np.stack((
+        np.array(['A.Smith'] * n, dtype=object),
+        np.linspace(0, 1, n) / 3,
+        pd.Series(pd.date_range('2023-09-10', periods=n)).dt.strftime('%Y-%m-%d'),
+        np.arange(n),
+    ), axis=-1)
+    return go.Figure(go.Scatter(
+        x=np.linspace(0, 100, n) / 3, y=np.arange(n, dtype=float),
+        customdata=customdata,
+        hovertemplate='%{customdata[3]} %{customdata[1]}',
+    ))
+
+class TestFigureCompactor:
+    """Test cases for rounding, customdata pruning and budgets."""
+
+    def test_rounds_and_prunes_customdata(self):
+        compactor = FigureCompactor(precision=2, typed_arrays=False)
+        figure, size, thinned = compactor.compact(make_figure())
+        trace = figure['data'][0]
+        assert not thinned
+        assert trace['x'][1] == 3.7
+        # Kept columns keep their relative order; references are renumbered
+        assert trace['customdata'][3] == [0.11, 3.0]
+        assert trace['hovertemplate'] == '%{customdata[1]} %{customdata[0]}'
+
+    def test_drops_customdata_without_template(self):
+        fig = make_figure()
+        fig.update_traces(hovertemplate=None)
+        figure, _, _ = FigureCompactor(typed_arrays=False).compact(fig)
+        assert 'customdata' not in figure['data'][0]
+
+    def test_keeps_one_dimensional_ids(self):
+        fig = go.Figure(go.Scatter(x=[1.0, 2.0], y=[3.0, 4.0], customdata=np.array([10, 11], dtype=np.int64),
+                                   hovertemplate='Click for details'))
+        figure, _, _ = FigureCompactor(typed_arrays=False).compact(fig)
+        assert figure['data'][0]['customdata'] == [10, 11]
+
+    def test_typed_arrays(self):
+        figure, _, _ = FigureCompactor(precision=3, typed_arrays=True).compact(make_figure())
+        y = figure['data'][0]['y']
+        assert y['dtype'] == 'f4'
+        assert np.frombuffer(base64.b64decode(y['bdata']), dtype=np.float32).tolist() == list(range(10))
+
+    def test_budget_thins_point_traces(self):
+        compactor = FigureCompactor(budget_bytes=20000, typed_arrays=False)
+        decorated = compactor.compact_outputs('field')(lambda: (make_figure(5000), []))
+        figure, records = decorated()
+        assert records == []
+        assert 500 <= len(figure['data'][0]['x']) < 5000
+        assert len(figure['data'][0]['customdata']) == len(figure['data'][0]['x'])
+        stats = compactor.stats.snapshot()['field[0]']
+        assert stats['responses'] == 1 and stats['downsampled'] == 1
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,80 @@
+"""
+Unit tests for response compression and version-keyed validators.
+"""
+
+import gzip
+import json
+
+import pytest
+from flask import Flask, Response
+from scenes.utils.http_cache import ResponseOptimizer, classify
+
+def make_client(version):
+    server = Flask(__name__)
+    body = json.dumps({'data': [{'x': list(range(500))}]})
+
+    @server.route('/_dash-layout')
+    def layout():
+        return Response(body, mimetype='application/json')
+
+    @server.route('/_dash-update-component', methods=['POST'])
+    def update():
+        return Response(body, mimetype='application/json')
+
+    @server.route('/health')
+    def health():
+        return Response(body, mimetype='application/json')
+
+    optimizer = ResponseOptimizer(version=lambda: version['current'], min_size=256)
+    optimizer.init_app(server)
+    return server.test_client(), body, optimizer
+
+class TestResponseOptimizer:
+    """Test cases for compression, conditional requests and stats."""
+
+    def test_classify(self):
+        assert classify('/_dash-update-component') == 'callback'
+        assert classify('/_dash-dependencies') == 'layout'
+        assert classify('/assets/mystyle.css') == 'asset'
+        assert classify('/dashboard') == 'page'
+        assert classify('/health') == 'other'
+        assert classify('/popularity') == 'other'
+        assert classify('/app/dashboard', prefix='/app/') == 'page'
+
+    def test_gzip_when_accepted(self):
+        client, body, optimizer = make_client({'current': 'v1'})
+        response = client.post('/_dash-update-component', headers={'Accept-Encoding': 'gzip'})
+        assert response.headers['Content-Encoding'] == 'gzip'
+        assert 'Accept-Encoding' in response.headers['Vary']
+        assert gzip.decompress(response.data).decode() == body
+
+        plain = client.post('/_dash-update-component')
+        assert 'Content-Encoding' not in plain.headers
+        assert optimizer.stats()['callback']['bytes_saved'] > 0
+
+    def test_other_routes_untouched(self):
+        client, _, _ = make_client({'current': 'v1'})
+        response = client.get('/health', headers={'Accept-Encoding': 'gzip'})
+        assert 'Content-Encoding' not in response.headers
+        assert 'ETag' not in response.headers
+
+    def test_etag_revalidation_follows_data_version(self):
+        version = {'current': 'v1'}
+        client, _, optimizer = make_client(version)
+        first = client.get('/_dash-layout', headers={'Accept-Encoding': 'gzip'})
+        etag = first.headers['ETag']
+        assert etag.startswith('W/"v1-')
+        assert first.headers['Cache-Control'] == 'no-cache'
+
+        repeat = client.get('/_dash-layout', headers={'If-None-Match': etag})
+        assert repeat.status_code == 304
+        assert repeat.data == b''
+        assert optimizer.stats()['layout']['not_modified'] == 1
+
+        version['current'] = 'v2'
+        changed = client.get('/_dash-layout', headers={'If-None-Match': etag})
+        assert changed.status_code == 200
+        assert changed.headers['ETag'] != etag
+
+if __name__ == "__main__":
+    pytest.main([__file__])
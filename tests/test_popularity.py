@@ -0,0 +1,86 @@
+"""
+Unit tests for popularity tracking and background cache warming.
+"""
+
+import pytest
+from flask import Flask
+from scenes.utils.popularity import PopularityTracker, CacheWarmer
+
+class TestPopularity:
+    """Test cases for request counting and warming passes."""
+
+    def test_counts_persist_across_trackers(self, tmp_path):
+        path = str(tmp_path / 'popularity.sqlite')
+        tracker = PopularityTracker(path)
+        figure = tracker.track('figure', unordered=('depth_filter',))(lambda qb_name, depth_filter: qb_name)
+
+        figure('J.Allen', ['20+ yd', '0-10 yd'])
+        figure('J.Allen', ['0-10 yd', '20+ yd'])
+        figure('J.Hurts', [])
+        tracker.flush()
+
+        # Another worker (or a restart) sees the same counts and adds to them
+        other = PopularityTracker(path)
+        other.record('figure', {'qb_name': 'J.Hurts', 'depth_filter': []})
+        top = {(name, arguments['qb_name'], tuple(arguments['depth_filter'])): count
+               for name, arguments, count in other.top(5)}
+        assert top == {('figure', 'J.Allen', ('0-10 yd', '20+ yd')): 2, ('figure', 'J.Hurts', ()): 2}
+
+    def test_keeps_most_requested_entries(self, tmp_path):
+        tracker = PopularityTracker(str(tmp_path / 'popularity.sqlite'), max_entries=2)
+        for qb_name, requests in [('A', 3), ('B', 1), ('C', 2)]:
+            for _ in range(requests):
+                tracker.record('figure', {'qb_name': qb_name})
+        assert [arguments['qb_name'] for _, arguments, _ in tracker.top(5)] == ['A', 'C']
+
+    def test_warm_pass_replays_top_states_untracked(self, tmp_path):
+        tracker = PopularityTracker(str(tmp_path / 'popularity.sqlite'))
+        replayed = []
+        figure = tracker.track('figure')(lambda qb_name: replayed.append(qb_name))
+        for qb_name in ['J.Allen', 'J.Allen', 'J.Hurts', 'P.Mahomes']:
+            figure(qb_name)
+        replayed.clear()
+
+        warmer = CacheWarmer(tracker, version=lambda: 'v1', top_n=2, idle_seconds=0, pause=0)
+        warmer.warm_pass('v1')
+        assert replayed[0] == 'J.Allen' and len(replayed) == 2
+        assert warmer.last_pass['warmed'] == 2
+        # Replays don't count as requests
+        assert tracker.top(1)[0][2] == 2
+
+    def test_idle_time_is_shared_by_workers(self, tmp_path):
+        path = str(tmp_path / 'popularity.sqlite')
+        server = Flask(__name__)
+        worker = PopularityTracker(path)
+        worker.init_app(server)
+        seen = []
+
+        @server.route('/_dash-update-component', methods=['POST'])
+        def update():
+            # Another worker's warmer sees the request while it runs
+            seen.append(PopularityTracker(path).idle_for())
+            return ''
+
+        @server.route('/health')
+        def health():
+            return ''
+
+        warmer_side = PopularityTracker(path)
+        assert warmer_side.idle_for() > 60
+        server.test_client().post('/_dash-update-component')
+        assert seen == [0.0]
+        assert warmer_side.idle_for() < 5
+
+        # Health checks don't keep the server busy
+        server.test_client().get('/health')
+        assert warmer_side._activity_connection().execute("SELECT SUM(active) FROM activity").fetchone()[0] == 0
+
+    def test_one_warmer_per_lock_file(self, tmp_path):
+        tracker = PopularityTracker(str(tmp_path / 'popularity.sqlite'))
+        first = CacheWarmer(tracker, version=lambda: 'v1')
+        second = CacheWarmer(tracker, version=lambda: 'v1')
+        assert first._acquire()
+        assert not second._acquire()
+
+if __name__ == "__main__":
+    pytest.main([__file__])
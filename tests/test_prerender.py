@@ -0,0 +1,88 @@
+"""
+Unit tests for the prerendered default-view store.
+"""
+
+import os
+import pytest
+from scenes.utils.prerender import DEFAULT_VIEW, PrerenderStore, is_default_view
+
+def build_figure(qb_name, depth_filter=None, start_date=None, calls=None):
+    calls.append(qb_name)
+    return {'data': [{'name': qb_name}]}
+
+class TestPrerender:
+    """Test cases for default-view detection and the per-passer store."""
+
+    def test_default_view_detection(self):
+        view = dict(DEFAULT_VIEW, qb_name='J.Allen')
+        assert is_default_view(view)
+        assert is_default_view(dict(view, depth_filter=['20+ yd', '10-20 yd', '0-10 yd']))
+        assert is_default_view(dict(view, start_date='2022-09-01T00:00:00'))
+        assert not is_default_view(dict(view, depth_filter=['20+ yd']))
+        assert not is_default_view(dict(view, lineplot_mode='peers'))
+
+        # Every receiver selected is the same view as no receiver filter
+        assert is_default_view(dict(view, receiver_filter=[]))
+        assert is_default_view(dict(view, receiver_filter=['B', 'A']), receivers=['A', 'B'])
+        assert not is_default_view(dict(view, receiver_filter=['A']), receivers=['A', 'B'])
+
+    def test_serves_default_views_for_current_version(self, tmp_path):
+        version = {'current': 'v1'}
+        store = PrerenderStore(str(tmp_path), version=lambda: version['current'])
+        store.save('J.Allen', {'figure': {'data': [{'name': 'prerendered'}]}})
+
+        calls = []
+        served = store.serve('figure')(build_figure)
+        default = dict(depth_filter=DEFAULT_VIEW['depth_filter'], start_date='2022-09-01', calls=calls)
+        assert served('J.Allen', **default)['data'][0]['name'] == 'prerendered'
+        assert served('J.Hurts', **default)['data'][0]['name'] == 'J.Hurts'
+        assert served('J.Allen', depth_filter=['0-10 yd'], calls=calls)['data'][0]['name'] == 'J.Allen'
+        assert calls == ['J.Hurts', 'J.Allen']
+
+        version['current'] = 'v2'
+        assert served('J.Allen', **default)['data'][0]['name'] == 'J.Allen'
+
+    def test_prune_keeps_one_version(self, tmp_path):
+        store = PrerenderStore(str(tmp_path))
+        store.save('J.Allen', {}, version='v1')
+        store.save('J.Allen', {}, version='v2')
+        store.prune(keep='v2')
+        assert [path.name for path in tmp_path.iterdir()] == ['v2']
+
+    def test_prune_can_keep_the_previous_version(self, tmp_path):
+        store = PrerenderStore(str(tmp_path))
+        for number, version in enumerate(['v1', 'v2', 'v3']):
+            store.save('J.Allen', {}, version=version)
+            os.utime(tmp_path / version, (number, number))
+        store.prune(keep='v3', previous=1)
+        assert sorted(path.name for path in tmp_path.iterdir()) == ['v2', 'v3']
+
+    def test_defaults_match_dashboard(self):
+        from scenes.dashboard import dashboard_page
+
+        def component_props(node, found):
+            if hasattr(node, 'to_plotly_json'):
+                props = node.to_plotly_json()['props']
+                if isinstance(props.get('id'), str):
+                    found[props['id']] = props
+                children = props.get('children')
+                for child in children if isinstance(children, (list, tuple)) else [children]:
+                    component_props(child, found)
+            return found
+
+        props = component_props(dashboard_page, {})
+        assert props['pass-detail-filter']['value'] == DEFAULT_VIEW['pass_detail']
+        assert props['playclock-filter']['value'] == DEFAULT_VIEW['playclock_filter']
+        assert props['time-filter']['value'] == DEFAULT_VIEW['time_filter']
+        assert props['depth-filter']['value'] == DEFAULT_VIEW['depth_filter']
+        assert props['down-filter']['value'] == DEFAULT_VIEW['down_filter']
+        assert props['direction-filter']['value'] == DEFAULT_VIEW['direction_filter']
+        assert str(props['date-filter']['start_date']) == DEFAULT_VIEW['start_date']
+        assert str(props['date-filter']['end_date']) == DEFAULT_VIEW['end_date']
+        assert props['tooltips-toggle']['on'] == DEFAULT_VIEW['isTooltips_on']
+        assert props['rose-toggle']['value'] == DEFAULT_VIEW['rosetype_toggle']
+        assert props['lineplot-mode']['value'] == DEFAULT_VIEW['lineplot_mode']
+        assert props['sankey-stage']['value'] == DEFAULT_VIEW['sankey_stage']
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,93 @@
+"""
+Unit tests for the per-QB columnar shard engine.
+"""
+
+import pytest
+import pandas as pd
+import numpy as np
+from scenes.utils.qb_shards import QBShard, ShardCache
+
+def make_plays():
+    return pd.DataFrame({
+        'receiver_player_name': ['A.Smith', 'B.Jones', None, 'A.Smith', 'C.Brown'],
+        'air_yards': [5.0, 10.0, np.nan, 25.0, -2.0],
+        'down': [1.0, 2.0, 3.0, np.nan, 4.0],
+        'distance': [10, 7, 3, 10, 1],
+        'game_date': ['2022-09-11', '2022-10-02', '2022-11-20', '2023-09-10', '2023-12-31'],
+        'play_clock': [0, 10, 20, 30, 40],
+        'quarter_seconds_remaining': [900.0, 600.0, 300.0, 100.0, 0.0],
+        'pass_location_x': [20.0, 30.0, 40.0, 50.0, 60.0],
+        'pass_location_y': [10.0, 20.0, 30.0, 40.0, 45.0],
+        'pass_direction': ['N', 'NE', 'E', 'N', 'W'],
+        'posteam': ['BUF'] * 5,
+        'defteam': ['MIA', 'NYJ', 'NE', 'MIA', 'NE'],
+        'epa': [0.5, -0.2, 1.1, 3.4, -1.0],
+        'complete_pass': [1.0, 0.0, 1.0, 1.0, 0.0],
+        'pass_touchdown': [0.0, 0.0, 0.0, 1.0, 0.0],
+        'first_down_pass': [1.0, 0.0, 0.0, 1.0, 0.0],
+        'first_down': [1.0, 0.0, 0.0, 1.0, 0.0],
+    })
+
+class TestQBShard:
+    """Test cases for QBShard filter evaluation."""
+
+    def test_compact_dtypes(self):
+        shard = QBShard.from_frame('J.Allen', make_plays())
+        assert shard.columns['receiver'].dtype == np.int8
+        assert shard.columns['air_yards'].dtype == np.float32
+        assert shard.receivers == ['A.Smith', 'B.Jones', 'C.Brown']
+        assert shard.columns['receiver'][2] == -1
+
+    def test_empty_filters_keep_every_row(self):
+        shard = QBShard.from_frame('J.Allen', make_plays())
+        assert shard.mask(down_filter=[], depth_filter=[], receiver_filter=[]).all()
+
+    def test_depth_filter_matches_sql_ranges(self):
+        shard = QBShard.from_frame('J.Allen', make_plays())
+        # BETWEEN is inclusive, so a 10 yard pass is in both bins; NaN and
+        # negative air yards match no bin
+        assert shard.mask(depth_filter=['0-10 yd']).tolist() == [True, True, False, False, False]
+        assert shard.mask(depth_filter=['10-20 yd']).tolist() == [False, True, False, False, False]
+        assert shard.mask(depth_filter=['20+ yd']).tolist() == [False, False, False, True, False]
+
+    def test_categorical_filters(self):
+        shard = QBShard.from_frame('J.Allen', make_plays())
+        assert shard.mask(receiver_filter=['A.Smith', 'Unknown']).tolist() == [True, False, False, True, False]
+        assert shard.mask(direction_filter=['N']).tolist() == [True, False, False, True, False]
+        assert shard.mask(down_filter=[1, 4]).tolist() == [True, False, False, False, True]
+
+    def test_range_filters(self):
+        shard = QBShard.from_frame('J.Allen', make_plays())
+        assert shard.mask(playclock_filter=[10, 30]).tolist() == [False, True, True, True, False]
+        assert shard.mask(time_filter=[0, 900]).all()
+        assert shard.mask(time_filter=[100, 600]).tolist() == [False, True, True, True, False]
+        assert shard.mask(start_date='2022-10-01', end_date='2023-09-10').tolist() == [False, True, True, True, False]
+
+    def test_to_frame(self):
+        shard = QBShard.from_frame('J.Allen', make_plays())
+        df = shard.to_frame(shard.mask(receiver_filter=['A.Smith']))
+        assert df['receiver_player_name'].tolist() == ['A.Smith', 'A.Smith']
+        assert df['play_outcome_bin'].tolist() == ['First Down', 'Touchdown']
+        assert (df['passer_player_name'] == 'J.Allen').all()
+
+class TestShardCache:
+    """Test cases for the shard LRU."""
+
+    def test_evicts_least_recently_used(self):
+        loads = []
+
+        def fake_loader(passer):
+            loads.append(passer)
+            return QBShard.from_frame(passer, make_plays())
+
+        cache = ShardCache(fake_loader, maxsize=2)
+        cache.get('A')
+        cache.get('B')
+        cache.get('A')
+        cache.get('C')
+        cache.get('A')
+        assert loads == ['A', 'B', 'C']
+        assert len(cache) == 2
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,88 @@
+"""
+Unit tests for the disk-backed result cache.
+"""
+
+import pytest
+import plotly.graph_objects as go
+from scenes.utils.result_cache import ResultCache, uncached
+
+class TestResultCache:
+    """Test cases for memoization, versioning and eviction."""
+
+    def test_memoize_survives_new_instances(self, tmp_path):
+        path = str(tmp_path / 'results.sqlite')
+        calls = []
+
+        def build(qb_name, depth_filter):
+            calls.append(qb_name)
+            return go.Figure(go.Scatter(x=[1, 2], y=[3, 4], name=qb_name))
+
+        cached = ResultCache(path, version=lambda: 'v1').memoize('figure', unordered=('depth_filter',))(build)
+        first = cached('J.Allen', ['0-10 yd', '20+ yd'])
+        assert isinstance(first, go.Figure)
+
+        # A second cache over the same file (another worker, or a restart)
+        cached = ResultCache(path, version=lambda: 'v1').memoize('figure', unordered=('depth_filter',))(build)
+        second = cached('J.Allen', ['20+ yd', '0-10 yd'])
+        assert second['data'][0]['name'] == 'J.Allen'
+        assert calls == ['J.Allen']
+
+    def test_data_version_is_part_of_the_key(self, tmp_path):
+        version = {'current': 'v1'}
+        cache = ResultCache(str(tmp_path / 'results.sqlite'), version=lambda: version['current'])
+        calls = []
+        cached = cache.memoize('records')(lambda qb_name: calls.append(qb_name) or [{'Player': qb_name}])
+
+        assert cached('J.Allen') == [{'Player': 'J.Allen'}]
+        assert cached('J.Allen') == [{'Player': 'J.Allen'}]
+        version['current'] = 'v2'
+        cached('J.Allen')
+        assert calls == ['J.Allen', 'J.Allen']
+
+    def test_disabled_without_version(self, tmp_path):
+        cache = ResultCache(str(tmp_path / 'results.sqlite'), version=lambda: None)
+        calls = []
+        cached = cache.memoize('records')(lambda qb_name: calls.append(qb_name) or [])
+        cached('J.Allen')
+        cached('J.Allen')
+        assert calls == ['J.Allen', 'J.Allen']
+        assert cache.stats()['entries'] == 0
+
+    def test_uncached_results_are_not_stored(self, tmp_path):
+        cache = ResultCache(str(tmp_path / 'results.sqlite'), version=lambda: 'v1')
+        calls = []
+
+        def build(qb_name):
+            calls.append(qb_name)
+            return uncached([]) if len(calls) == 1 else [{'Player': qb_name}]
+
+        cached = cache.memoize('records')(build)
+        assert cached('J.Allen') == []
+        assert cached('J.Allen') == [{'Player': 'J.Allen'}]
+        assert cached('J.Allen') == [{'Player': 'J.Allen'}]
+        assert calls == ['J.Allen', 'J.Allen']
+
+    def test_stored_version_matches_the_key(self, tmp_path):
+        version = {'current': 'v1'}
+        cache = ResultCache(str(tmp_path / 'results.sqlite'), version=lambda: version['current'])
+
+        def build(qb_name):
+            # New data published while the result is computed
+            version['current'] = 'v2'
+            return [{'Player': qb_name}]
+
+        cache.memoize('records')(build)('J.Allen')
+        rows = cache._connection().execute("SELECT version FROM results").fetchall()
+        assert rows == [('v1',)]
+
+    def test_size_based_eviction(self, tmp_path):
+        cache = ResultCache(str(tmp_path / 'results.sqlite'), max_bytes=4096, version=lambda: 'v1')
+        for i in range(50):
+            cache.set(f'key-{i}', {'values': [str(i * j) for j in range(200)]})
+        stats = cache.stats()
+        assert stats['bytes'] <= 4096
+        assert cache.get('key-49')[0]
+        assert not cache.get('key-0')[0]
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,81 @@
+"""
+Unit tests for the QB tendency similarity index.
+"""
+
+import pytest
+import numpy as np
+import pandas as pd
+from scenes.utils.columnar_store import PlayStore
+from scenes.utils.similarity import FEATURES, SUMS, TendencyIndex, tendency_vectors
+
+from test_bitmap_index import make_plays
+
+def profiled_plays(n=150):
+    # Two deep throwers, one short thrower and a backup with a handful of passes
+    rng = np.random.default_rng(2)
+    profiles = {'A.Deep': 18, 'B.Deep': 17, 'C.Short': 3, 'D.Backup': 18}
+    frames = []
+    for passer, depth in profiles.items():
+        size = 20 if passer == 'D.Backup' else n
+        frame = make_plays().sample(size, replace=True, random_state=len(frames)).reset_index(drop=True)
+        frame['passer_player_name'] = passer
+        frame['air_yards'] = rng.normal(depth, 3, size)
+        frame['game_date'] = pd.Timestamp('2022-09-11') + pd.to_timedelta(rng.integers(0, 120, size), unit='D')
+        frames.append(frame)
+    return pd.concat(frames, ignore_index=True)
+
+class TestTendencyIndex:
+    """Test cases for tendency vectors and nearest-peer lookups."""
+
+    def test_vectors_are_unit_length(self):
+        index = TendencyIndex.from_store(PlayStore.from_frame(profiled_plays()))
+        assert index.vectors.shape == (4, len(FEATURES))
+        assert index.eligible.tolist() == [True, True, True, False]
+        assert np.allclose(np.linalg.norm(index.vectors[:3], axis=1), 1, atol=1e-6)
+        assert not index.vectors[3].any()
+
+    def test_most_similar(self):
+        index = TendencyIndex.from_store(PlayStore.from_frame(profiled_plays()))
+        peers = index.most_similar('A.Deep', n=5)
+        # Itself and the backup are never suggested
+        assert [peer for peer, _ in peers] == ['B.Deep', 'C.Short']
+        assert peers[0][1] > peers[1][1]
+        assert index.most_similar('D.Backup') == [] and index.most_similar('Nobody') == []
+
+    def test_new_weeks_added_incrementally(self, capsys):
+        plays = profiled_plays()
+        cut = pd.Timestamp('2022-11-01')
+        earlier = TendencyIndex.from_store(PlayStore.from_frame(plays[plays['game_date'] <= cut]))
+        full = TendencyIndex.from_store(PlayStore.from_frame(plays))
+        updated = TendencyIndex.from_store(PlayStore.from_frame(plays), previous=earlier)
+        assert updated.through == full.through
+        assert np.allclose(updated.sums, full.sums) and np.allclose(updated.vectors, full.vectors)
+
+        # A rewritten earlier week means summing everything again
+        changed = TendencyIndex.from_store(PlayStore.from_frame(plays.iloc[1:]), previous=earlier)
+        assert 'rebuilding' in capsys.readouterr().out
+        assert changed.sums[:, SUMS.index('attempts')].sum() == len(plays) - 1
+
+    def test_save_and_load(self, tmp_path):
+        store = PlayStore.from_frame(profiled_plays())
+        TendencyIndex.from_store(store).save(str(tmp_path / 'tendencies'))
+        index = TendencyIndex.load(str(tmp_path / 'tendencies'), store)
+        assert index.most_similar('C.Short', n=1)[0][0] in ('A.Deep', 'B.Deep')
+
+        smaller = PlayStore.from_frame(profiled_plays().iloc[:10])
+        with pytest.raises(ValueError):
+            TendencyIndex.load(str(tmp_path / 'tendencies'), smaller)
+
+    def test_shares_and_moments(self):
+        index = TendencyIndex.from_store(PlayStore.from_frame(make_plays()))
+        allen = index.sums[index.passers.index('J.Allen')]
+        assert allen[SUMS.index('attempts')] == 3 and allen[SUMS.index('direction_N')] == 2
+        assert allen[SUMS.index('targets')] == 2
+        assert allen[SUMS.index('epa_squares')] == pytest.approx(0.01 + 0.09 + 5.76)
+        # No passer has enough attempts for a vector by default
+        assert not index.eligible.any()
+        vectors, eligible = tendency_vectors(index.sums, min_attempts=1)
+        assert eligible.all() and np.allclose(np.linalg.norm(vectors, axis=1), 1, atol=1e-6)
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,91 @@
+"""
+Unit tests for versioned data snapshots and the manifest watcher.
+"""
+
+import threading
+import time
+
+import pytest
+from scenes.utils.qb_shards import ShardCache
+from scenes.utils.result_cache import ResultCache
+from scenes.utils.snapshots import (
+    ManifestWatcher, content_hash, prune_snapshots, read_manifest, snapshot_paths, write_manifest
+)
+
+class TestSnapshots:
+    """Test cases for manifests, pruning and switching versions."""
+
+    def test_content_hash_follows_contents(self, tmp_path):
+        source = tmp_path / 'pbp.parquet'
+        source.write_bytes(b'plays')
+        first = content_hash([str(source), str(tmp_path / 'missing.parquet')])
+        assert len(first) == 12
+        assert content_hash([str(source)]) == first
+        source.write_bytes(b'more plays')
+        assert content_hash([str(source)]) != first
+
+    def test_content_hash_follows_salt(self, tmp_path):
+        source = tmp_path / 'pbp.parquet'
+        source.write_bytes(b'plays')
+        # Same source data, different ETL
+        assert content_hash([str(source)], salt='etl-2') != content_hash([str(source)], salt='etl-1')
+        assert content_hash([str(source)], salt='etl-2') == content_hash([str(source)], salt='etl-2')
+
+    def test_manifest_round_trip(self, tmp_path):
+        path = str(tmp_path / 'manifest.json')
+        assert read_manifest(path) is None
+        write_manifest({'version': 'abc', 'database': 'snapshots/abc/nfl.db',
+                        'columnar': 'snapshots/abc/columnar'}, path)
+        manifest = read_manifest(path)
+        assert manifest['version'] == 'abc'
+        database, columnar = snapshot_paths(manifest, path)
+        assert database == str(tmp_path / 'snapshots' / 'abc' / 'nfl.db')
+        assert columnar == str(tmp_path / 'snapshots' / 'abc' / 'columnar')
+
+        (tmp_path / 'broken.json').write_text('{"version": ')
+        assert read_manifest(str(tmp_path / 'broken.json')) is None
+
+    def test_prune_keeps_named_versions(self, tmp_path):
+        for version in ('v1', 'v2', 'v3'):
+            (tmp_path / version).mkdir()
+        prune_snapshots({'v2', 'v3'}, str(tmp_path))
+        assert sorted(path.name for path in tmp_path.iterdir()) == ['v2', 'v3']
+
+    def test_watcher_calls_back_on_change(self, tmp_path):
+        path = str(tmp_path / 'manifest.json')
+        write_manifest({'version': 'v1', 'database': 'a', 'columnar': 'b'}, path)
+        changed = threading.Event()
+        watcher = ManifestWatcher(path, changed.set, interval=0.05)
+        watcher.start()
+        try:
+            time.sleep(0.1)
+            assert not changed.is_set()
+            write_manifest({'version': 'v2', 'database': 'a', 'columnar': 'b'}, path)
+            assert changed.wait(2)
+        finally:
+            watcher.stop()
+
+    def test_shard_loaded_before_clear_is_not_cached(self):
+        cache = None
+
+        def loader(passer):
+            # A data refresh lands while this shard is loading
+            cache.clear()
+            return passer
+
+        cache = ShardCache(loader)
+        assert cache.get('J.Allen') == 'J.Allen'
+        assert len(cache) == 0
+
+    def test_drop_other_versions(self, tmp_path):
+        version = {'current': 'v1'}
+        cache = ResultCache(str(tmp_path / 'results.sqlite'), version=lambda: version['current'])
+        cache.set('old', [1])
+        version['current'] = 'v2'
+        cache.set('new', [2])
+        cache.drop_other_versions('v2')
+        assert not cache.get('old')[0]
+        assert cache.get('new') == (True, [2])
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,282 @@
+"""
+Unit tests for the SQL aggregations behind the summary figures.
+"""
+
+import pytest
+import duckdb
+import numpy as np
+import pandas as pd
+from scenes.utils.field_tiers import density_grid, field_coordinates
+from scenes.utils.sql_aggregates import (
+    DEFENSE_WEEKS_QUERY, PASSER_WEEKS_QUERY, WEEKLY_TOTALS, field_cell_counts, filter_clause,
+    opponent_adjusted, pass_stats_splits, playclock_counts, rose_counts, rose_counts_by_passer,
+    sankey_counts, table_filter_clause, table_page, weekly_running_totals, SummaryTables
+)
+from scenes.utils.qb_helpers import aggregate_sankey
+
+@pytest.fixture
+def con():
+    plays = pd.DataFrame({
+        'passer_player_name': ['J.Allen'] * 8 + ['J.Hurts'],
+        'receiver_player_name': ['S.Diggs', 'S.Diggs', 'S.Diggs', 'G.Davis', 'G.Davis', 'D.Knox', 'K.Shakir', None, 'A.Brown'],
+        'pass_touchdown': [1.0, 0.0, 0.0, 0.0, 0.0, 1.0, 0.0, 0.0, 0.0],
+        'first_down_pass': [0.0, 1.0, 0.0, 0.0, 1.0, 0.0, 0.0, 0.0, 1.0],
+        'first_down': [0.0, 1.0, 0.0, 0.0, 1.0, 0.0, None, 0.0, 1.0],
+        'down': [1.0, 2.0, 3.0, 1.0, 2.0, 3.0, 4.0, 1.0, 1.0],
+        'air_yards': [25.0, 10.0, 3.0, 8.0, 15.0, 22.0, 5.0, 2.0, 9.0],
+        'pass_direction': ['N', 'NE', 'E', 'N', 'W', 'N', 'S', 'N', 'N'],
+        'play_clock': [5, 10, 15, 20, 25, 30, 35, 40, 10],
+        'quarter_seconds_remaining': [900.0, 800.0, 700.0, 600.0, 500.0, 400.0, 300.0, 200.0, 100.0],
+        'depth_bin': ['20+ yd', '0-10 yd', '0-10 yd', '0-10 yd', '10-20 yd', '20+ yd', '0-10 yd', '0-10 yd', '0-10 yd'],
+        'game_date': ['2022-09-11', '2022-09-18', '2022-10-02', '2022-10-09', '2023-09-10', '2023-09-17', '2023-10-01', '2023-10-08', '2023-10-08'],
+        'season': [2022] * 4 + [2023] * 5,
+        'week': [1, 2, 4, 4, 1, 2, 4, 5, 5],
+        'posteam': ['BUF'] * 7 + ['NYJ', 'PHI'],
+        'defteam': ['MIA', 'MIA', 'NE', 'NE', 'MIA', 'MIA', 'NE', 'NE', 'MIA'],
+        'epa': [0.5, 0.2, -0.4, 0.1, None, 1.0, -0.2, 0.0, 0.3],
+        'complete_pass': [1.0, 1.0, 0.0, 0.0, 1.0, 1.0, None, 0.0, 1.0],
+        'pass_location_x': [20.0, 20.5, 45.0, 80.0, None, 99.0, 10.0, 50.0, 60.0],
+        'pass_location_y': [26.0, 26.5, 10.0, 40.0, 20.0, 53.0, 5.0, 26.0, 30.0],
+    })
+    connection = duckdb.connect()
+    connection.execute("CREATE TABLE pbp AS SELECT * FROM plays")
+    yield connection
+    connection.close()
+
+class TestRoseCounts:
+    """Test cases for the top-K receiver x outcome matrix."""
+
+    def test_dense_matrix_with_other_slice(self, con):
+        df = rose_counts(con, *filter_clause('J.Allen'), top_k=2)
+        assert len(df) == 9
+        assert df['Receiver'].tolist()[::3] == ['S.Diggs', 'G.Davis', 'Other']
+        assert df['Play Outcome'].tolist()[:3] == ['No First Down', 'First Down', 'Touchdown']
+        assert df['Frequency'].tolist() == [1, 1, 1, 1, 1, 0, 1, 0, 1]
+
+    def test_no_other_slice_when_everyone_fits(self, con):
+        df = rose_counts(con, *filter_clause('J.Allen'), top_k=8)
+        # Ties on targets rank alphabetically
+        assert df['Receiver'].tolist()[::3] == ['S.Diggs', 'G.Davis', 'D.Knox', 'K.Shakir']
+
+    def test_filters(self, con):
+        where, params = filter_clause('J.Allen', depth_filter=['20+ yd'], time_filter=[0, 900])
+        df = rose_counts(con, where, params)
+        assert df.groupby('Receiver')['Frequency'].sum().to_dict() == {'D.Knox': 1, 'S.Diggs': 1}
+
+        where, params = filter_clause('J.Allen', down_filter=[2, 3], playclock_filter=[10, 25],
+                                      start_date='2022-09-18', end_date='2022-10-02')
+        df = rose_counts(con, where, params)
+        assert df.groupby('Receiver')['Frequency'].sum().to_dict() == {'S.Diggs': 2}
+
+    def test_empty_selection(self, con):
+        df = rose_counts(con, *filter_clause('Nobody'))
+        assert df.empty
+        assert list(df.columns) == ['Receiver', 'Play Outcome', 'Frequency']
+
+class TestSankey:
+    """Test cases for the bounded Sankey counts and builder."""
+
+    def test_counts_fold_into_other(self, con):
+        counts = sankey_counts(con, *filter_clause('J.Allen'), top_k=1, stage='depth')
+        assert counts['receiver'].tolist() == ['S.Diggs', 'S.Diggs', 'Other', 'Other', 'Other']
+        assert counts['stage'].tolist() == ['0-10 yd', '20+ yd', '0-10 yd', '10-20 yd', '20+ yd']
+        assert counts['passes'].sum() == 7
+
+    def test_builder_links(self, con):
+        counts = sankey_counts(con, *filter_clause('J.Allen'), top_k=1, stage='outcome')
+        sankey = aggregate_sankey(counts, 'J.Allen', stage_order=['No First Down', 'First Down', 'Touchdown'],
+                                  stage_colors={'Touchdown': 'green'})
+        assert sankey['labels'] == ['J.Allen', 'S.Diggs', 'Other', 'No First Down', 'First Down', 'Touchdown']
+        assert sankey['source'].tolist() == [0, 0, 1, 1, 1, 2, 2, 2]
+        # Rows arrive alphabetically by stage; targets follow stage_order
+        assert sankey['target'].tolist() == [1, 2, 4, 3, 5, 4, 3, 5]
+        assert sankey['value'].tolist() == [3, 4, 1, 1, 1, 1, 2, 1]
+        assert sankey['link_colors'].tolist()[-1] == 'green'
+
+    def test_empty_builder(self):
+        assert aggregate_sankey(pd.DataFrame(columns=['receiver', 'stage', 'passes']), 'J.Allen')['labels'] == []
+
+class TestGroupedByPasser:
+    """Test cases for the comparison queries grouping several passers."""
+
+    def test_rose_matches_single_passer_queries(self, con):
+        grouped = rose_counts_by_passer(con, *filter_clause(passers=['J.Hurts', 'J.Allen']), top_k=2)
+        assert sorted(grouped['passer'].unique()) == ['J.Allen', 'J.Hurts']
+        for passer in ('J.Allen', 'J.Hurts'):
+            rows = grouped[grouped['passer'] == passer].drop(columns='passer').reset_index(drop=True)
+            single = rose_counts(con, *filter_clause(passer), top_k=2)
+            assert rows.values.tolist() == single.values.tolist()
+
+    def test_playclock_counts_are_right_inclusive(self, con):
+        counts = playclock_counts(con, *filter_clause(passers=['J.Allen', 'J.Hurts']))
+        allen = counts[counts['passer'] == 'J.Allen']
+        # One play at each of 5, 10, ..., 40 seconds: one per range
+        assert allen['bin'].tolist() == list(range(8)) and allen['plays'].tolist() == [1] * 8
+        assert counts[counts['passer'] == 'J.Hurts']['bin'].tolist() == [1]
+
+    def test_field_cells_match_density_grid(self, con):
+        bins = (30, 16)
+        cells = field_cell_counts(con, *filter_clause(passers=['J.Allen']), bins=bins)
+        plays = con.execute("SELECT pass_location_x, pass_location_y FROM pbp "
+                            "WHERE passer_player_name = 'J.Allen'").df()
+        expected = density_grid(*field_coordinates(plays['pass_location_x'], plays['pass_location_y']), bins)[2]
+        counts = np.zeros_like(expected)
+        counts[cells['cell_y'], cells['cell_x']] = cells['passes']
+        assert np.array_equal(counts, expected)
+        assert counts.sum() == 7
+
+class TestWeeklyRunningTotals:
+    """Test cases for the window query over the per-week rollup."""
+
+    def test_running_totals(self, con):
+        totals = weekly_running_totals(con, 'J.Allen')
+        assert list(zip(totals['season'], totals['week'])) == [
+            (2022, 1), (2022, 2), (2022, 4), (2023, 1), (2023, 2), (2023, 4), (2023, 5)]
+        # Two throws in week 4 of 2022 make one week
+        assert totals['attempts'].tolist() == [1, 2, 4, 5, 6, 7, 8]
+        assert totals['game_date'].tolist()[2] == '2022-10-02'
+        last = totals.iloc[-1]
+        assert (last['completions'], last['epa_count'], last['deep_attempts']) == (4, 7, 2)
+        # The unknown completion in week 4 of 2023 is left out of the rate's denominator
+        assert last['completion_count'] == 7
+        assert last['epa_sum'] == pytest.approx(1.2)
+        assert weekly_running_totals(con, 'Nobody').empty
+
+    def test_stored_rollup_gives_the_same_totals(self, con):
+        computed = weekly_running_totals(con, 'J.Allen')
+        con.execute(f"CREATE TABLE passer_weeks AS {PASSER_WEEKS_QUERY}")
+        stored = weekly_running_totals(con, 'J.Allen')
+        assert stored[WEEKLY_TOTALS].equals(computed[WEEKLY_TOTALS])
+
+def add_team_weeks(con):
+    # Two 2023 Miami games from the team stats tables; New England has none
+    offense = pd.DataFrame({
+        'game_id': ['2023_02_BUF_MIA', '2023_02_BUF_MIA', '2023_05_PHI_MIA', '2023_05_PHI_MIA'],
+        'team': ['BUF', 'MIA', 'PHI', 'MIA'], 'season': 2023, 'week': [2, 2, 5, 5],
+        'pass_attempts': [30, 40, 20, 30], 'complete_pass': [20, 30, 10, 15],
+    })
+    defense = offense[['game_id', 'team', 'season', 'week']].assign(interception=[0, 1, 2, 0], sack=[3, 2, 1, 4])
+    con.execute("CREATE TABLE team_weeks_offense AS SELECT * FROM offense")
+    con.execute("CREATE TABLE team_weeks_defense AS SELECT * FROM defense")
+    con.execute(f"CREATE TABLE defense_weeks AS {DEFENSE_WEEKS_QUERY}")
+
+class TestOpponentAdjusted:
+    """Test cases for rates against each defense's allowed average."""
+
+    def test_defense_allowed_the_other_offense(self, con):
+        add_team_weeks(con)
+        miami = con.execute("SELECT * FROM defense_weeks WHERE team = 'MIA' AND season = 2023 ORDER BY week").df()
+        assert miami['week'].tolist() == [1, 2, 5]
+        week2 = miami.iloc[1]
+        assert (week2['pass_attempts'], week2['completions'], week2['interceptions'], week2['sacks']) == (30, 20, 1, 2)
+        assert (week2['epa_count'], week2['epa_sum']) == (1, 1.0)
+        # Week 1 is only in pbp, and its one pass has no EPA
+        assert (miami.iloc[0]['epa_count'], miami.iloc[0]['pass_attempts']) == (0, 0)
+
+    def test_baseline_leaves_out_the_game(self, con):
+        add_team_weeks(con)
+        rows = opponent_adjusted(con, *filter_clause('J.Allen'))
+        assert rows['split'].tolist() == ['game'] * 3 + ['season'] + ['game'] * 4 + ['season', 'career']
+
+        game = rows[(rows['Season'] == 2023) & (rows['Week'] == 2)].iloc[0]
+        assert game['Opponent'] == 'MIA' and game['Attempts'] == 1
+        # Miami allowed 0.3 EPA/play and 10 of 20 passes in its other 2023 games
+        assert (game['EPA/Play'], game['Opp EPA/Play Allowed'], game['EPA/Play vs Opp']) == (1.0, 0.3, 0.7)
+        assert (game['Completion %'], game['Opp Completion % Allowed'], game['Completion % vs Opp']) == (1.0, 0.5, 0.5)
+
+        # No baseline without another game that season
+        lone = rows[(rows['Season'] == 2022) & (rows['Week'] == 4)].iloc[0]
+        assert lone['Attempts'] == 2 and pd.isna(lone['Opp EPA/Play Allowed'])
+
+        # New England only faced Allen (twice), so only the Miami game has a baseline
+        season = rows[rows['split'] == 'season'].iloc[1]
+        assert season['Attempts'] == 4 and season['EPA/Play vs Opp'] == pytest.approx(0.7)
+        # The week 4 pass has no known completion, so it is left out of Completion %
+        assert season['Completion %'] == pytest.approx(0.667)
+        assert pd.isna(rows[(rows['Season'] == 2023) & (rows['Week'] == 4)].iloc[0]['Completion %'])
+
+    def test_baseline_leaves_out_rematches(self, con):
+        # Allen also met Miami in week 1; that game must not lower Miami's baseline
+        con.execute("UPDATE pbp SET epa = -1.0 WHERE season = 2023 AND week = 1")
+        add_team_weeks(con)
+        rows = opponent_adjusted(con, *filter_clause('J.Allen', start_date='2023-09-15'))
+        game = rows[(rows['Season'] == 2023) & (rows['Week'] == 2)].iloc[0]
+        assert game['Opp EPA/Play Allowed'] == 0.3
+
+class TestPassStatsSplits:
+    """Test cases for the single GROUPING SETS stats query."""
+
+    def test_every_level_in_one_query(self, con):
+        df = pass_stats_splits(con, *filter_clause(down_filter=[1, 2, 3, 4]))
+        allen = df[df['Player'] == 'J.Allen']
+        assert allen['split'].tolist() == ['career', 'season', 'season', 'team', 'team']
+        assert allen['Season'].tolist()[1:3] == [2022, 2023]
+        assert allen['Team'].tolist()[3:] == ['BUF', 'NYJ']
+
+        career = allen.iloc[0]
+        assert career['% of Short Passes'] == 0.625 and career['% of Deep Passes'] == 0.25
+        # Missing EPA and completions are skipped
+        assert career['Avg EPA/Play'] == pytest.approx(1.2 / 7)
+        assert career['Completion %'] == pytest.approx(4 / 7)
+
+        # A depth bin nobody threw to is left empty
+        assert df[df['Player'] == 'J.Hurts']['% of Deep Passes'].isna().all()
+
+class TestTablePage:
+    """Test cases for server-side paging, sorting and filtering of the stats table."""
+
+    ROWS = [
+        {'Player': 'J.Allen', 'Avg EPA/Play': 0.2, 'Completion %': 0.65},
+        {'Player': 'J.Hurts', 'Avg EPA/Play': 0.1, 'Completion %': None},
+        {'Player': 'P.Mahomes', 'Avg EPA/Play': 0.3, 'Completion %': 0.7},
+        {'Player': 'T.Brady', 'Avg EPA/Play': -0.1, 'Completion %': 0.6},
+    ]
+
+    def test_filter_clause(self):
+        where, params = table_filter_clause('{Player} icontains "ALLEN" && {Avg EPA/Play} > 0.1 && {Bogus} = 1',
+                                            ['Player', 'Avg EPA/Play'])
+        assert where == 'TRUE AND contains(LOWER(CAST("Player" AS VARCHAR)), ?) AND ' \
+                        'TRY_CAST("Avg EPA/Play" AS DOUBLE) > ?'
+        assert params == ['allen', 0.1]
+
+    def test_sorted_pages(self, con):
+        sort_by = [{'column_id': 'Avg EPA/Play', 'direction': 'desc'}]
+        page, total = table_page(con, self.ROWS, sort_by=sort_by, page_current=1, page_size=3)
+        assert [row['Player'] for row in page] == ['T.Brady'] and total == 4
+
+        # Missing values sort last either way
+        sort_by = [{'column_id': 'Completion %', 'direction': 'desc'}]
+        page, _ = table_page(con, self.ROWS, sort_by=sort_by, page_size=4)
+        assert [row['Player'] for row in page] == ['P.Mahomes', 'J.Allen', 'T.Brady', 'J.Hurts']
+
+    def test_filtered_total(self, con):
+        page, total = table_page(con, self.ROWS, filter_query='{Player} contains "J." && {Avg EPA/Play} ge 0.15',
+                                 page_size=10)
+        assert [row['Player'] for row in page] == ['J.Allen'] and total == 1
+        assert table_page(con, [], filter_query='{Player} = x') == ([], 0)
+
+    def test_materialized_pages(self, con, tmp_path):
+        tables = SummaryTables(str(tmp_path / 'tables'))
+        builds = []
+
+        def build():
+            builds.append(1)
+            return self.ROWS
+
+        path = tables.materialize(con, 'v1', 'pass_stats|career', build)
+        assert tables.materialize(con, 'v1', 'pass_stats|career', build) == path and len(builds) == 1
+
+        sort_by = [{'column_id': 'Avg EPA/Play', 'direction': 'desc'}]
+        assert table_page(con, path, sort_by=sort_by, page_current=1, page_size=3) == \
+            table_page(con, self.ROWS, sort_by=sort_by, page_current=1, page_size=3)
+        page, total = table_page(con, path, filter_query='{Player} contains "J."', page_size=1)
+        assert [row['Player'] for row in page] == ['J.Allen'] and total == 2
+
+        # Nothing is stored for an empty summary, and other versions are dropped
+        assert tables.materialize(con, 'v1', 'empty', list) is None
+        tables.materialize(con, 'v2', 'pass_stats|career', build)
+        tables.drop_other_versions('v2')
+        assert not (tmp_path / 'tables' / 'v1').exists() and (tmp_path / 'tables' / 'v2').exists()
+
+if __name__ == "__main__":
+    pytest.main([__file__])
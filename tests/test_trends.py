@@ -0,0 +1,64 @@
+"""
+Unit tests for the weekly trend view.
+"""
+
+import pytest
+import numpy as np
+import pandas as pd
+from scenes.utils.sql_aggregates import WEEKLY_TOTALS
+from scenes.utils.trends import TREND_METRICS, rolling_trends, trend_figure
+
+def weekly_totals(n=10):
+    # Running totals of made-up weeks, as weekly_running_totals returns them
+    rng = np.random.default_rng(3)
+    weeks = pd.DataFrame({
+        'attempts': rng.integers(20, 45, n),
+        'completions': rng.integers(10, 20, n),
+        'completion_count': rng.integers(19, 21, n),
+        'epa_count': rng.integers(18, 20, n),
+        'epa_sum': rng.normal(2, 5, n),
+        'air_yards_count': rng.integers(15, 20, n),
+        'air_yards_sum': rng.normal(150, 30, n),
+        'deep_attempts': rng.integers(0, 6, n),
+    })
+    weeks.loc[3, ['epa_count', 'epa_sum']] = 0
+    totals = weeks.cumsum()
+    totals.insert(0, 'season', 2023)
+    totals.insert(1, 'week', np.arange(1, n + 1))
+    totals.insert(2, 'game_date', pd.date_range('2023-09-10', periods=n, freq='7D').strftime('%Y-%m-%d'))
+    return weeks, totals
+
+class TestTrends:
+    """Test cases for rolling rates from running totals."""
+
+    @pytest.mark.parametrize('window', [1, 3, 5, 20])
+    def test_matches_rolling_sums(self, window):
+        weeks, totals = weekly_totals()
+        trends = rolling_trends(totals, window)
+        rolled = weeks[WEEKLY_TOTALS].rolling(window, min_periods=1).sum()
+        assert trends['weeks'].tolist() == [min(position + 1, window) for position in range(10)]
+        for metric, (numerator, denominator, _) in TREND_METRICS.items():
+            expected = (rolled[numerator] / rolled[denominator].where(rolled[denominator] > 0)).to_numpy()
+            assert np.allclose(trends[metric], expected, equal_nan=True)
+
+    def test_week_without_epa(self):
+        _, totals = weekly_totals()
+        trends = rolling_trends(totals, 1)
+        assert np.isnan(trends['EPA/Play'][3]) and not np.isnan(trends['Completion %'][3])
+
+    def test_completion_rate_skips_unknown_completions(self):
+        weeks, totals = weekly_totals()
+        trends = rolling_trends(totals, 1)
+        # Attempts with an unknown completion are not counted as incomplete
+        assert trends['Completion %'][0] == weeks['completions'][0] / weeks['completion_count'][0]
+        assert weeks['completion_count'][0] != weeks['attempts'][0]
+
+    def test_figure_has_a_panel_per_metric(self):
+        _, totals = weekly_totals()
+        fig = trend_figure(rolling_trends(totals, 3), 'J.Allen', 3)
+        assert len(fig.data) == len(TREND_METRICS)
+        assert fig.layout.title.text == "J.Allen's 3-week rolling trends"
+        assert len(trend_figure(rolling_trends(totals.iloc[:0], 3), 'J.Allen', 3).data[0].x) == 0
+
+if __name__ == "__main__":
+    pytest.main([__file__])
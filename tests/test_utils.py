@@ -5,7 +5,10 @@ Unit tests for NFL QB dashboard utility functions.
 import pytest
 import pandas as pd
 import numpy as np
-from scenes.utils.qb_helpers import bin_direction, bin_depth, bin_playclock
+from scenes.utils.qb_helpers import (
+    bin_direction, bin_depth, bin_playclock,
+    aggregate_playclock, percentile_bands, nearest_peers
+)
 
 class TestQBHelpers:
     """Test cases for QB helper functions."""
@@ -88,5 +91,27 @@ class TestQBHelpers:
         assert bin_playclock(-1) == '15-20s'  # Default
         assert bin_playclock(50) == '35-40s'  # Max range
 
+    def test_aggregate_playclock(self):
+        """Test per-passer play clock distributions."""
+        df = pd.DataFrame({
+            'passer_player_name': ['B', 'A', 'A', 'A', 'B', 'B'],
+            'play_clock': [3, 5, 6, 40, 0, np.nan],
+        })
+        passers, shares, sample_shares = aggregate_playclock(df, bins=[0, 5, 10, 40])
+        assert passers == ['A', 'B']
+        assert shares.tolist() == [[1/3, 1/3, 1/3], [1.0, 0.0, 0.0]]
+        assert sample_shares.tolist() == [0.5, 0.25, 0.25]
+
+    def test_percentile_bands_and_peers(self):
+        """Test league bands and nearest peer selection."""
+        shares = np.array([[0.5, 0.5], [0.4, 0.6], [0.0, 1.0], [0.9, 0.1]])
+        bands = percentile_bands(shares, percentiles=(0, 50, 100))
+        assert bands[0].tolist() == [0.0, 0.1]
+        assert bands[100].tolist() == [0.9, 1.0]
+
+        peers = nearest_peers(['A', 'B', 'C', 'D'], shares, 'A', 2)
+        assert [peer for peer, _ in peers] == ['B', 'D']
+        assert nearest_peers(['A', 'B'], shares[:2], 'Z', 2) == []
+
 if __name__ == "__main__":
     pytest.main([__file__]) 
\ No newline at end of file